@@ -0,0 +1,145 @@
+# benchmarks/sqlite_perfiles.py
+#
+# Rendimiento de escritura de las vistas CRUD generadas con cada perfil de SQLite.
+# Lanza varios hilos que hacen POST a la vista <modelo>_crear de un proyecto generado
+# (con el python de su venv) sobre una copia de su base de datos:
+#
+#   python -m benchmarks.sqlite_perfiles <ruta_proyecto> <app> <Modelo> [--peticiones 400] [--hilos 8]
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from core.bd_config import PERFILES_SQLITE, opciones_sqlite, version_django_proyecto
+from core.django_worker import _modulo_settings
+
+# Se ejecuta en el python del venv del proyecto: solo Django y la biblioteca estándar
+_SCRIPT_PERFIL = """
+import importlib, json, os, sqlite3, sys, tempfile, threading, time
+ruta, modulo_settings, app, modelo, opciones, peticiones, hilos = sys.argv[1:8]
+opciones, peticiones, hilos = json.loads(opciones), int(peticiones), int(hilos)
+sys.path.insert(0, ruta)
+os.chdir(ruta)
+os.environ['DJANGO_SETTINGS_MODULE'] = modulo_settings
+settings = importlib.import_module(modulo_settings)
+
+# Copia de la BD del proyecto (con la API de backup: incluye lo que haya en el -wal), en el
+# mismo disco que la original para que los fsync cuesten lo mismo
+ruta_bd = str(settings.DATABASES['default']['NAME'])
+temporal = tempfile.TemporaryDirectory(dir=os.path.dirname(ruta_bd))
+copia = os.path.join(temporal.name, 'benchmark.sqlite3')
+origen = sqlite3.connect(ruta_bd)
+destino = sqlite3.connect(copia)
+origen.backup(destino)
+origen.close()
+destino.execute('PRAGMA journal_mode=DELETE')
+destino.close()
+settings.DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': copia, 'OPTIONS': opciones}}
+settings.ALLOWED_HOSTS = list(settings.ALLOWED_HOSTS) + ['testserver']
+
+import django
+django.setup()
+from django.apps import apps
+from django.db import connection, models
+from django.test import Client
+
+Modelo = apps.get_model(app, modelo)
+fk_existente = Modelo.objects.order_by('pk').values_list('pk', flat=True).first()
+
+def datos(n):
+    valores = {}
+    for campo in Modelo._meta.get_fields():
+        if not getattr(campo, 'editable', False) or campo.auto_created or getattr(campo, 'auto_now_add', False):
+            continue
+        if isinstance(campo, models.ForeignKey):
+            if fk_existente is None:
+                sys.exit(f'{modelo}.{campo.name} necesita al menos una fila existente')
+            valores[campo.name] = fk_existente
+        elif isinstance(campo, models.BooleanField):
+            valores[campo.name] = 'on'
+        elif isinstance(campo, models.IntegerField):
+            valores[campo.name] = n
+        elif isinstance(campo, models.EmailField):
+            valores[campo.name] = f'usuario{n}@benchmark.local'
+        else:
+            valores[campo.name] = f'benchmark {n}'
+    return valores
+
+url = f'/{app}/{modelo.lower()}/crear/'
+resultados = {'ok': 0, 'errores': 0, 'bloqueos': 0}
+candado = threading.Lock()
+
+def trabajador(indice):
+    cliente = Client(raise_request_exception=False)
+    for n in range(indice, peticiones, hilos):
+        try:
+            respuesta = cliente.post(url, datos(n))
+            clave = 'ok' if respuesta.status_code == 302 else 'errores'
+            if respuesta.status_code == 500 and b'locked' in respuesta.content:
+                clave = 'bloqueos'
+        except Exception as e:
+            clave = 'bloqueos' if 'locked' in str(e) else 'errores'
+        with candado:
+            resultados[clave] += 1
+    connection.close()
+
+Client().get(url)  # calentar plantillas y URLconf
+inicio = time.perf_counter()
+trabajadores = [threading.Thread(target=trabajador, args=(i,)) for i in range(hilos)]
+for t in trabajadores:
+    t.start()
+for t in trabajadores:
+    t.join()
+resultados['segundos'] = time.perf_counter() - inicio
+resultados['por_segundo'] = resultados['ok'] / resultados['segundos']
+print(json.dumps(resultados))
+temporal.cleanup()
+"""
+
+
+def _python_venv(ruta_proyecto: Path) -> Path:
+    """El venv está junto a la carpeta del proyecto (ver ProjectState.get_venv_python_path)"""
+    venv = ruta_proyecto.parent / "venv"
+    return venv / ("Scripts/python.exe" if os.name == "nt" else "bin/python")
+
+
+def medir_perfil(python: Path, ruta_proyecto: Path, app: str, modelo: str, perfil: str,
+                 peticiones: int, hilos: int) -> dict:
+    opciones = opciones_sqlite(perfil, version_django_proyecto(ruta_proyecto))
+    resultado = subprocess.run(
+        [str(python), "-c", _SCRIPT_PERFIL, str(ruta_proyecto), _modulo_settings(ruta_proyecto),
+         app, modelo, json.dumps(opciones), str(peticiones), str(hilos)],
+        capture_output=True, text=True
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip()[-500:])
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escrituras por segundo de las vistas CRUD con cada perfil de SQLite")
+    parser.add_argument("proyecto", type=Path)
+    parser.add_argument("app")
+    parser.add_argument("modelo")
+    parser.add_argument("--peticiones", type=int, default=400)
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--python", type=Path, help="python del venv (por defecto ../venv del proyecto)")
+    args = parser.parse_args()
+
+    ruta_proyecto = args.proyecto.resolve()
+    python = args.python or _python_venv(ruta_proyecto)
+    print(f"{args.peticiones} POST a /{args.app}/{args.modelo.lower()}/crear/ con {args.hilos} hilos")
+    print(f"{'perfil':<12} {'ok':>6} {'bloqueos':>9} {'errores':>8} {'seg':>7} {'escr/s':>8}")
+    for perfil in PERFILES_SQLITE:
+        try:
+            r = medir_perfil(python, ruta_proyecto, args.app, args.modelo, perfil, args.peticiones, args.hilos)
+        except RuntimeError as e:
+            print(f"{perfil:<12} falló: {e}")
+            continue
+        print(f"{perfil:<12} {r['ok']:>6} {r['bloqueos']:>9} {r['errores']:>8} {r['segundos']:>7.2f} {r['por_segundo']:>8.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,59 @@ from pathlib import Path
 import subprocess
 from pathlib import Path
 import os
+import re
+from core.editor_fuente import registrar_en_installed_apps
+from core.escritura import escribir_si_cambia
+from core.layout_proyecto import layout_de
+
+# PRAGMAs de cada perfil de SQLite; se ejecutan al abrir cada conexión
+PERFILES_SQLITE = {
+    "estandar": {},
+    "rendimiento": {
+        "journal_mode": "WAL",          # lecturas concurrentes con una escritura
+        "synchronous": "NORMAL",        # con WAL la BD sigue siendo consistente ante un corte
+        "cache_size": "-20000",         # ~20 MB de caché de páginas por conexión
+        "mmap_size": "134217728",       # 128 MB leídos por mmap
+        "busy_timeout": "5000",         # esperar al escritor en lugar de "database is locked"
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def opciones_sqlite(perfil: str, version_django: tuple = None) -> dict:
+    """OPTIONS de DATABASES para el perfil (init_command y transaction_mode existen desde Django 5.1)"""
+    pragmas = PERFILES_SQLITE.get(perfil) or {}
+    if not pragmas:
+        return {}
+    if version_django and version_django < (5, 1):
+        return {"timeout": int(pragmas["busy_timeout"]) // 1000}
+    return {
+        "init_command": "".join(f"PRAGMA {nombre}={valor};" for nombre, valor in pragmas.items()),
+        # BEGIN IMMEDIATE: la transacción toma el bloqueo de escritura al empezar y no falla a mitad
+        "transaction_mode": "IMMEDIATE",
+    }
+
+
+# Pool nativo de Django para psycopg 3 (Django 5.1+): conexiones reutilizadas entre peticiones
+POOL_POSTGRES = {"min_size": 2, "max_size": 10, "timeout": 10}
+
+# Sin pool: segundos que se mantiene abierta cada conexión (comprobada antes de reutilizarla)
+CONN_MAX_AGE_POSTGRES = 600
+
+
+def version_django_proyecto(project_dir: Path):
+    """Versión de Django fijada en el requirements.txt del proyecto, o None"""
+    requirements = Path(project_dir) / "requirements.txt"
+    if not requirements.exists():
+        return None
+    match = re.search(r"^django==(\d+)\.(\d+)", requirements.read_text(encoding="utf-8"), re.IGNORECASE | re.MULTILINE)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+def tupla_version(version: str):
+    """"5.2.18" -> (5, 2); None si no se puede leer"""
+    match = re.match(r"(\d+)\.(\d+)", version or "")
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
 
 class DatabaseConfig:
     def __init__(self, project_name="Mi_proyecto"):
@@ -12,17 +65,28 @@ class DatabaseConfig:
         self.models = []
         self.apps={}
         self.project_name = project_name
+        self.sqlite_profile = "rendimiento"
+        self.django_version = None
+        # Se genera una vez; si el proyecto ya tiene settings.py se conserva la suya
+        self.secret_key = None
+
+    def set_django_version(self, version: str):
+        """Versión de Django del proyecto (la del esqueleto); sin ella se lee del requirements.txt"""
+        self.django_version = tupla_version(version)
 
     def set_database_type(self, db_type: str):
         self.db_type = db_type
 
-    def set_postgres_config(self, name: str, user: str, password: str, host: str = "localhost", port: str = "5432"):
+    def set_postgres_config(self, name: str, user: str, password: str, host: str = "localhost", port: str = "5432",
+                            pool: bool = True, server_side_binding: bool = False):
         self.postgres_config = {
             "name": name,
             "user": user,
             "password": password,
             "host": host,
-            "port": port
+            "port": port,
+            "pool": pool,
+            "server_side_binding": server_side_binding
         }
 
     def add_model(self, app_name: str, model_name: str, fields: list):
@@ -36,12 +100,14 @@ class DatabaseConfig:
     
     def generate_django_settings(self) -> str:
         db_config = self._generate_db_config()
+        if not self.secret_key:
+            self.secret_key = ''.join(random.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=50))
         
         return f'''import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-SECRET_KEY = '{''.join(random.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=50))}'
+SECRET_KEY = '{self.secret_key}'
 
 DEBUG = True
 ALLOWED_HOSTS = []
@@ -106,12 +172,30 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 '''
 
     def _generate_sqlite_config(self) -> str:
-        return '''DATABASES = {
+        opciones = opciones_sqlite(self.sqlite_profile, self.django_version)
+        if not opciones:
+            return '''DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }'''
+        lineas_opciones = ""
+        for clave, valor in opciones.items():
+            if clave == "init_command":
+                pragmas = "".join(f"\n                '{p};'" for p in valor.split(";") if p)
+                lineas_opciones += f"            'init_command': ({pragmas}\n            ),\n"
+            else:
+                lineas_opciones += f"            {clave!r}: {valor!r},\n"
+        return f'''DATABASES = {{
+    'default': {{
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        # Perfil de rendimiento de SQLite
+        'OPTIONS': {{
+{lineas_opciones}        }},
+    }}
+}}'''
 
     def _generate_postgres_config(self) -> str:
         return f'''DATABASES = {{
@@ -122,9 +206,34 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
         'PASSWORD': '{self.postgres_config["password"]}',
         'HOST': '{self.postgres_config["host"]}',
         'PORT': '{self.postgres_config["port"]}',
+{self._generate_postgres_connections()}
     }}
 }}'''
 
+    def _generate_postgres_connections(self) -> str:
+        """Reutilización de conexiones: pool de psycopg 3 o conexiones persistentes con health checks"""
+        server_side_binding = self.postgres_config.get("server_side_binding", False)
+        # El pool nativo llegó en Django 5.1; con una versión desconocida 'pool' podría romper la
+        # conexión, así que solo se usa si se sabe que el proyecto lo admite
+        if self.postgres_config.get("pool", True) and self.django_version and self.django_version >= (5, 1):
+            pool = "".join(f"\n                {clave!r}: {valor!r}," for clave, valor in POOL_POSTGRES.items())
+            return f'''        # Pool de conexiones de psycopg 3 (exige CONN_MAX_AGE = 0)
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {{
+            'pool': {{{pool}
+            }},
+            'server_side_binding': {server_side_binding!r},
+        }},'''
+        conexiones = f'''        # Conexiones persistentes, comprobadas antes de reutilizarlas
+        'CONN_MAX_AGE': {CONN_MAX_AGE_POSTGRES},
+        'CONN_HEALTH_CHECKS': True,'''
+        if server_side_binding:
+            conexiones += """
+        'OPTIONS': {
+            'server_side_binding': True,
+        },"""
+        return conexiones
+
     def generate_models_code(self) -> str:
         if not self.models:
             return "from django.db import models\n\n# Añade tus modelos aquí."
@@ -152,31 +261,38 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
         apps_dir = project_dir / "apps"
         apps_dir.mkdir(exist_ok=True)
 
-        # Corregir la ruta del settings.py (era incorrecta)
-        settings_file = project_dir / self.project_name / "settings.py"
+        settings_file = layout_de(project_dir, self.project_name).settings
         
-        # SIEMPRE sobrescribir el settings.py con la configuración actualizada
-        with open(settings_file, "w") as f:
-            f.write(self.generate_django_settings())
+        # Las opciones de la base de datos dependen de la versión de Django del proyecto
+        if self.django_version is None:
+            self.django_version = version_django_proyecto(project_dir)
         
-        print(f"Settings.py actualizado con configuración {self.db_type.upper()}") 
+        # Misma SECRET_KEY que ya tenga el proyecto: una nueva invalida las sesiones y cambia el archivo
+        if not self.secret_key and settings_file.exists():
+            match = re.search(r"^SECRET_KEY\s*=\s*['\"]([^'\"]+)['\"]", settings_file.read_text(encoding="utf-8"), re.MULTILINE)
+            if match:
+                self.secret_key = match.group(1)
+        
+        # settings.py con la configuración actual (no se toca si no cambia nada)
+        if escribir_si_cambia(settings_file, self.generate_django_settings()):
+            print(f"Settings.py actualizado con configuración {self.db_type.upper()}") 
         
         for app_name, models in self.apps.items():
             app_dir = project_dir / "apps" / app_name
             app_dir.mkdir(exist_ok=True)
             
-            with open(app_dir / "models.py", "w") as f:
-                f.write("from django.db import models\n\n")
-                for model in models:
-                    f.write(f"class {model['name']}(models.Model):\n")
-                    for field in model['fields']:
-                        f.write(f"    {field['name']} = models.{field['type']}\n")
-                    f.write("\n\n")
-
-            with open(app_dir / "admin.py", "w") as f:
-                f.write("from django.contrib import admin\nfrom .models import *\n\n")
-                for model in models:
-                    f.write(f"admin.site.register({model['name']})\n")
+            models_content = "from django.db import models\n\n"
+            for model in models:
+                models_content += f"class {model['name']}(models.Model):\n"
+                for field in model['fields']:
+                    models_content += f"    {field['name']} = models.{field['type']}\n"
+                models_content += "\n\n"
+            escribir_si_cambia(app_dir / "models.py", models_content)
+
+            admin_content = "from django.contrib import admin\nfrom .models import *\n\n"
+            for model in models:
+                admin_content += f"admin.site.register({model['name']})\n"
+            escribir_si_cambia(app_dir / "admin.py", admin_content)
 
     def _generate_db_config(self) -> str:
         if self.db_type == "sqlite":
@@ -189,26 +305,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
     def update_installed_apps(self, settings_path: str, app_name: str):
         try:
-            with open(settings_path, 'r+', encoding='utf-8') as f:
-                content = f.read()
-                
-                # Verificar si la app ya está registrada
-                if f"'apps.{app_name}'" in content:
-                    return
-                
-                # Buscar el bloque INSTALLED_APPS y preservar indentación
-                if "'django.contrib.staticfiles'," in content:
-                    lines = content.split('\n')
-                    for i, line in enumerate(lines):
-                        if "'django.contrib.staticfiles'," in line:
-                            # Obtener la indentación de la línea actual
-                            indentation = line[:len(line) - len(line.lstrip())]
-                            lines.insert(i + 1, f"{indentation}'apps.{app_name}',")
-                            break
-                    nuevo_content = '\n'.join(lines)
-                    f.seek(0)
-                    f.write(nuevo_content)
-                    f.truncate()
+            registrar_en_installed_apps(Path(settings_path), f"apps.{app_name}")
         except Exception as e:
             print(f"Error al actualizar settings.py: {e}")
 
@@ -0,0 +1,234 @@
+# core/consolidacion.py
+import ast
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.django_worker import ejecutar_en_proyecto
+from core.editor_fuente import abrir
+from core.layout_proyecto import layout_de
+from core.lock_dependencias import versiones_instaladas
+from core.migraciones import MigracionNoSoportada, escribir_migracion, leer_spec_modelo, migraciones_de_app
+from core.plan_migraciones import DIR_ESTADO, PlanMigraciones, huellas_migraciones, ruta_sqlite
+
+# Operaciones que no se pueden reconstruir desde models.py: si aparecen, la app no se consolida
+OPERACIONES_CON_DATOS = {"RunPython", "RunSQL", "SeparateDatabaseAndState"}
+
+# Tablas cuyas filas forman parte del esquema (las rellena migrate, no el usuario)
+TABLAS_DE_ESQUEMA = ["django_migrations", "django_content_type", "auth_permission"]
+
+ARCHIVO_ESQUEMA = "esquema.json"
+
+
+def modelos_de_archivo(models_path: Path) -> List[str]:
+    """Clases que heredan de models.Model en models.py, en orden"""
+    return [
+        nodo.name for nodo in abrir(models_path).arbol.body
+        if isinstance(nodo, ast.ClassDef) and any(ast.unparse(b) == "models.Model" for b in nodo.bases)
+    ]
+
+
+def _operaciones_migracion(archivo: Path) -> set:
+    arbol = ast.parse(archivo.read_text(encoding="utf-8"))
+    return {
+        nodo.func.attr for nodo in ast.walk(arbol)
+        if isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Attribute)
+        and isinstance(nodo.func.value, ast.Name) and nodo.func.value.id == "migrations"
+    }
+
+
+def _motivo_para_no_consolidar(project_dir: Path, app_label: str) -> Optional[str]:
+    migrations_dir = project_dir / "apps" / app_label / "migrations"
+    nombres = migraciones_de_app(migrations_dir)
+    if len(nombres) < 2:
+        return "no hay nada que consolidar"
+
+    for nombre in nombres:
+        operaciones = _operaciones_migracion(migrations_dir / f"{nombre}.py") & OPERACIONES_CON_DATOS
+        if operaciones:
+            return f"{nombre} usa {', '.join(sorted(operaciones))}"
+
+    # Otras apps que dependan de una migración intermedia se quedarían con una dependencia rota
+    for otra in (project_dir / "apps").iterdir():
+        if otra.name == app_label or not (otra / "migrations").is_dir():
+            continue
+        for nombre in migraciones_de_app(otra / "migrations"):
+            contenido = (otra / "migrations" / f"{nombre}.py").read_text(encoding="utf-8")
+            if re.search(rf"\(\s*['\"]{app_label}['\"]\s*,\s*['\"](?!0001_initial['\"])", contenido):
+                return f"{otra.name}/{nombre} depende de sus migraciones"
+
+    pendientes = PlanMigraciones(project_dir).apps_pendientes()
+    if pendientes is None or app_label in pendientes:
+        return "tiene migraciones sin aplicar"
+    return None
+
+
+def consolidar_app(project_dir: Path, app_label: str, venv_python: str, tipos: Dict[str, str]) -> Optional[str]:
+    """Sustituye el historial de migraciones de la app por un único 0001_initial con el esquema actual.
+
+    Solo tiene sentido mientras el proyecto no está publicado: cualquier otra base de datos con el
+    historial antiguo dejaría de coincidir. Las migraciones anteriores se guardan en
+    .automatizador/migraciones_previas y se restauran si algo falla. Devuelve el error o None.
+    """
+    project_dir = Path(project_dir)
+    app_dir = project_dir / "apps" / app_label
+    migrations_dir = app_dir / "migrations"
+
+    motivo = _motivo_para_no_consolidar(project_dir, app_label)
+    if motivo:
+        print(f"No se consolidan las migraciones de {app_label}: {motivo}")
+        return None
+
+    nombres = migraciones_de_app(migrations_dir)
+    respaldo = project_dir / DIR_ESTADO / "migraciones_previas" / app_label / datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    respaldo.mkdir(parents=True, exist_ok=True)
+    for nombre in nombres:
+        shutil.move(str(migrations_dir / f"{nombre}.py"), str(respaldo / f"{nombre}.py"))
+
+    def restaurar():
+        for archivo in migraciones_de_app(migrations_dir):
+            (migrations_dir / f"{archivo}.py").unlink()
+        for nombre in nombres:
+            shutil.move(str(respaldo / f"{nombre}.py"), str(migrations_dir / f"{nombre}.py"))
+
+    try:
+        try:
+            cambios = [(m, None, leer_spec_modelo(app_dir / "models.py", m, tipos)) for m in modelos_de_archivo(app_dir / "models.py")]
+            escribir_migracion(app_dir, cambios)
+        except MigracionNoSoportada:
+            resultado = ejecutar_en_proyecto(venv_python, str(project_dir), "makemigrations", apps=[app_label])
+            if not resultado["ok"]:
+                raise RuntimeError(resultado.get("error"))
+
+        # La nueva migración debe describir exactamente lo que ya hay en la base de datos
+        resultado = ejecutar_en_proyecto(venv_python, str(project_dir), "makemigrations", apps=[app_label], dry_run=True)
+        if not resultado["ok"] or "No changes detected" not in resultado["salida"]:
+            raise RuntimeError(resultado.get("error") or resultado.get("salida"))
+    except Exception as e:
+        restaurar()
+        return f"No se pudieron consolidar las migraciones de {app_label}: {e}"
+
+    nuevas = migraciones_de_app(migrations_dir)
+    resultado = ejecutar_en_proyecto(
+        venv_python, str(project_dir), "registrar_migraciones", app=app_label, migraciones=nuevas
+    )
+    if not resultado["ok"]:
+        restaurar()
+        return f"No se pudo actualizar django_migrations para {app_label}: {resultado.get('error')}"
+
+    print(f"Migraciones de {app_label} consolidadas: {len(nombres)} -> {len(nuevas)} (previas en {respaldo})")
+    PlanMigraciones(project_dir).registrar([app_label])
+    return None
+
+
+def _clave_esquema(project_dir: Path, venv_path: Path) -> str:
+    """Identifica el esquema: versión de Django, INSTALLED_APPS y migraciones de las apps"""
+    settings = layout_de(project_dir).settings
+    installed = ""
+    if settings.exists():
+        match = re.search(r"INSTALLED_APPS\s*=\s*\[(.*?)\]", settings.read_text(encoding="utf-8"), re.DOTALL)
+        installed = re.sub(r"\s+", "", match.group(1)) if match else ""
+    datos = {
+        "django": versiones_instaladas(venv_path).get("django", ""),
+        "installed_apps": installed,
+        "migraciones": huellas_migraciones(project_dir),
+    }
+    return hashlib.sha256(json.dumps(datos, sort_keys=True).encode()).hexdigest()
+
+
+def guardar_esquema(project_dir: Path, venv_path: Path) -> bool:
+    """Guarda el esquema de la BD SQLite (sin datos del usuario) para arrancar bases nuevas sin migrate"""
+    project_dir = Path(project_dir)
+    ruta_bd = ruta_sqlite(project_dir)
+    if ruta_bd is None or not ruta_bd.exists() or PlanMigraciones(project_dir).apps_pendientes() != []:
+        return False
+
+    conexion = sqlite3.connect(f"file:{ruta_bd}?mode=ro", uri=True, timeout=5)
+    try:
+        # Tablas antes que índices; sqlite_* son internas y se crean solas
+        sentencias = [
+            sql for (sql,) in conexion.execute(
+                "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+                "ORDER BY CASE type WHEN 'table' THEN 0 ELSE 1 END, rowid"
+            )
+        ]
+        filas = {}
+        for tabla in TABLAS_DE_ESQUEMA:
+            try:
+                cursor = conexion.execute(f'SELECT * FROM "{tabla}"')
+            except sqlite3.OperationalError:
+                continue
+            filas[tabla] = {
+                "columnas": [c[0] for c in cursor.description],
+                "valores": [list(f) for f in cursor.fetchall()],
+            }
+    finally:
+        conexion.close()
+
+    destino = project_dir / DIR_ESTADO / ARCHIVO_ESQUEMA
+    destino.parent.mkdir(exist_ok=True)
+    temporal = destino.with_suffix(".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump({"clave": _clave_esquema(project_dir, Path(venv_path)), "sentencias": sentencias, "filas": filas}, f)
+    os.replace(temporal, destino)
+    return True
+
+
+def _bd_vacia(ruta_bd: Path) -> bool:
+    """Sin archivo o sin tablas (Django crea el archivo vacío en cuanto abre una conexión)"""
+    if not ruta_bd.exists():
+        return True
+    try:
+        conexion = sqlite3.connect(f"file:{ruta_bd}?mode=ro", uri=True, timeout=5)
+        try:
+            return conexion.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0
+        finally:
+            conexion.close()
+    except sqlite3.Error:
+        return False
+
+
+def inicializar_bd(project_dir: Path, venv_path: Path) -> bool:
+    """Crea una BD SQLite nueva desde el esquema guardado, en una sola transacción.
+
+    Solo actúa si la base de datos está vacía y el esquema corresponde a las migraciones actuales.
+    """
+    project_dir = Path(project_dir)
+    ruta_bd = ruta_sqlite(project_dir)
+    origen = project_dir / DIR_ESTADO / ARCHIVO_ESQUEMA
+    if ruta_bd is None or not _bd_vacia(ruta_bd) or not origen.exists():
+        return False
+    try:
+        with open(origen, "r", encoding="utf-8") as f:
+            esquema = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if esquema.get("clave") != _clave_esquema(project_dir, Path(venv_path)):
+        return False
+
+    temporal = ruta_bd.with_name(ruta_bd.name + ".tmp")
+    temporal.unlink(missing_ok=True)
+    conexion = sqlite3.connect(temporal, isolation_level=None)
+    try:
+        conexion.execute("BEGIN")
+        for sentencia in esquema["sentencias"]:
+            conexion.execute(sentencia)
+        for tabla, datos in esquema["filas"].items():
+            columnas = ", ".join(f'"{c}"' for c in datos["columnas"])
+            marcadores = ", ".join("?" for _ in datos["columnas"])
+            conexion.executemany(f'INSERT INTO "{tabla}" ({columnas}) VALUES ({marcadores})', datos["valores"])
+        conexion.execute("COMMIT")
+    except sqlite3.Error as e:
+        conexion.close()
+        temporal.unlink(missing_ok=True)
+        print(f"No se pudo crear la base de datos desde el esquema guardado: {e}")
+        return False
+    conexion.close()
+    os.replace(temporal, ruta_bd)
+    return True
@@ -4,52 +4,146 @@ import asyncio
 from pathlib import Path
 import sys
 import os
+from core.wheelhouse import Wheelhouse
+from core.plantilla_entorno import PAQUETES_DRIVER_POSTGRES, PlantillaEntorno, misma_serie_django, requisito_django
+from core.pool_entornos import PoolEntornos
+from core.entorno_capas import EntornoBase, crear_entorno_en_capas
+from core.esqueleto_proyecto import VERSION_DJANGO_POR_DEFECTO, generar_esqueleto
+from core.pip_progreso import ProgresoPip
+from core.lock_dependencias import NOMBRE_LOCK, CacheEntornos, lock_de_entorno, resolver_lock, versiones_instaladas
+from typing import Callable, Dict, Optional
 
-async def crear_entorno_virtual(nombre: str, ruta_base: str, nombre_proyecto: str) -> str:
+# Aprovisionamientos en curso (ruta del entorno -> tarea) para esperar solo cuando haga falta
+_instalaciones: Dict[str, asyncio.Task] = {}
+# Instalaciones del driver de PostgreSQL en curso o terminadas (ruta del entorno -> tarea)
+_drivers_postgres: Dict[str, asyncio.Task] = {}
+# Versión de Django para la que se generó cada esqueleto (ruta del proyecto -> versión); se
+# conoce antes de que el entorno termine de instalarse y escriba el requirements.txt
+_versiones_django: Dict[str, str] = {}
+
+
+def registrar_lock_proyecto(ruta_entorno: str, ruta_proyecto: str) -> Optional[str]:
+    """Escribe el lock del entorno terminado y lo guarda en la caché por digest. Con hashes solo si
+    están todos (un entorno del pool o de la plantilla puede tener paquetes fuera del wheelhouse)"""
+    try:
+        lock = lock_de_entorno(Path(ruta_entorno))
+        if not lock.paquetes:
+            return None
+        lock.escribir(Path(ruta_proyecto) / NOMBRE_LOCK)
+        CacheEntornos().guardar(lock, Path(ruta_entorno))
+        return lock.digest()
+    except Exception as e:
+        print(f"No se pudo generar el lock de dependencias: {e}")
+        return None
+
+
+async def _aprovisionar_entorno(ruta_completa: Path, ruta_proyecto: Path, django_admin: str, modo: str,
+                                pool: Optional[PoolEntornos],
+                                progreso: Optional[Callable[[ProgresoPip], None]],
+                                interprete: str, version_django: str):
+    # Todas las vías instalan la versión de Django con la que se generó el esqueleto.
+    # El pool solo sirve si se construyó con el mismo intérprete y esa versión; moverlo (un
+    # shutil.move entre sistemas de archivos) y reubicarlo se hace fuera del event loop
+    if (modo == "pool" and pool and pool.interprete == interprete
+            and await asyncio.to_thread(pool.tomar, ruta_completa, version_django)):
+        # Entorno pre-calentado: no hay nada más que instalar
+        pool.programar_relleno()
+    elif modo == "capas":
+        # Venv mínimo + .pth hacia el entorno base compartido
+        await crear_entorno_en_capas(ruta_completa, EntornoBase(interprete, version_django), progreso)
+    elif modo == "plantilla":
+        # Clonar la plantilla ya aprovisionada (Django + drivers)
+        await PlantillaEntorno(interprete, version_django).clonar_en(ruta_completa, progreso)
+    elif not await _restaurar_o_instalar(ruta_completa, ruta_proyecto, django_admin, progreso, interprete,
+                                         version_django):
+        raise subprocess.CalledProcessError(1, "django installation")
+
+    instalada = await asyncio.to_thread(lambda: versiones_instaladas(ruta_completa).get("django"))
+    if not misma_serie_django(instalada, version_django):
+        print(f"Aviso: el entorno tiene Django {instalada} y el proyecto se generó para {version_django}")
+
+    # Lock exacto de lo instalado; entornos con el mismo lock se restaurarán de la caché
+    await asyncio.to_thread(registrar_lock_proyecto, str(ruta_completa), str(ruta_proyecto))
+    print(f"Entorno {ruta_completa} listo")
+
+
+async def _restaurar_o_instalar(ruta_completa: Path, ruta_proyecto: Path, django_admin: str,
+                                progreso: Optional[Callable[[ProgresoPip], None]], interprete: str,
+                                version_django: str) -> bool:
+    # Resolver primero: si otro proyecto ya instaló exactamente este lock, se clona su entorno
+    lock = await resolver_lock(interprete, [requisito_django(version_django)], progreso)
+    if lock and await asyncio.to_thread(CacheEntornos().restaurar, lock, ruta_completa):
+        return True
+
+    # Crear entorno virtual
+    proc = await asyncio.create_subprocess_exec(
+        interprete, "-m", "venv", str(ruta_completa),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    await proc.communicate()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, "venv creation")
+
+    # Instalar Django desde el wheelhouse; los .pyc se generan después en
+    # segundo plano (core.precompilar) en lugar de en serie dentro de pip
+    wheelhouse = Wheelhouse(django_admin, compilar=False)
+    if lock:
+        ruta_lock = ruta_proyecto / NOMBRE_LOCK
+        lock.escribir(ruta_lock)
+        return await wheelhouse.instalar_lock(ruta_lock, progreso)
+    return await wheelhouse.instalar([requisito_django(version_django)], progreso)
+
+
+def version_django_de(ruta_proyecto: str) -> Optional[str]:
+    """Versión de Django del esqueleto del proyecto (la que va a tener su entorno), o None"""
+    return _versiones_django.get(str(Path(ruta_proyecto)))
+
+
+async def esperar_entorno(ruta_entorno: str):
+    """Bloquea hasta que el entorno termine de instalarse (relanza su error si falló)"""
+    tarea = _instalaciones.get(str(Path(ruta_entorno)))
+    if tarea is not None:
+        await tarea
+
+
+def entorno_listo(ruta_entorno: str) -> bool:
+    tarea = _instalaciones.get(str(Path(ruta_entorno)))
+    return tarea is None or tarea.done()
+
+
+async def crear_entorno_virtual(nombre: str, ruta_base: str, nombre_proyecto: str, modo: str = "estandar",
+                                pool: Optional[PoolEntornos] = None,
+                                progreso: Optional[Callable[[ProgresoPip], None]] = None,
+                                interprete: Optional[str] = None) -> str:
     try:
         ruta_completa = Path(ruta_base) / nombre
-        
-        # 1. Crear entorno virtual
-        proc = await asyncio.create_subprocess_exec(
-            sys.executable, "-m", "venv", str(ruta_completa),
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        await proc.communicate()
-        if proc.returncode != 0:
-            raise subprocess.CalledProcessError(proc.returncode, "venv creation")
+        interprete = interprete or sys.executable
 
-        # 2. Instalar Django - Detectar sistema operativo
         if os.name == "nt":  # Windows
-            pip_path = str(ruta_completa / "Scripts" / "pip")
             django_admin = str(ruta_completa / "Scripts" / "python")
         else:  # Linux/macOS
-            pip_path = str(ruta_completa / "bin" / "pip")
             django_admin = str(ruta_completa / "bin" / "python")
-            
-        proc = await asyncio.create_subprocess_exec(
-            pip_path, "install", "django",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        await proc.communicate()
-        if proc.returncode != 0:
-            raise subprocess.CalledProcessError(proc.returncode, "django installation")
         
-        # 3. Crear proyecto Django usando python -m django (más compatible)
-        # Django creará automáticamente la carpeta del proyecto
-        proc = await asyncio.create_subprocess_exec(
-            django_admin, "-m", "django", "startproject", nombre_proyecto,
-            cwd=ruta_base,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
+        # 1. Crear el esqueleto del proyecto en proceso (lo mismo que startproject) para la
+        # versión de Django del wheelhouse; el entorno se aprovisiona fijado a esa versión
+        version_django = Wheelhouse(interprete).version_disponible("django") or VERSION_DJANGO_POR_DEFECTO
+        generar_esqueleto(ruta_base, nombre_proyecto, version_django)
+        _versiones_django[str(Path(ruta_base) / nombre_proyecto)] = version_django
+        
+        # 2. Crear el entorno e instalar Django en segundo plano; el asistente solo
+        # espera cuando un comando de manage.py lo necesita (esperar_entorno)
+        _instalaciones[str(ruta_completa)] = asyncio.create_task(
+            _aprovisionar_entorno(
+                ruta_completa, Path(ruta_base) / nombre_proyecto, django_admin, modo, pool, progreso, interprete,
+                version_django
+            )
         )
-        await proc.communicate()
-        if proc.returncode != 0:
-            raise subprocess.CalledProcessError(proc.returncode, "django project creation")
         
-        return f"Entorno '{nombre}' y proyecto '{nombre_proyecto}' creados correctamente"
+        return f"Proyecto '{nombre_proyecto}' creado; entorno '{nombre}' instalándose en segundo plano"
     except subprocess.CalledProcessError as e:
+        return f"Error: {str(e)}"
+    except ValueError as e:
         # Si hay error de nombre conflictivo, sugerir alternativa
         if "conflicts with the name" in str(e):
             return f"Error: El nombre '{nombre_proyecto}' está reservado. Prueba con nombres como: sitio_web, mi_app, proyecto_django"
@@ -57,59 +151,58 @@ async def crear_entorno_virtual(nombre: str, ruta_base: str, nombre_proyecto: st
     except Exception as e:
         return f"Error: {str(e)}"
 
-async def instalar_psycopg2(ruta_entorno: str) -> bool:
-    """Instala psycopg2-binary para soporte de PostgreSQL"""
+async def instalar_driver_postgres(ruta_entorno: str, progreso: Optional[Callable[[ProgresoPip], None]] = None,
+                                  ruta_proyecto: Optional[str] = None) -> bool:
+    """Instala psycopg 3 con su pool (lo que usa el settings generado por DatabaseConfig)"""
     try:
-        # Detectar sistema operativo para encontrar pip
+        # Detectar sistema operativo para encontrar el python del entorno
         if os.name == "nt":  # Windows
-            pip_path = str(Path(ruta_entorno) / "Scripts" / "pip")
+            python_path = str(Path(ruta_entorno) / "Scripts" / "python")
         else:  # Linux/macOS
-            pip_path = str(Path(ruta_entorno) / "bin" / "pip")
+            python_path = str(Path(ruta_entorno) / "bin" / "python")
             
-        print(" Instalando psycopg2-binary para PostgreSQL...")
+        print(f" Instalando {', '.join(PAQUETES_DRIVER_POSTGRES)} para PostgreSQL...")
         
-        proc = await asyncio.create_subprocess_exec(
-            pip_path, "install", "psycopg2-binary",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await proc.communicate()
-        
-        if proc.returncode != 0:
-            print(f"Error instalando psycopg2: {stderr.decode()}")
+        if not await Wheelhouse(python_path).instalar(PAQUETES_DRIVER_POSTGRES, progreso):
+            print("Error instalando el driver de PostgreSQL")
             return False
         
-        print("psycopg2-binary instalado correctamente")
+        if ruta_proyecto:
+            await asyncio.to_thread(registrar_lock_proyecto, ruta_entorno, ruta_proyecto)
+        
+        print("Driver de PostgreSQL instalado correctamente")
         return True
         
     except Exception as e:
-        print(f"Error instalando psycopg2: {str(e)}")
+        print(f"Error instalando el driver de PostgreSQL: {str(e)}")
         return False
 
-def instalar_psycopg2_sync(ruta_entorno: str) -> bool:
-    """Versión síncrona para instalar psycopg2-binary para soporte de PostgreSQL"""
-    try:
-        # Detectar sistema operativo para encontrar pip
-        if os.name == "nt":  # Windows
-            pip_path = str(Path(ruta_entorno) / "Scripts" / "pip")
-        else:  # Linux/macOS
-            pip_path = str(Path(ruta_entorno) / "bin" / "pip")
-            
-        print(" Instalando psycopg2-binary para PostgreSQL...")
-        
-        result = subprocess.run(
-            [pip_path, "install", "psycopg2-binary"],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            print(f"Error instalando psycopg2: {result.stderr}")
-            return False
-        
-        print("psycopg2-binary instalado correctamente")
+
+async def _instalar_driver_cuando_listo(ruta_entorno: str, progreso: Optional[Callable[[ProgresoPip], None]],
+                                        ruta_proyecto: Optional[str]) -> bool:
+    await esperar_entorno(ruta_entorno)
+    return await instalar_driver_postgres(ruta_entorno, progreso, ruta_proyecto)
+
+
+def iniciar_instalacion_driver(ruta_entorno: str, progreso: Optional[Callable[[ProgresoPip], None]] = None,
+                               ruta_proyecto: Optional[str] = None) -> asyncio.Task:
+    """Lanza en segundo plano la instalación del driver de PostgreSQL (una sola vez por entorno)"""
+    clave = str(Path(ruta_entorno))
+    tarea = _drivers_postgres.get(clave)
+    # Reintentar solo si la anterior terminó mal
+    if tarea is None or (tarea.done() and (tarea.cancelled() or tarea.exception() or not tarea.result())):
+        tarea = asyncio.create_task(_instalar_driver_cuando_listo(clave, progreso, ruta_proyecto))
+        _drivers_postgres[clave] = tarea
+    return tarea
+
+
+async def esperar_driver(ruta_entorno: str) -> bool:
+    """True si el driver está instalado (o no se pidió); espera a que termine si sigue en curso"""
+    tarea = _drivers_postgres.get(str(Path(ruta_entorno)))
+    if tarea is None:
         return True
-        
+    try:
+        return await tarea
     except Exception as e:
-        print(f"Error instalando psycopg2: {str(e)}")
-        return False
\ No newline at end of file
+        print(f"Error instalando el driver de PostgreSQL: {e}")
+        return False
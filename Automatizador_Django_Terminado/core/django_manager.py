@@ -2,6 +2,21 @@ from pathlib import Path
 import re
 import subprocess
 import os
+from core.crear_entorno import registrar_lock_proyecto
+from core.django_worker import ejecutar_en_proyecto
+from core.editor_fuente import abrir, registrar_dir_de_templates, registrar_en_installed_apps
+from core.escritura import (
+    ErrorPreparacion, contar_escrituras, crear_si_falta, escribir_si_cambia, existe, preparacion_activa,
+    preparar
+)
+from core.migraciones import MigracionNoSoportada, escribir_migracion, leer_spec_modelo, migraciones_de_app
+from core.plan_migraciones import (
+    PlanMigraciones, foto_modelos_vigente, guardar_modelos_migrados, modelo_migrado
+)
+from core.consolidacion import consolidar_app, guardar_esquema, inicializar_bd
+from core.historial_migraciones import registrar_historial
+from core.layout_proyecto import invalidar_layout, layout_de
+from core.secciones_crud import componer, modelos_de_app, seccion
 
 class DjangoManager:
     @staticmethod
@@ -15,11 +30,13 @@ class DjangoManager:
                 [python_executable, "-m", "django", "startproject", project_name, str(project_dir)],
                 check=True
             )
+            invalidar_layout(project_dir)
             
-            # Crear requirements.txt básico
-            requirements_path = Path(project_dir) / "requirements.txt"
-            with open(requirements_path, "w") as f:
-                f.write("Django>=5.0.0\n")
+            # requirements.txt con versiones fijadas y hashes de lo instalado en el entorno
+            if not registrar_lock_proyecto(env_path, project_dir):
+                requirements_path = Path(project_dir) / "requirements.txt"
+                with open(requirements_path, "w") as f:
+                    f.write("Django>=5.0.0\n")
             
             return True
         except subprocess.CalledProcessError as e:
@@ -99,201 +116,462 @@ class {app_name.capitalize()}Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.{app_name}'
 """
-            with open(apps_py, "w", encoding='utf-8') as f:
-                f.write(apps_content)
+            escribir_si_cambia(apps_py, apps_content)
         models_py = app_dir / "models.py"
         if not models_py.exists():
-            with open(models_py, "w", encoding='utf-8') as f:
-                f.write("from django.db import models\n\n# Modelos aqui\n")        
+            escribir_si_cambia(models_py, "from django.db import models\n\n# Modelos aqui\n")
         admin_py = app_dir / "admin.py"
         if not admin_py.exists():
-            with open(admin_py, "w", encoding='utf-8') as f:
-                f.write("from django.contrib import admin\n\n# Registra tus modelos aqui\n")        
+            escribir_si_cambia(admin_py, "from django.contrib import admin\n\n# Registra tus modelos aqui\n")
         views_py = app_dir / "views.py"
         if not views_py.exists():
-            with open(views_py, "w", encoding='utf-8') as f:
-                f.write("from django.shortcuts import render\n\n# Vistas aqui\n")
+            escribir_si_cambia(views_py, "from django.shortcuts import render\n\n# Vistas aqui\n")
 
     @staticmethod
     def _update_settings_with_app(project_dir: Path, app_name: str, project_name: str):
-        settings_path = project_dir / project_name / "settings.py"
-        
-        if not settings_path.exists():
-            possible_paths = [
-                project_dir / project_name / "settings.py",
-                project_dir / project_name.lower() / "settings.py"
-            ]
-            
-            for path in possible_paths:
-                if path.exists():
-                    settings_path = path
-                    break
-        
+        settings_path = layout_de(project_dir, project_name).settings
         if settings_path.exists():
-            with open(settings_path, "r+", encoding='utf-8') as f:
-                content = f.read()                
-                if f"'apps.{app_name}'" not in content:
-                    if "'django.contrib.staticfiles'," in content:
-                        # Preservar la indentación existente
-                        lines = content.split('\n')
-                        for i, line in enumerate(lines):
-                            if "'django.contrib.staticfiles'," in line:
-                                # Obtener la indentación de la línea actual
-                                indentation = line[:len(line) - len(line.lstrip())]
-                                lines.insert(i + 1, f"{indentation}'apps.{app_name}',")
-                                break
-                        new_content = '\n'.join(lines)
-                        f.seek(0)
-                        f.write(new_content)
-                        f.truncate()
+            registrar_en_installed_apps(settings_path, f"apps.{app_name}")
         else:
             print(f"Advertencia: No se encontró settings.py para registrar {app_name}")
 
+    # Campos reservados que no pueden ser usados (Django los crea automáticamente)
+    CAMPOS_RESERVADOS = {'id', 'pk'}
+    
+    TIPOS_VALIDOS = {
+        'CharField': 'CharField(max_length=100)',
+        'IntegerField': 'IntegerField()',
+        'TextField': 'TextField()',
+        'BooleanField': 'BooleanField()',
+        'DateTimeField': 'DateTimeField(auto_now_add=True)',
+        'EmailField': 'EmailField()',
+        'ForeignKey': 'ForeignKey(to="self", on_delete=models.CASCADE)'
+    }
+
     @staticmethod
-    def crear_modelo(project_path: str, app_name: str, nombre_tabla: str, campos: list, venv_path: str) -> dict:
-        try:
-            project_dir = Path(project_path)
-            app_dir = project_dir / "apps" / app_name
-            if not app_dir.exists():
-                return {"success": False, "error": f"La app {app_name} no existe"}
+    def _validar_campos(campos: list):
+        """Devuelve el mensaje de error del primer campo inválido o None"""
+        nombres_usados = set()
+        for campo in campos:
+            nombre_campo = campo['name'].lower()
             
-            # Campos reservados que no pueden ser usados (Django los crea automáticamente)
-            CAMPOS_RESERVADOS = {'id', 'pk'}
-            
-            TIPOS_VALIDOS = {
-                'CharField': 'CharField(max_length=100)',
-                'IntegerField': 'IntegerField()',
-                'TextField': 'TextField()',
-                'BooleanField': 'BooleanField()',
-                'DateTimeField': 'DateTimeField(auto_now_add=True)',
-                'EmailField': 'EmailField()',
-                'ForeignKey': 'ForeignKey(to="self", on_delete=models.CASCADE)'
-            }
+            # Validar campos reservados
+            if nombre_campo in DjangoManager.CAMPOS_RESERVADOS:
+                return f"El campo '{campo['name']}' es reservado por Django. Usa otro nombre."
             
-            # Validar campos antes de generar el modelo
-            nombres_usados = set()
-            for campo in campos:
-                nombre_campo = campo['name'].lower()
-                
-                # Validar campos reservados
-                if nombre_campo in CAMPOS_RESERVADOS:
-                    return {"success": False, "error": f"El campo '{campo['name']}' es reservado por Django. Usa otro nombre."}
-                
-                # Validar nombres duplicados (Django convierte a minúsculas)
-                if nombre_campo in nombres_usados:
-                    return {"success": False, "error": f"El campo '{campo['name']}' está duplicado. Cada campo debe tener un nombre único."}
-                nombres_usados.add(nombre_campo)
+            # Validar nombres duplicados (Django convierte a minúsculas)
+            if nombre_campo in nombres_usados:
+                return f"El campo '{campo['name']}' está duplicado. Cada campo debe tener un nombre único."
+            nombres_usados.add(nombre_campo)
+            
+            # Validar tipo de campo
+            if campo['type'] not in DjangoManager.TIPOS_VALIDOS:
+                return f"Tipo de campo '{campo['type']}' no válido. Tipos disponibles: {', '.join(DjangoManager.TIPOS_VALIDOS.keys())}"
+        return None
+
+    @staticmethod
+    def _escribir_modelo(app_dir: Path, nombre_tabla: str, campos: list):
+        """Escribe (o reemplaza) la clase del modelo en models.py y la registra en admin.py"""
+        nuevo_modelo = f"class {nombre_tabla}(models.Model):\n"
+        for campo in campos:
+            tipo_campo = campo['type']
+            if tipo_campo not in DjangoManager.TIPOS_VALIDOS:
+                tipo_campo = 'CharField'
+                print(f"Tipo '{campo['type']}' no válido. Usando CharField")
                 
-                # Validar tipo de campo
-                if campo['type'] not in TIPOS_VALIDOS:
-                    return {"success": False, "error": f"Tipo de campo '{campo['type']}' no válido. Tipos disponibles: {', '.join(TIPOS_VALIDOS.keys())}"}
-            
-            models_path = app_dir / "models.py"
-            contenido = "from django.db import models\n\n"
-            if models_path.exists():
-                with open(models_path, "r") as f:
-                    contenido = f.read()
-            nuevo_modelo = f"class {nombre_tabla}(models.Model):\n"
-            for campo in campos:
-                tipo_campo = campo['type']
-                if tipo_campo not in TIPOS_VALIDOS:
-                    tipo_campo = 'CharField'
-                    print(f"Tipo '{campo['type']}' no válido. Usando CharField")
-                    
-                nuevo_modelo += f"    {campo['name']} = models.{TIPOS_VALIDOS[tipo_campo]}\n"
-            patron = re.compile(rf"class {nombre_tabla}\(models\.Model\):.*?\n\n", re.DOTALL)
-            if patron.search(contenido):
-                contenido = patron.sub(nuevo_modelo, contenido)
+            nuevo_modelo += f"    {campo['name']} = models.{DjangoManager.TIPOS_VALIDOS[tipo_campo]}\n"
+        # Solo cambian las líneas de la clase; el resto del archivo queda como estaba
+        models_py = abrir(app_dir / "models.py", por_defecto="from django.db import models\n\n")
+        models_py.reemplazar_clase(nombre_tabla, nuevo_modelo)
+        models_py.guardar()
+        
+        admin_py = abrir(app_dir / "admin.py", por_defecto="from django.contrib import admin\n")
+        admin_py.asegurar_import(".models", nombre_tabla)
+        admin_py.asegurar_registro_admin(nombre_tabla)
+        admin_py.guardar()
+
+    @staticmethod
+    def _cambio_modelo(app_dir: Path, nombre_tabla: str, campos: list):
+        """(modelo, spec previa, spec nueva) para escribir la migración sin Django, o None si no se puede.
+
+        La spec previa es la de la última migración aplicada (foto guardada tras cada migrate
+        correcto), no la de models.py: si models.py lleva cambios sin migrar (un migrate que
+        falló, una edición a mano) las dos no coinciden y decide makemigrations.
+        Hay que llamarlo antes de _escribir_modelo, que reemplaza la clase en models.py.
+        """
+        try:
+            actual = leer_spec_modelo(app_dir / "models.py", nombre_tabla, DjangoManager.TIPOS_VALIDOS)
+        except (MigracionNoSoportada, SyntaxError) as e:
+            print(f"El modelo {nombre_tabla} no se puede comparar sin Django ({e}). Se usará makemigrations")
+            return None
+        conocido, previo = modelo_migrado(app_dir.parent.parent, app_dir.name, nombre_tabla)
+        if not conocido:
+            print(f"No se conoce el estado migrado de {nombre_tabla}. Se usará makemigrations")
+            return None
+        if previo != actual:
+            print(f"models.py tiene cambios de {nombre_tabla} sin migrar. Se usará makemigrations")
+            return None
+        return (nombre_tabla, previo, [{"name": c['name'], "type": c['type']} for c in campos])
+
+    @staticmethod
+    def _fotografiar_modelos(project_dir: Path, app_names: list, venv_python: Path):
+        """Apps sin foto de sus modelos migrados (proyectos anteriores, migraciones hechas a mano):
+        si el autodetector no ve cambios, models.py es el estado migrado y se toma como foto.
+        Hay que llamarlo antes de tocar models.py"""
+        for app_name in dict.fromkeys(app_names):
+            if foto_modelos_vigente(project_dir, app_name):
+                continue
+            resultado = ejecutar_en_proyecto(
+                str(venv_python), str(project_dir), "makemigrations", apps=[app_name], dry_run=True
+            )
+            if resultado["ok"] and "No changes detected" in resultado["salida"]:
+                guardar_modelos_migrados(project_dir, [app_name], DjangoManager.TIPOS_VALIDOS)
+
+    @staticmethod
+    def _migrar(project_dir: Path, app_names: list, venv_path: str, cambios: dict = None, verificar: bool = False):
+        """Escribe las migraciones de las apps indicadas y migra las que tengan algo pendiente. Devuelve el error o None.
+
+        cambios: app -> lista de (modelo, spec previa, spec nueva) de _cambio_modelo. Las apps sin
+        cambios conocidos (o con un cambio que no se sabe escribir) pasan por makemigrations.
+        verificar: comprobar después con makemigrations --dry-run que Django no ve nada pendiente.
+        """
+        venv_python = Path(venv_path) / ("Scripts" if os.name == "nt" else "bin") / "python"
+        cambios = cambios or {}
+        # Dentro de una preparación las migraciones se vuelcan a disco para migrar y, si algo
+        # falla, se deshacen junto con el resto
+        preparacion = preparacion_activa()
+        previas = {a: DjangoManager._migraciones_app(project_dir, a) for a in app_names}
+        
+        # Migraciones escritas directamente desde la spec de los campos (sin el autodetector)
+        apps_makemigrations = []
+        escritas = []
+        for app_name in app_names:
+            if cambios.get(app_name) is None:
+                apps_makemigrations.append(app_name)
+                continue
+            try:
+                ruta = escribir_migracion(project_dir / "apps" / app_name, cambios[app_name])
+            except MigracionNoSoportada as e:
+                print(f"No se puede escribir la migración de {app_name} ({e}). Se usará makemigrations")
+                apps_makemigrations.append(app_name)
+                continue
+            if ruta:
+                print(f"Migración escrita: {app_name}/migrations/{ruta.name}")
+                escritas += [ruta.parent / "__init__.py", ruta]
             else:
-                contenido += "\n" + nuevo_modelo
-            
-            with open(models_path, "w", encoding='utf-8') as f:
-                f.write(contenido)
-            admin_path = app_dir / "admin.py"
-            admin_content = "from django.contrib import admin\n"
-            
-            if admin_path.exists():
-                with open(admin_path, "r") as f:
-                    admin_content = f.read()
-            if f"from .models import {nombre_tabla}" not in admin_content:
-                admin_content += f"\nfrom .models import {nombre_tabla}\n"
+                print(f"Sin cambios que migrar en {app_name}")
+        if preparacion is not None:
+            preparacion.volcar(escritas)
+        
+        # Ejecutar makemigrations en el worker persistente (Django ya cargado)
+        if apps_makemigrations:
+            print(f"Generando migración para {', '.join(apps_makemigrations)}...")
+            result_makemig = DjangoManager._makemigrations(project_dir, venv_python, apps_makemigrations)
+            if not result_makemig["ok"]:
+                if "SystemExit: 3" in (result_makemig.get("error") or ""):
+                    # El autodetector pide un valor por defecto para las filas existentes
+                    return "Error en makemigrations: el cambio añade un campo obligatorio que Django no sabe rellenar en las filas existentes"
+                return f"Error en makemigrations: {result_makemig.get('error')}"
+            print("Makemigrations exitoso:")
+            print(result_makemig["salida"])
+        
+        apps_escritas = [a for a in app_names if a not in apps_makemigrations]
+        if verificar and apps_escritas:
+            result_check = ejecutar_en_proyecto(
+                str(venv_python), str(project_dir), "makemigrations", apps=apps_escritas, dry_run=True
+            )
+            if result_check["ok"] and "No changes detected" not in result_check["salida"]:
+                print(f"Django detecta cambios sin migrar:\n{result_check['salida']}")
+                result_makemig = DjangoManager._makemigrations(project_dir, venv_python, apps_escritas)
+                if not result_makemig["ok"]:
+                    return f"Error en makemigrations: {result_makemig.get('error')}"
+        
+        # Una BD SQLite nueva se crea desde el esquema guardado en lugar de aplicar toda la cadena
+        if inicializar_bd(project_dir, venv_path):
+            print("Base de datos creada desde el esquema guardado")
+        
+        # Migrate solo de las apps con migraciones pendientes (None: todo el proyecto)
+        plan = PlanMigraciones(project_dir)
+        apps_pendientes = plan.apps_pendientes()
+        if apps_pendientes == []:
+            print("No hay migraciones pendientes")
+            guardar_modelos_migrados(project_dir, app_names, DjangoManager.TIPOS_VALIDOS)
+            return None
+        
+        # Ejecutar migrate con manejo de errores
+        print(f"Aplicando migraciones{' de ' + ', '.join(apps_pendientes) if apps_pendientes else ''}...")
+        error_msg = ""
+        for app_label in (apps_pendientes or [None]):
+            result_migrate = ejecutar_en_proyecto(str(venv_python), str(project_dir), "migrate", app=app_label)
+            # Tiempo y SQL de cada migración aplicada (también de las anteriores a un fallo)
+            registrar_historial(project_dir, result_migrate.get("datos"))
+            if not result_migrate["ok"]:
+                error_msg = result_migrate.get("error") or ""
+                break
+            print("Migrate exitoso:")
+            print(result_migrate["salida"])
+        else:
+            plan.registrar(apps_pendientes)
+            guardar_modelos_migrados(project_dir, app_names, DjangoManager.TIPOS_VALIDOS)
+            guardar_esquema(project_dir, venv_path)
+            return None
+        if preparacion is not None:
+            DjangoManager._desaplicar(project_dir, venv_python, previas)
+        if "duplicate column name" in error_msg:
+            return f"Ya existe un campo con ese nombre en la base de datos. Usa un nombre diferente o elimina las migraciones anteriores."
+        return f"Error en migrate: {error_msg}"
 
-            if f"admin.site.register({nombre_tabla})" not in admin_content:
-                admin_content += f"\nadmin.site.register({nombre_tabla})\n"
-            
-            with open(admin_path, "w", encoding='utf-8') as f:
-                f.write(admin_content)
-            
-            venv_python = Path(venv_path) / ("Scripts" if os.name == "nt" else "bin") / "python"
-            manage_py = project_dir / "manage.py"
+    @staticmethod
+    def _migraciones_app(project_dir: Path, app_name: str) -> list:
+        return migraciones_de_app(project_dir / "apps" / app_name / "migrations")
+
+    @staticmethod
+    def _makemigrations(project_dir: Path, venv_python: Path, app_names: list) -> dict:
+        """makemigrations en el worker; lo que cree queda anotado en la preparación activa para deshacerlo"""
+        previas = {a: DjangoManager._migraciones_app(project_dir, a) for a in app_names}
+        resultado = ejecutar_en_proyecto(str(venv_python), str(project_dir), "makemigrations", apps=app_names)
+        preparacion = preparacion_activa()
+        if preparacion is not None:
+            for app_name in app_names:
+                migrations_dir = project_dir / "apps" / app_name / "migrations"
+                for nombre in DjangoManager._migraciones_app(project_dir, app_name):
+                    if nombre not in previas[app_name]:
+                        preparacion.anotar_creado(migrations_dir / f"{nombre}.py")
+        return resultado
+
+    @staticmethod
+    def _desaplicar(project_dir: Path, venv_python: Path, previas: dict):
+        """Tras un migrate fallido, vuelve cada app a su última migración anterior (las nuevas se
+        van a borrar y no pueden quedar aplicadas). Los fallos solo se informan"""
+        for app_name, nombres in previas.items():
+            if DjangoManager._migraciones_app(project_dir, app_name) == nombres:
+                continue
+            destino = nombres[-1] if nombres else "zero"
+            resultado = ejecutar_en_proyecto(
+                str(venv_python), str(project_dir), "migrate", app=app_name, migracion=destino
+            )
+            if not resultado["ok"]:
+                print(f"No se pudo volver {app_name} a {destino}: {resultado.get('error')}")
+
+    @staticmethod
+    def _consolidar(project_dir: Path, app_names: list, venv_path: str):
+        """Deja cada app con una sola migración inicial (proyecto sin publicar). Los fallos no son fatales"""
+        venv_python = Path(venv_path) / ("Scripts" if os.name == "nt" else "bin") / "python"
+        for app_name in app_names:
+            error = consolidar_app(project_dir, app_name, str(venv_python), DjangoManager.TIPOS_VALIDOS)
+            if error:
+                print(error)
+        # Mismo esquema con otras migraciones: la foto de los modelos migrados se rehace
+        guardar_modelos_migrados(project_dir, app_names, DjangoManager.TIPOS_VALIDOS)
+        guardar_esquema(project_dir, venv_path)
+
+    @staticmethod
+    def _comprobar_paso(resultado: dict, paso: str):
+        """Los generadores devuelven {"success", "error"}; dentro de una preparación un paso fallido la descarta"""
+        if not resultado["success"]:
+            raise RuntimeError(f"{paso}: {resultado['error']}")
+
+    @staticmethod
+    def _generar_crud_app(project_dir: Path, app_name: str) -> list:
+        """CRUD de todos los modelos de la app en una pasada. Devuelve los modelos regenerados"""
+        app_dir = project_dir / "apps" / app_name
+        
+        # PASO 1-3: views, forms y urls de la app (una sección por modelo)
+        print(f"PASO 1: Generando views CRUD de {app_name}...")
+        views = DjangoManager.generar_views_crud(str(project_dir), app_name)
+        DjangoManager._comprobar_paso(views, "PASO 1")
+        print(f"PASO 2: Generando forms de {app_name}...")
+        forms = DjangoManager.generar_forms_crud(str(project_dir), app_name)
+        DjangoManager._comprobar_paso(forms, "PASO 2")
+        print(f"PASO 3: Generando URLs de {app_name}...")
+        urls = DjangoManager.generar_urls_app(str(project_dir), app_name)
+        DjangoManager._comprobar_paso(urls, "PASO 3")
+        
+        # PASO 4: Conectando al proyecto principal
+        print(f"PASO 4: Conectando {app_name} al proyecto principal...")
+        DjangoManager._conectar_urls_proyecto(project_dir, app_name)
+        print(f"URLs conectadas al proyecto principal")
+        
+        # PASO 5-6: plantillas y tests por modelo, solo de los que cambiaron (o aún no los tienen)
+        regenerados = set(views["regenerados"]) | set(forms["regenerados"]) | set(urls["regenerados"])
+        DjangoManager._comprobar_paso(DjangoManager.generar_settings_test(str(project_dir)), "PASO 6")
+        tratados = []
+        for nombre_tabla, _ in modelos_de_app(app_dir / "models.py"):
+            model_lower = nombre_tabla.lower()
+            if nombre_tabla not in regenerados and existe(project_dir / "templates" / app_name / f"{model_lower}_lista.html"):
+                continue
+            print(f"PASO 5: Generando templates HTML para {nombre_tabla}...")
+            DjangoManager._comprobar_paso(DjangoManager.generar_templates_crud(str(project_dir), app_name, nombre_tabla), "PASO 5")
             
-            # Ejecutar makemigrations con manejo de errores
-            print(f"Generando migración para {app_name}...")
+            # PASO 6: Tests de las vistas CRUD (settings_test: SQLite en memoria y sin migraciones)
             try:
-                result_makemig = subprocess.run(
-                    [str(venv_python), str(manage_py), "makemigrations", app_name],
-                    check=True,
-                    cwd=str(project_dir),
-                    capture_output=True,
-                    text=True
+                campos = leer_spec_modelo(app_dir / "models.py", nombre_tabla, DjangoManager.TIPOS_VALIDOS)
+            except MigracionNoSoportada as e:
+                print(f"Sin tests para {nombre_tabla}: tiene campos escritos a mano ({e})")
+            else:
+                print(f"PASO 6: Generando tests para {nombre_tabla}...")
+                DjangoManager._comprobar_paso(
+                    DjangoManager.generar_tests_crud(str(project_dir), app_name, nombre_tabla, campos), "PASO 6"
                 )
-                print("Makemigrations exitoso:")
-                print(result_makemig.stdout)
-            except subprocess.CalledProcessError as e:
-                return {"success": False, "error": f"Error en makemigrations: {e.stderr or e.stdout or str(e)}"}
+            tratados.append(nombre_tabla)
+        return tratados
+
+    @staticmethod
+    def crear_modelo(project_path: str, app_name: str, nombre_tabla: str, campos: list, venv_path: str,
+                     verificar: bool = False, consolidar: bool = False) -> dict:
+        try:
+            project_dir = Path(project_path)
+            app_dir = project_dir / "apps" / app_name
+            if not app_dir.exists():
+                return {"success": False, "error": f"La app {app_name} no existe"}
             
-            # Ejecutar migrate con manejo de errores
-            print("Aplicando migraciones...")
-            try:
-                result_migrate = subprocess.run(
-                    [str(venv_python), str(manage_py), "migrate"],
-                    check=True,
-                    cwd=str(project_dir),
-                    capture_output=True,
-                    text=True
-                )
-                print("Migrate exitoso:")
-                print(result_migrate.stdout)
-            except subprocess.CalledProcessError as e:
-                error_msg = e.stderr or e.stdout or str(e)
-                if "duplicate column name" in error_msg:
-                    return {"success": False, "error": f"Ya existe un campo con ese nombre en la base de datos. Usa un nombre diferente o elimina las migraciones anteriores."}
-                else:
-                    return {"success": False, "error": f"Error en migrate: {error_msg}"}
-            
-            # PASO 1: Generar views CRUD
-            print(f"PASO 1: Generando views CRUD para {nombre_tabla}...")
-            DjangoManager.generar_views_crud(str(project_dir), app_name, nombre_tabla)
-            
-            # PASO 2: Generar forms CRUD
-            print(f"PASO 2: Generando forms para {nombre_tabla}...")
-            DjangoManager.generar_forms_crud(str(project_dir), app_name, nombre_tabla)
-            
-            # PASO 3: Generar URLs de la app
-            print(f"PASO 3: Generando URLs de la app para {nombre_tabla}...")
-            DjangoManager.generar_urls_app(str(project_dir), app_name, nombre_tabla)
-            print(f"URLs de app generadas para {nombre_tabla}")
-            
-            # PASO 4: Conectando al proyecto principal
-            print(f"PASO 4: Conectando {app_name} al proyecto principal...")
-            DjangoManager._conectar_urls_proyecto(project_dir, app_name)
-            print(f"URLs de {app_name} conectadas al proyecto principal")
-            print(f"URLs conectadas al proyecto principal")
+            # Validar campos antes de generar el modelo
+            error = DjangoManager._validar_campos(campos)
+            if error:
+                return {"success": False, "error": error}
             
-            # PASO 5: Generar templates HTML para CRUD
-            print(f"PASO 5: Generando templates HTML para {nombre_tabla}...")
-            DjangoManager.generar_templates_crud(str(project_dir), app_name, nombre_tabla)
+            venv_python = Path(venv_path) / ("Scripts" if os.name == "nt" else "bin") / "python"
             
-            # PASO 6: Creando página índice del proyecto
-            print(f"PASO 6: Creando página índice del proyecto...")
-            DjangoManager._crear_pagina_indice(project_dir)
-            print(f" Pagina indice creada")
+            # Modelo y PASO 1-7 se generan en memoria y se validan juntos antes de migrar. models.py,
+            # admin.py y la migración se vuelcan a disco para que Django los lea; si algo falla se
+            # deshacen con el resto y el CRUD solo se escribe si migrate también sale bien
+            with contar_escrituras() as escrituras:
+                with preparar() as preparacion:
+                    DjangoManager._fotografiar_modelos(project_dir, [app_name], venv_python)
+                    cambio = DjangoManager._cambio_modelo(app_dir, nombre_tabla, campos)
+                    DjangoManager._escribir_modelo(app_dir, nombre_tabla, campos)
+                    DjangoManager._generar_crud_app(project_dir, app_name)
+                    
+                    # PASO 7: Creando página índice del proyecto
+                    print(f"PASO 7: Creando página índice del proyecto...")
+                    DjangoManager._crear_pagina_indice(project_dir)
+                    print(f" Pagina indice creada")
+                    
+                    preparacion.validar()
+                    preparacion.volcar([app_dir / "models.py", app_dir / "admin.py"])
+                    preparacion.validar(str(venv_python), project_dir)
+                    
+                    error = DjangoManager._migrar(
+                        project_dir, [app_name], venv_path, {app_name: [cambio] if cambio else None}, verificar
+                    )
+                    if error:
+                        preparacion.descartar()
+                        return {"success": False, "error": error}
+            print(f"CRUD de {app_name}: {escrituras.informe()}")
+            
+            if consolidar:
+                DjangoManager._consolidar(project_dir, [app_name], venv_path)
 
             return {"success": True, "error": None}
             
+        except ErrorPreparacion as e:
+            return {"success": False, "error": f"El CRUD generado para {nombre_tabla} no es válido; no se ha escrito ni migrado:\n{e}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    @staticmethod
+    def aplicar_modelos_lote(project_path: str, modelos: list, venv_path: str, verificar: bool = False,
+                             consolidar: bool = False) -> dict:
+        """Escribe todos los modelos en cola y los migra en un solo ciclo (una migración por app y un migrate).
+
+        modelos: lista de {"app": ..., "nombre": ..., "campos": [...]}. Devuelve el resultado
+        de cada modelo en "resultados" ({"app", "modelo", "success", "error"}).
+        """
+        project_dir = Path(project_path)
+        venv_python = Path(venv_path) / ("Scripts" if os.name == "nt" else "bin") / "python"
+        resultados = []
+        escritos = []
+        cambios = {}
+        con_crud = []
+        error = None
+        try:
+            with contar_escrituras() as escrituras:
+                with preparar() as preparacion:
+                    DjangoManager._fotografiar_modelos(
+                        project_dir, [m["app"] for m in modelos if (project_dir / "apps" / m["app"]).exists()], venv_python
+                    )
+                    # 1. Validar y preparar cada modelo; un modelo inválido no frena a los demás
+                    for modelo in modelos:
+                        resultado = {"app": modelo["app"], "modelo": modelo["nombre"], "success": False, "error": None}
+                        resultados.append(resultado)
+                        marca = preparacion.marca()
+                        try:
+                            app_dir = project_dir / "apps" / modelo["app"]
+                            if not app_dir.exists():
+                                resultado["error"] = f"La app {modelo['app']} no existe"
+                                continue
+                            error_campos = DjangoManager._validar_campos(modelo["campos"])
+                            if error_campos:
+                                resultado["error"] = error_campos
+                                continue
+                            cambio = DjangoManager._cambio_modelo(app_dir, modelo["nombre"], modelo["campos"])
+                            DjangoManager._escribir_modelo(app_dir, modelo["nombre"], modelo["campos"])
+                            escritos.append(resultado)
+                            # Un modelo que no se sabe migrar sin Django manda toda su app a makemigrations
+                            if cambio is None:
+                                cambios[modelo["app"]] = None
+                            elif cambios.setdefault(modelo["app"], []) is not None:
+                                cambios[modelo["app"]].append(cambio)
+                        except Exception as e:
+                            preparacion.volver_a(marca)
+                            resultado["error"] = str(e)
+                    
+                    if not escritos:
+                        return {"success": False, "resultados": resultados, "error": "Ningún modelo válido para aplicar"}
+                    
+                    # 2. CRUD de cada app en memoria, una pasada por app con todos sus modelos (si
+                    # una falla se deshace solo lo suyo) y una sola página índice al final; todo
+                    # se valida junto
+                    apps_tocadas = list(dict.fromkeys(r["app"] for r in escritos))
+                    for app_name in apps_tocadas:
+                        de_la_app = [r for r in escritos if r["app"] == app_name]
+                        marca = preparacion.marca()
+                        try:
+                            DjangoManager._generar_crud_app(project_dir, app_name)
+                            con_crud.extend(de_la_app)
+                        except Exception as e:
+                            preparacion.volver_a(marca)
+                            for resultado in de_la_app:
+                                resultado["error"] = f"Falló la generación del CRUD: {e}"
+                    DjangoManager._crear_pagina_indice(project_dir)
+                    preparacion.validar()
+                    # Django lee los modelos del disco: se vuelcan (se deshacen si algo falla)
+                    preparacion.volcar([
+                        project_dir / "apps" / app_name / archivo
+                        for app_name in apps_tocadas for archivo in ("models.py", "admin.py")
+                    ])
+                    preparacion.validar(str(venv_python), project_dir)
+                    
+                    # 3. Un único ciclo de migraciones para todas las apps tocadas; el CRUD
+                    # se escribe al salir del bloque solo si migra
+                    try:
+                        error = DjangoManager._migrar(project_dir, apps_tocadas, venv_path, cambios, verificar)
+                    except Exception as e:
+                        error = str(e)
+                    if error:
+                        preparacion.descartar()
+        except ErrorPreparacion as e:
+            error = f"El CRUD generado no es válido; no se ha escrito ni migrado:\n{e}"
+        except Exception as e:
+            error = f"No se pudo escribir el CRUD: {e}"
+        if error:
+            for resultado in escritos:
+                resultado["error"] = error
+            return {"success": False, "resultados": resultados, "error": error}
+        print(f"CRUD de {len(con_crud)} modelos: {escrituras.informe()}")
+        
+        if consolidar:
+            DjangoManager._consolidar(project_dir, apps_tocadas, venv_path)
+        
+        for resultado in con_crud:
+            resultado["success"] = True
+        
+        return {
+            "success": all(r["success"] for r in resultados),
+            "resultados": resultados,
+            "error": None
+        }
+
     @staticmethod
     def generar_apps_legacy(project_path: str, apps_list: list) -> dict:
         try:
@@ -301,7 +579,8 @@ class {app_name.capitalize()}Config(AppConfig):
                 return {"success": False, "apps_creadas": [], "error": "Primero crea el proyecto Django"}
                 
             project_dir = Path(project_path)
-            apps_dir = project_dir / "apps"
+            layout = layout_de(project_dir)
+            apps_dir = layout.apps
             apps_dir.mkdir(exist_ok=True)
             apps_creadas = []
             for app_name in apps_list:
@@ -312,51 +591,22 @@ class {app_name.capitalize()}Config(AppConfig):
                     init_file.touch()
                 apps_py = app_dir / "apps.py"
                 if not apps_py.exists():
-                    with open(apps_py, "w") as f:
-                        f.write(f"""from django.apps import AppConfig
+                    escribir_si_cambia(apps_py, f"""from django.apps import AppConfig
 class {app_name.capitalize()}Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.{app_name}'
 """)
                 models_py = app_dir / "models.py"
                 if not models_py.exists():
-                    with open(models_py, "w", encoding='utf-8') as f:
-                        f.write("from django.db import models\n\n# Modelos aqui\n")
+                    escribir_si_cambia(models_py, "from django.db import models\n\n# Modelos aqui\n")
                 admin_py = app_dir / "admin.py"
                 if not admin_py.exists():
-                    with open(admin_py, "w", encoding='utf-8') as f:
-                        f.write("from django.contrib import admin\n\n# Registra tus modelos aqui\n")
+                    escribir_si_cambia(admin_py, "from django.contrib import admin\n\n# Registra tus modelos aqui\n")
                 views_py = app_dir / "views.py"
                 if not views_py.exists():
-                    with open(views_py, "w", encoding='utf-8') as f:
-                        f.write("from django.shortcuts import render\n\n# Vistas aqui\n")
-                # Buscar el archivo settings.py en el directorio del proyecto
-                settings_files = list(project_dir.glob("*/settings.py"))
-                if settings_files:
-                    settings_path = settings_files[0]
-                else:
-                    # Si no lo encuentra, intentar con el nombre del proyecto
-                    project_folders = [f for f in project_dir.iterdir() if f.is_dir() and not f.name.startswith('.') and f.name not in ['apps', '__pycache__']]
-                    if project_folders:
-                        settings_path = project_folders[0] / "settings.py"
-                    else:
-                        continue  # Skip si no encuentra settings.py
-                if settings_path.exists():
-                    with open(settings_path, "r+", encoding='utf-8') as f:
-                        content = f.read()
-                        if f"'apps.{app_name}'" not in content:
-                            # Preservar la indentación existente
-                            lines = content.split('\n')
-                            for i, line in enumerate(lines):
-                                if "'django.contrib.staticfiles'," in line:
-                                    # Obtener la indentación de la línea actual
-                                    indentation = line[:len(line) - len(line.lstrip())]
-                                    lines.insert(i + 1, f"{indentation}'apps.{app_name}',")
-                                    break
-                            new_content = '\n'.join(lines)
-                            f.seek(0)
-                            f.write(new_content)
-                            f.truncate()
+                    escribir_si_cambia(views_py, "from django.shortcuts import render\n\n# Vistas aqui\n")
+                if layout.settings.exists():
+                    registrar_en_installed_apps(layout.settings, f"apps.{app_name}")
                 
                 apps_creadas.append(app_name)
                 print(f"App '{app_name}' creada exitosamente")
@@ -370,24 +620,9 @@ class {app_name.capitalize()}Config(AppConfig):
             return {"success": False, "apps_creadas": [], "error": error_msg}
 
     @staticmethod
-    def generar_views_crud(project_path: str, app_name: str, model_name: str) -> dict:
-        try:
-            project_dir = Path(project_path)
-            app_dir = project_dir / "apps" / app_name
-            views_path = app_dir / "views.py"
-            
-            if not app_dir.exists():
-                return {"success": False, "error": f"La app {app_name} no existe"}
-            
-            model_lower = model_name.lower()
-            
-            views_content = f'''from django.shortcuts import render, get_object_or_404, redirect
-from django.contrib import messages
-from django.urls import reverse
-from .models import {model_name}
-from .forms import {model_name}Form
-
-def {model_lower}_lista(request):
+    def _views_modelo(app_name: str, model_name: str) -> str:
+        model_lower = model_name.lower()
+        return f'''def {model_lower}_lista(request):
     """Lista todos los {model_name}s"""
     objetos = {model_name}.objects.all()
     return render(request, '{app_name}/{model_lower}_lista.html', {{
@@ -454,30 +689,48 @@ def {model_lower}_eliminar(request, id):
         'titulo': f'Eliminar {{objeto}}'
     }})
 '''
-            
-            with open(views_path, "w", encoding='utf-8') as f:
-                f.write(views_content)
-            
-            print(f"Views CRUD generadas para {model_name} en {app_name}")
-            return {"success": True, "error": None}
-            
-        except Exception as e:
-            return {"success": False, "error": str(e)}
 
     @staticmethod
-    def generar_forms_crud(project_path: str, app_name: str, model_name: str) -> dict:
+    def generar_views_crud(project_path: str, app_name: str) -> dict:
+        """views.py con el CRUD de todos los modelos de la app; solo se regeneran las secciones
+        de los modelos que cambiaron (core.secciones_crud)"""
         try:
             project_dir = Path(project_path)
             app_dir = project_dir / "apps" / app_name
-            forms_path = app_dir / "forms.py"
+            views_path = app_dir / "views.py"
             
             if not app_dir.exists():
                 return {"success": False, "error": f"La app {app_name} no existe"}
             
-            forms_content = f'''from django import forms
-from .models import {model_name}
+            modelos = modelos_de_app(app_dir / "models.py")
+            if not modelos:
+                return {"success": True, "error": None, "regenerados": []}
+            nombres = [nombre for nombre, _ in modelos]
+            
+            cabecera = f'''from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib import messages
+from django.urls import reverse
+from .models import {", ".join(nombres)}
+from .forms import {", ".join(f"{nombre}Form" for nombre in nombres)}
+
+
+'''
+            views_content, regenerados = componer(
+                views_path, cabecera, modelos,
+                lambda modelo, huella: seccion(modelo, huella, DjangoManager._views_modelo(app_name, modelo)),
+                separador="\n\n"
+            )
+            escribir_si_cambia(views_path, views_content)
+            
+            print(f"Views CRUD de {app_name}: {len(modelos)} modelos, regenerados: {', '.join(regenerados) or 'ninguno'}")
+            return {"success": True, "error": None, "regenerados": regenerados}
+            
+        except Exception as e:
+            return {"success": False, "error": str(e)}
 
-class {model_name}Form(forms.ModelForm):
+    @staticmethod
+    def _form_modelo(model_name: str) -> str:
+        return f'''class {model_name}Form(forms.ModelForm):
     class Meta:
         model = {model_name}
         fields = '__all__'
@@ -491,18 +744,63 @@ class {model_name}Form(forms.ModelForm):
         for field_name, field in self.fields.items():
             field.widget.attrs.update({{'class': 'form-control'}})
 '''
+
+    @staticmethod
+    def generar_forms_crud(project_path: str, app_name: str) -> dict:
+        """forms.py con un ModelForm por cada modelo de la app"""
+        try:
+            project_dir = Path(project_path)
+            app_dir = project_dir / "apps" / app_name
+            forms_path = app_dir / "forms.py"
             
-            with open(forms_path, "w", encoding='utf-8') as f:
-                f.write(forms_content)
+            if not app_dir.exists():
+                return {"success": False, "error": f"La app {app_name} no existe"}
             
-            print(f"Forms generado para {model_name}")
-            return {"success": True, "error": None}
+            modelos = modelos_de_app(app_dir / "models.py")
+            if not modelos:
+                return {"success": True, "error": None, "regenerados": []}
+            
+            cabecera = f'''from django import forms
+from .models import {", ".join(nombre for nombre, _ in modelos)}
+
+
+'''
+            forms_content, regenerados = componer(
+                forms_path, cabecera, modelos,
+                lambda modelo, huella: seccion(modelo, huella, DjangoManager._form_modelo(modelo)),
+                separador="\n\n"
+            )
+            escribir_si_cambia(forms_path, forms_content)
+            
+            print(f"Forms de {app_name}: {len(modelos)} modelos, regenerados: {', '.join(regenerados) or 'ninguno'}")
+            return {"success": True, "error": None, "regenerados": regenerados}
             
         except Exception as e:
             return {"success": False, "error": str(e)}
 
     @staticmethod
-    def generar_urls_app(project_path: str, app_name: str, model_name: str) -> dict:
+    def _urls_modelo(model_name: str) -> str:
+        model_lower = model_name.lower()
+        return f'''    # Lista de {model_name}s
+    path('{model_lower}/', views.{model_lower}_lista, name='{model_lower}_lista'),
+    
+    # Detalle de {model_name}
+    path('{model_lower}/<int:id>/', views.{model_lower}_detalle, name='{model_lower}_detalle'),
+    
+    # Crear nuevo {model_name}
+    path('{model_lower}/crear/', views.{model_lower}_crear, name='{model_lower}_crear'),
+    
+    # Editar {model_name}
+    path('{model_lower}/<int:id>/editar/', views.{model_lower}_editar, name='{model_lower}_editar'),
+    
+    # Eliminar {model_name}
+    path('{model_lower}/<int:id>/eliminar/', views.{model_lower}_eliminar, name='{model_lower}_eliminar'),
+'''
+
+    @staticmethod
+    def generar_urls_app(project_path: str, app_name: str) -> dict:
+        """urls.py de la app: las rutas de cada modelo bajo /<app>/<modelo>/ y la raíz de la
+        app en la lista del primero (el índice del proyecto enlaza a /<app>/)"""
         try:
             project_dir = Path(project_path)
             app_dir = project_dir / "apps" / app_name
@@ -511,35 +809,29 @@ class {model_name}Form(forms.ModelForm):
             if not app_dir.exists():
                 return {"success": False, "error": f"La app {app_name} no existe"}
 
-            model_lower = model_name.lower()
+            modelos = modelos_de_app(app_dir / "models.py")
+            if not modelos:
+                return {"success": True, "error": None, "regenerados": []}
+            primero = modelos[0][0].lower()
             
-            urls_content = f'''from django.urls import path
+            cabecera = f'''from django.urls import path
 from . import views
 
 app_name = '{app_name}'
 
 urlpatterns = [
-    # Lista de {model_name}s
-    path('', views.{model_lower}_lista, name='{model_lower}_lista'),
+    path('', views.{primero}_lista, name='inicio'),
     
-    # Detalle de {model_name}
-    path('<int:id>/', views.{model_lower}_detalle, name='{model_lower}_detalle'),
-    
-    # Crear nuevo {model_name}
-    path('crear/', views.{model_lower}_crear, name='{model_lower}_crear'),
-    
-    # Editar {model_name}
-    path('<int:id>/editar/', views.{model_lower}_editar, name='{model_lower}_editar'),
-    
-    # Eliminar {model_name}
-    path('<int:id>/eliminar/', views.{model_lower}_eliminar, name='{model_lower}_eliminar'),
-]
-'''   
-            with open(urls_path, "w", encoding='utf-8') as f:
-                f.write(urls_content)
+'''
+            urls_content, regenerados = componer(
+                urls_path, cabecera, modelos,
+                lambda modelo, huella: seccion(modelo, huella, DjangoManager._urls_modelo(modelo), sangria="    "),
+                pie="]\n", separador="    \n"
+            )
+            escribir_si_cambia(urls_path, urls_content)
             
-            print(f"URLs de app generadas para {model_name} en {app_name}")
-            return {"success": True, "error": None}
+            print(f"URLs de {app_name}: {len(modelos)} modelos, regenerados: {', '.join(regenerados) or 'ninguno'}")
+            return {"success": True, "error": None, "regenerados": regenerados}
             
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -549,7 +841,6 @@ urlpatterns = [
         try:
             project_dir = Path(project_path)
             templates_dir = project_dir / "templates" / app_name
-            templates_dir.mkdir(parents=True, exist_ok=True)
             
             model_lower = model_name.lower()
             
@@ -611,8 +902,7 @@ urlpatterns = [
 {% endblock %}
 """
             
-            with open(lista_template, "w", encoding='utf-8') as f:
-                f.write(lista_content)
+            escribir_si_cambia(lista_template, lista_content)
             
             # Template formulario (crear/editar)
             form_template = templates_dir / f"{model_lower}_form.html"
@@ -664,8 +954,7 @@ urlpatterns = [
 {% endblock %}
 """
             
-            with open(form_template, "w", encoding='utf-8') as f:
-                f.write(form_content)
+            escribir_si_cambia(form_template, form_content)
             
             # Template detalle
             detalle_template = templates_dir / f"{model_lower}_detalle.html"
@@ -710,8 +999,7 @@ urlpatterns = [
 {% endblock %}
 """
             
-            with open(detalle_template, "w", encoding='utf-8') as f:
-                f.write(detalle_content)
+            escribir_si_cambia(detalle_template, detalle_content)
             
             # Template confirmar eliminar
             confirmar_template = templates_dir / f"{model_lower}_confirmar_eliminar.html"
@@ -758,8 +1046,7 @@ urlpatterns = [
 {% endblock %}
 """
             
-            with open(confirmar_template, "w", encoding='utf-8') as f:
-                f.write(confirmar_content)
+            escribir_si_cambia(confirmar_template, confirmar_content)
             
             print(f"Templates CRUD generados para {model_name}")
             return {"success": True, "error": None}
@@ -767,68 +1054,183 @@ urlpatterns = [
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    # Valores de prueba por tipo de campo: (crear con el ORM, enviar en el formulario).
+    # DateTimeField es auto_now_add (no editable) y la ForeignKey apunta al propio modelo
+    VALORES_TEST = {
+        'CharField': ("'Prueba 1'", "f'Prueba {n}'"),
+        'IntegerField': ("1", "n"),
+        'TextField': ("'Texto de prueba 1'", "f'Texto de prueba {n}'"),
+        'BooleanField': ("True", "'on'"),
+        'EmailField': ("'prueba1@ejemplo.com'", "f'prueba{n}@ejemplo.com'"),
+    }
+
     @staticmethod
-    def _conectar_urls_proyecto(project_dir: Path, app_name: str):
-        # Buscar el archivo urls.py en el directorio del proyecto
-        urls_files = list(project_dir.glob("*/urls.py"))
-        if urls_files:
-            main_urls_path = urls_files[0]
-        else:
-            # Si no lo encuentra, intentar con el nombre del proyecto
-            project_folders = [f for f in project_dir.iterdir() if f.is_dir() and not f.name.startswith('.') and f.name not in ['apps', '__pycache__']]
-            if project_folders:
-                main_urls_path = project_folders[0] / "urls.py"
-            else:
-                main_urls_path = project_dir / "urls.py"  # fallback
-        
-        if not main_urls_path.exists():
-            possible_paths = [
-                project_dir / "urls.py", 
-                project_dir / "config" / "urls.py",  
-            ]
-            
-            for path in possible_paths:
-                if path.exists():
-                    main_urls_path = path
-                    break
-        
-        if main_urls_path.exists():
-            with open(main_urls_path, "r") as f:
-                content = f.read()
-            if "from django.urls import path" in content and "from django.urls import path, include" not in content:
-                content = content.replace(
-                    "from django.urls import path",
-                    "from django.urls import path, include"
-                )
-            if "from . import views" not in content:
-                if "from django.urls import" in content:
-                    lines = content.split('\n')
-                    for i, line in enumerate(lines):
-                        if line.startswith("from django.urls import"):
-                            lines.insert(i + 1, "from . import views")
-                            break
-                    content = '\n'.join(lines)
-            if f"path('{app_name}/', include('apps.{app_name}.urls'))" not in content:
-                if "urlpatterns = [" in content:
-                    if "path('admin/', admin.site.urls)," in content:
-                        content = content.replace(
-                            "path('admin/', admin.site.urls),",
-                            f"path('admin/', admin.site.urls),\n    path('{app_name}/', include('apps.{app_name}.urls')),"
-                        )
-                    else:
-                        content = content.replace(
-                            "urlpatterns = [",
-                            f"urlpatterns = [\n    path('{app_name}/', include('apps.{app_name}.urls')),"
-                        )
-            if "path('', views.index, name='index')" not in content:
-                if "]" in content:
-                    content = content.replace(
-                        "]",
-                        "    path('', views.index, name='index'),\n]"
-                    )
+    def generar_settings_test(project_path: str) -> dict:
+        """Escribe <paquete>/settings_test.py (si no existe): SQLite en memoria, sin migraciones y hasher rápido"""
+        try:
+            layout = layout_de(project_path)
+            paquete = layout.paquete
+            settings_test = layout.settings_test
+            if existe(settings_test):
+                return {"success": True, "error": None}
             
-            with open(main_urls_path, "w", encoding='utf-8') as f:
-                f.write(content)
+            contenido = f'''# Settings de los tests generados por el automatizador:
+#   python manage.py test --settings={paquete}.settings_test --parallel auto
+from .settings import *  # noqa: F401,F403
+
+# Base de datos en memoria; las tablas se crean directamente desde los modelos
+# actuales en lugar de aplicar todas las migraciones
+DATABASES = {{
+    'default': {{
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {{'MIGRATE': False}},
+    }}
+}}
+
+# PBKDF2 es lento a propósito; en los tests solo hace falta que funcione
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+DEBUG = False
+'''
+            escribir_si_cambia(settings_test, contenido)
+            
+            print(f"Settings de tests generados en {paquete}/settings_test.py")
+            return {"success": True, "error": None}
+            
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    def generar_tests_crud(project_path: str, app_name: str, model_name: str, campos: list) -> dict:
+        """Escribe apps/<app>/tests/test_<modelo>.py con un TestCase de las vistas CRUD del modelo"""
+        try:
+            project_dir = Path(project_path)
+            app_dir = project_dir / "apps" / app_name
+            tests_dir = app_dir / "tests"
+            
+            if not app_dir.exists():
+                return {"success": False, "error": f"La app {app_name} no existe"}
+            
+            model_lower = model_name.lower()
+            
+            # La FK obligatoria hacia el propio modelo: el primer objeto se apunta a sí mismo
+            valores_orm = []
+            datos_form = []
+            comprobables = []
+            for campo in campos:
+                nombre, tipo = campo['name'], campo['type']
+                if tipo == 'ForeignKey':
+                    valores_orm.append(f"{nombre}_id=1")
+                    datos_form.append(f"            '{nombre}': self.objeto.pk,")
+                elif tipo in DjangoManager.VALORES_TEST:
+                    orm, form = DjangoManager.VALORES_TEST[tipo]
+                    valores_orm.append(f"{nombre}={orm}")
+                    datos_form.append(f"            '{nombre}': {form},")
+                    if tipo != 'BooleanField':
+                        comprobables.append(f"'{nombre}'")
+            if any(c['type'] == 'ForeignKey' for c in campos):
+                valores_orm.insert(0, "pk=1")
+            
+            tests_content = f'''from django.test import TestCase
+from django.urls import reverse
+from apps.{app_name}.models import {model_name}
+
+
+class {model_name}CrudTests(TestCase):
+    """Vistas CRUD generadas para {model_name}"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.objeto = {model_name}.objects.create({", ".join(valores_orm)})
+
+    def datos(self, n):
+        return {{
+{chr(10).join(datos_form)}
+        }}
+
+    def test_lista(self):
+        respuesta = self.client.get(reverse('{app_name}:{model_lower}_lista'))
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_detalle(self):
+        respuesta = self.client.get(reverse('{app_name}:{model_lower}_detalle', args=[self.objeto.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_crear(self):
+        total = {model_name}.objects.count()
+        respuesta = self.client.post(reverse('{app_name}:{model_lower}_crear'), self.datos(2))
+        self.assertRedirects(respuesta, reverse('{app_name}:{model_lower}_lista'))
+        self.assertEqual({model_name}.objects.count(), total + 1)
+
+    def test_editar(self):
+        datos = self.datos(3)
+        respuesta = self.client.post(reverse('{app_name}:{model_lower}_editar', args=[self.objeto.pk]), datos)
+        self.assertRedirects(respuesta, reverse('{app_name}:{model_lower}_detalle', args=[self.objeto.pk]))
+        self.objeto.refresh_from_db()
+        for campo in [{", ".join(comprobables)}]:
+            self.assertEqual(getattr(self.objeto, campo), datos[campo])
+
+    def test_eliminar(self):
+        respuesta = self.client.post(reverse('{app_name}:{model_lower}_eliminar', args=[self.objeto.pk]))
+        self.assertRedirects(respuesta, reverse('{app_name}:{model_lower}_lista'))
+        self.assertFalse({model_name}.objects.filter(pk=self.objeto.pk).exists())
+'''
+            
+            crear_si_falta(tests_dir / "__init__.py")
+            # El runner solo descubre tests dentro de paquetes: apps/ también tiene que serlo
+            crear_si_falta(tests_dir.parent.parent / "__init__.py")
+            escribir_si_cambia(tests_dir / f"test_{model_lower}.py", tests_content)
+            
+            print(f"Tests CRUD generados para {model_name}")
+            return {"success": True, "error": None}
+            
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    def ejecutar_tests(project_path: str, venv_path: str) -> dict:
+        """Lanza todos los tests del proyecto con settings_test y un proceso por núcleo"""
+        try:
+            project_dir = Path(project_path)
+            venv_python = Path(venv_path) / ("Scripts" if os.name == "nt" else "bin") / "python"
+            DjangoManager.generar_settings_test(project_path)
+            paquete = layout_de(project_dir).paquete
+            
+            resultado = subprocess.run(
+                [str(venv_python), "manage.py", "test", f"--settings={paquete}.settings_test",
+                 "--parallel", "auto", "--noinput"],
+                cwd=str(project_dir),
+                capture_output=True,
+                text=True,
+                encoding='utf-8'
+            )
+            # El runner de unittest escribe el resumen en stderr
+            salida = (resultado.stdout + resultado.stderr).strip()
+            resumen = re.search(r"Ran \d+ tests? in [\d.]+s", salida)
+            return {
+                "success": resultado.returncode == 0,
+                "resumen": resumen.group(0) if resumen else "",
+                "salida": salida,
+                "error": None if resultado.returncode == 0 else salida[-2000:]
+            }
+            
+        except Exception as e:
+            return {"success": False, "resumen": "", "salida": "", "error": str(e)}
+
+    @staticmethod
+    def _conectar_urls_proyecto(project_dir: Path, app_name: str):
+        main_urls_path = layout_de(project_dir).urls
+        if existe(main_urls_path):
+            urls_py = abrir(main_urls_path)
+            urls_py.asegurar_import("django.urls", "include")
+            urls_py.asegurar_import(".", "views")
+            urls_py.anadir_a_lista(
+                "urlpatterns", f"path('{app_name}/', include('apps.{app_name}.urls'))",
+                despues_de="path('admin/', admin.site.urls)"
+            )
+            urls_py.anadir_a_lista("urlpatterns", "path('', views.index, name='index')")
+            urls_py.guardar()
             
             print(f"URLs de {app_name} conectadas al proyecto principal")
         else:
@@ -836,10 +1238,10 @@ urlpatterns = [
 
     @staticmethod
     def _crear_pagina_indice(project_dir: Path):
-        templates_dir = project_dir / "templates"
-        templates_dir.mkdir(exist_ok=True)
+        layout = layout_de(project_dir)
+        templates_dir = layout.templates
         base_template = templates_dir / "base.html"
-        if not base_template.exists():
+        if not existe(base_template):
             base_content = """<!DOCTYPE html>
 <html lang="es">
 <head>
@@ -872,8 +1274,7 @@ urlpatterns = [
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
 </body>
 </html>"""
-            with open(base_template, "w", encoding='utf-8') as f:
-                f.write(base_content)
+            escribir_si_cambia(base_template, base_content)
         index_template = templates_dir / "index.html"
         index_content = """{% extends 'base.html' %}
 
@@ -928,15 +1329,10 @@ urlpatterns = [
 </div>
 {% endblock %}"""
         
-        with open(index_template, "w", encoding='utf-8') as f:
-            f.write(index_content) 
-        # Buscar el directorio del proyecto principal
-        project_folders = [f for f in project_dir.iterdir() if f.is_dir() and not f.name.startswith('.') and f.name not in ['apps', '__pycache__']]
-        if project_folders:
-            main_views_path = project_folders[0] / "views.py"
-        else:
-            main_views_path = project_dir / "views.py"  # fallback
-        if not main_views_path.exists():
+        escribir_si_cambia(index_template, index_content)
+        # views.py del paquete principal (el de settings.py, no la primera carpeta que aparezca)
+        main_views_path = layout.views
+        if not existe(main_views_path):
             views_content = """from django.shortcuts import render
 import os
 from pathlib import Path
@@ -975,25 +1371,9 @@ def index(request):
     })
 """
             
-            with open(main_views_path, "w", encoding='utf-8') as f:
-                f.write(views_content)
-        # Buscar settings.py en el directorio del proyecto principal
-        settings_files = list(project_dir.glob("*/settings.py"))
-        if settings_files:
-            settings_path = settings_files[0]
-        else:
-            settings_path = project_dir / "settings.py"  # fallback
-        if settings_path.exists():
-            with open(settings_path, "r") as f:
-                content = f.read()
-            
-            if "'DIRS': []" in content:
-                content = content.replace(
-                    "'DIRS': []",
-                    "'DIRS': [BASE_DIR / 'templates']"
-                )
-                
-                with open(settings_path, "w", encoding='utf-8') as f:
-                    f.write(content)
+            escribir_si_cambia(main_views_path, views_content)
+        settings_path = layout.settings
+        if existe(settings_path):
+            registrar_dir_de_templates(settings_path)
         
         print("Pagina indice creada con templates configurados")
\ No newline at end of file
@@ -0,0 +1,214 @@
+# core/django_worker.py
+import atexit
+import itertools
+import json
+import os
+import queue
+import subprocess
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.layout_proyecto import layout_de
+
+# Script que ejecuta el python del venv (solo depende de Django y la biblioteca estándar)
+SCRIPT_WORKER = Path(__file__).resolve().parent / "django_worker_server.py"
+
+# Segundos para el arranque (django.setup) y para cada orden
+TIMEOUT_ARRANQUE = 60
+TIMEOUT_ORDEN = 600
+# Órdenes que tardan lo que tengan que tardar (una migración lenta sigue siendo válida); si el
+# worker muere se nota igual por el EOF de stdout
+ORDENES_SIN_TIMEOUT = {"migrate", "sembrar_usuarios"}
+# Reinicios seguidos antes de rendirse y usar manage.py
+MAX_REINICIOS = 2
+
+
+class WorkerError(Exception):
+    """El worker no pudo arrancar o dejó de responder"""
+
+
+def _modulo_settings(project_path: Path) -> str:
+    """Módulo de settings del proyecto (resuelto una vez por core.layout_proyecto)"""
+    return layout_de(project_path).modulo_settings
+
+
+class DjangoWorker:
+    """Proceso Python del venv con Django ya cargado que ejecuta órdenes por JSON-lines"""
+
+    def __init__(self, venv_python: str, project_path: str):
+        self.venv_python = str(venv_python)
+        self.project_path = Path(project_path)
+        self._proceso: Optional[subprocess.Popen] = None
+        self._respuestas: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._stderr = deque(maxlen=200)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.reinicios = 0
+
+    def vivo(self) -> bool:
+        return self._proceso is not None and self._proceso.poll() is None
+
+    def _leer_stdout(self, proceso: subprocess.Popen, respuestas: queue.Queue):
+        for linea in proceso.stdout:
+            try:
+                respuestas.put(json.loads(linea))
+            except ValueError:
+                self._stderr.append(linea.rstrip())
+        respuestas.put(None)  # EOF: el proceso terminó
+
+    def _leer_stderr(self, proceso: subprocess.Popen):
+        for linea in proceso.stderr:
+            self._stderr.append(linea.rstrip())
+
+    def iniciar(self):
+        self.detener()
+        entorno = dict(os.environ)
+        entorno["PYTHONUNBUFFERED"] = "1"
+        entorno.pop("DJANGO_SETTINGS_MODULE", None)
+        self._respuestas = queue.Queue()
+        self._proceso = subprocess.Popen(
+            [self.venv_python, str(SCRIPT_WORKER), str(self.project_path), _modulo_settings(self.project_path)],
+            cwd=str(self.project_path),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            env=entorno
+        )
+        threading.Thread(target=self._leer_stdout, args=(self._proceso, self._respuestas), daemon=True).start()
+        threading.Thread(target=self._leer_stderr, args=(self._proceso,), daemon=True).start()
+
+        saludo = self._esperar_respuesta(TIMEOUT_ARRANQUE)
+        if not saludo or not saludo.get("listo"):
+            self.detener()
+            raise WorkerError(f"El worker de Django no arrancó:\n{self.ultimos_errores()}")
+        print(f"Worker de Django listo (pid {saludo.get('pid')}, Django {saludo.get('django')})")
+
+    def _esperar_respuesta(self, timeout: float) -> Optional[dict]:
+        try:
+            return self._respuestas.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def ultimos_errores(self, lineas: int = 20) -> str:
+        return "\n".join(list(self._stderr)[-lineas:])
+
+    def detener(self):
+        proceso, self._proceso = self._proceso, None
+        if proceso is None:
+            return
+        if proceso.poll() is None:
+            try:
+                proceso.stdin.write(json.dumps({"id": 0, "op": "salir"}) + "\n")
+                proceso.stdin.flush()
+                proceso.wait(timeout=3)
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                proceso.kill()
+                proceso.wait()
+
+    def _enviar(self, op: str, args: dict, timeout: Optional[float]) -> dict:
+        if not self.vivo():
+            self.iniciar()
+        id_orden = next(self._ids)
+        try:
+            self._proceso.stdin.write(json.dumps({"id": id_orden, "op": op, "args": args}) + "\n")
+            self._proceso.stdin.flush()
+        except (OSError, ValueError):
+            return {"id": id_orden, "ok": False, "reiniciar": True}
+
+        try:
+            respuesta = self._respuestas.get(timeout=timeout)
+        except queue.Empty:
+            # Sigue ocupado: se detiene, pero la orden no se repite (puede haber hecho ya parte
+            # de su trabajo y migrate o sembrar_usuarios no son idempotentes)
+            self.detener()
+            return {"id": id_orden, "ok": False, "error": f"'{op}' no terminó en {timeout:.0f} s; se detuvo el worker"}
+        if respuesta is None:
+            # EOF: el proceso murió
+            self.detener()
+            return {"id": id_orden, "ok": False, "reiniciar": True}
+        return respuesta
+
+    def ejecutar(self, op: str, timeout: Optional[float] = None, **args) -> dict:
+        """Ejecuta una orden; si el worker pide reinicio o muere, lo relanza y la reintenta.
+        Tras un timeout no se reintenta. timeout None: TIMEOUT_ORDEN, o sin límite para
+        las órdenes de ORDENES_SIN_TIMEOUT"""
+        if timeout is None and op not in ORDENES_SIN_TIMEOUT:
+            timeout = TIMEOUT_ORDEN
+        with self._lock:
+            for _ in range(MAX_REINICIOS + 1):
+                respuesta = self._enviar(op, args, timeout)
+                if not respuesta.get("reiniciar"):
+                    return respuesta
+                self.reinicios += 1
+                print(f"Reiniciando worker de Django ({op})...")
+                self.detener()
+            raise WorkerError(f"El worker de Django no pudo ejecutar '{op}':\n{self.ultimos_errores()}")
+
+
+# Un worker por proyecto (ruta del proyecto -> worker)
+_workers: Dict[str, DjangoWorker] = {}
+_workers_lock = threading.Lock()
+
+
+def obtener_worker(venv_python: str, project_path: str) -> DjangoWorker:
+    clave = str(Path(project_path).resolve())
+    with _workers_lock:
+        worker = _workers.get(clave)
+        if worker is None or worker.venv_python != str(venv_python):
+            if worker is not None:
+                worker.detener()
+            worker = DjangoWorker(venv_python, project_path)
+            _workers[clave] = worker
+        return worker
+
+
+def detener_workers():
+    with _workers_lock:
+        for worker in _workers.values():
+            worker.detener()
+        _workers.clear()
+
+
+atexit.register(detener_workers)
+
+
+def _fallback_manage(venv_python: str, project_path: str, op: str, args: dict) -> dict:
+    """La misma orden con un manage.py en frío (si el worker no puede usarse)"""
+    manage_py = str(Path(project_path) / "manage.py")
+    entorno = None
+    if op == "makemigrations":
+        cmd = [venv_python, manage_py, "makemigrations", *args.get("apps", []), "--noinput"]
+        if args.get("dry_run"):
+            cmd.append("--dry-run")
+    elif op == "migrate":
+        cmd = [venv_python, manage_py, "migrate", *[a for a in (args.get("app"), args.get("migracion")) if a], "--noinput"]
+    elif op == "check":
+        cmd = [venv_python, manage_py, "check"]
+    elif op == "crear_superusuario":
+        # createsuperuser --noinput lee la contraseña del entorno: nada se interpola en código
+        entorno = dict(os.environ)
+        entorno["DJANGO_SUPERUSER_PASSWORD"] = args["password"]
+        cmd = [venv_python, manage_py, "createsuperuser", "--noinput",
+               "--username", args["username"], "--email", args.get("email") or ""]
+    else:
+        return {"ok": False, "error": f"Operación desconocida: {op}"}
+
+    resultado = subprocess.run(cmd, cwd=str(project_path), capture_output=True, text=True, env=entorno)
+    respuesta = {"ok": resultado.returncode == 0, "salida": resultado.stdout, "errores": resultado.stderr, "datos": {}}
+    if resultado.returncode != 0:
+        respuesta["error"] = resultado.stderr or resultado.stdout
+    return respuesta
+
+
+def ejecutar_en_proyecto(venv_python: str, project_path: str, op: str, **args) -> dict:
+    """Orden para el proyecto vía su worker persistente, con manage.py como respaldo"""
+    try:
+        return obtener_worker(venv_python, project_path).ejecutar(op, **args)
+    except (WorkerError, OSError) as e:
+        print(f"Worker no disponible, usando manage.py: {e}")
+        return _fallback_manage(str(venv_python), str(project_path), op, args)
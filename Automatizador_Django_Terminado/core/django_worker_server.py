@@ -0,0 +1,430 @@
+# core/django_worker_server.py
+#
+# Proceso de larga duración que se ejecuta con el python del venv del proyecto.
+# Hace django.setup() una sola vez y atiende órdenes JSON (una por línea) por stdin,
+# respondiendo una línea JSON por stdout. Solo usa la biblioteca estándar y Django:
+# no puede importar nada de core/ porque corre en otro intérprete.
+import contextlib
+import importlib
+import importlib.abc
+import importlib.util
+import io
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Código de salida con el que el worker pide que lo reinicien (settings cambiados)
+CODIGO_REINICIO = 3
+
+
+def _firma_settings(settings_module):
+    try:
+        return os.stat(settings_module.__file__).st_mtime_ns
+    except (OSError, AttributeError):
+        return None
+
+
+def _archivos_modelos(app_config):
+    ruta = Path(app_config.path)
+    if (ruta / "models.py").exists():
+        return [ruta / "models.py"]
+    return sorted((ruta / "models").glob("*.py"))
+
+
+def _firma_modelos(apps, raiz_proyecto):
+    """mtime de los models.py de las apps del proyecto (no las de django.contrib)"""
+    firma = {}
+    for app_config in apps.get_app_configs():
+        if not str(Path(app_config.path).resolve()).startswith(str(raiz_proyecto)):
+            continue
+        firma[app_config.label] = tuple(
+            (str(a), a.stat().st_mtime_ns) for a in _archivos_modelos(app_config) if a.exists()
+        )
+    return firma
+
+
+def _recargar_modelos(apps, etiquetas):
+    """Vuelve a importar los módulos de modelos de esas apps dentro del registro actual"""
+    for etiqueta in etiquetas:
+        app_config = apps.get_app_config(etiqueta)
+        nombre_modulo = f"{app_config.name}.models"
+        # Vaciar en sitio: AppConfig.models apunta a este mismo diccionario
+        apps.all_models[etiqueta].clear()
+        apps.clear_cache()
+        for nombre in [n for n in sys.modules if n == nombre_modulo or n.startswith(nombre_modulo + ".")]:
+            del sys.modules[nombre]
+        app_config.models_module = importlib.import_module(nombre_modulo)
+    apps.clear_cache()
+
+
+def _olvidar_migraciones(raiz_proyecto):
+    """Quita de sys.modules las migraciones del proyecto: un archivo reescrito con el mismo
+    nombre (consolidación) no se volvería a leer, porque el cargador de Django usa import_module"""
+    for nombre, modulo in list(sys.modules.items()):
+        archivo = getattr(modulo, "__file__", None)
+        if ".migrations." in nombre and archivo and str(Path(archivo).resolve()).startswith(str(raiz_proyecto)):
+            del sys.modules[nombre]
+
+
+def _registrar_migraciones(datos):
+    """Reemplaza las filas de django_migrations de una app por las migraciones indicadas"""
+    from django.db import connection, transaction
+    from django.db.migrations.recorder import MigrationRecorder
+
+    recorder = MigrationRecorder(connection)
+    with transaction.atomic():
+        recorder.migration_qs.filter(app=datos["app"]).delete()
+        for nombre in datos["migraciones"]:
+            recorder.record_applied(datos["app"], nombre)
+    return {"registradas": len(datos["migraciones"])}
+
+
+@contextlib.contextmanager
+def _medir_migraciones(registro):
+    """Cronometra cada migración que aplica migrate y guarda el SQL que ejecuta (sin django_migrations)"""
+    from django.db.migrations.executor import MigrationExecutor
+
+    original = MigrationExecutor.apply_migration
+
+    def apply_migration(executor, state, migration, fake=False, fake_initial=False):
+        sentencias = []
+
+        def capturar(execute, sql, params, many, context):
+            inicio_sentencia = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                if "django_migrations" not in sql:
+                    texto = sql
+                    if params and not many:
+                        try:
+                            texto = executor.connection.ops.last_executed_query(context["cursor"], sql, params)
+                        except Exception:
+                            pass
+                    sentencias.append({"sql": texto, "segundos": time.perf_counter() - inicio_sentencia})
+
+        entrada = {"app": migration.app_label, "migracion": migration.name, "fake": fake, "sentencias": sentencias}
+        inicio = time.perf_counter()
+        try:
+            with executor.connection.execute_wrapper(capturar):
+                return original(executor, state, migration, fake, fake_initial)
+        except Exception as e:
+            entrada["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            entrada["segundos"] = time.perf_counter() - inicio
+            registro.append(entrada)
+
+    MigrationExecutor.apply_migration = apply_migration
+    try:
+        yield
+    finally:
+        MigrationExecutor.apply_migration = original
+
+
+class _FuentesPreparadas(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """Sirve los módulos indicados desde su código en memoria en lugar de desde el disco"""
+
+    def __init__(self, fuentes):
+        self.fuentes = fuentes  # nombre del módulo -> (ruta, código)
+
+    def find_spec(self, nombre, path=None, target=None):
+        if nombre not in self.fuentes:
+            return None
+        ruta = self.fuentes[nombre][0]
+        es_paquete = ruta.name == "__init__.py"
+        spec = importlib.util.spec_from_loader(nombre, self, origin=str(ruta), is_package=es_paquete)
+        if es_paquete:
+            spec.submodule_search_locations = [str(ruta.parent)]
+        spec.has_location = True
+        return spec
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, modulo):
+        ruta, codigo = self.fuentes[modulo.__name__]
+        modulo.__file__ = str(ruta)
+        exec(compile(codigo, str(ruta), "exec"), modulo.__dict__)
+
+
+def _verificar_fuentes(datos, raiz_proyecto):
+    """Importa los .py generados (ruta relativa -> código) y compila las plantillas sin
+    escribir nada en disco. Al terminar sys.modules queda como estaba"""
+    from django.template import Engine
+
+    errores = []
+    for ruta, codigo in datos.get("plantillas", {}).items():
+        try:
+            Engine.get_default().from_string(codigo)
+        except Exception as e:
+            errores.append(f"{ruta}: {type(e).__name__}: {e}")
+
+    fuentes = {}
+    for relativa, codigo in datos.get("modulos", {}).items():
+        partes = list(Path(relativa).with_suffix("").parts)
+        if partes[-1] == "__init__":
+            partes.pop()
+        fuentes[".".join(partes)] = (raiz_proyecto / relativa, codigo)
+    # settings y models ya están cargados en el registro de Django: reimportarlos no es inocuo
+    ajustes = os.environ["DJANGO_SETTINGS_MODULE"]
+    importables = sorted(
+        n for n in fuentes if n != ajustes and n.rsplit(".", 1)[-1] != "models" and ".models." not in n
+    )
+
+    cargador = _FuentesPreparadas(fuentes)
+    previos = {n: sys.modules[n] for n in fuentes if n in sys.modules}
+    for nombre in fuentes:
+        sys.modules.pop(nombre, None)
+        # "from . import views" toma el atributo del paquete si existe, sin pasar por sys.modules
+        padre, _, hijo = nombre.rpartition(".")
+        if nombre in previos and padre in sys.modules and hasattr(sys.modules[padre], hijo):
+            delattr(sys.modules[padre], hijo)
+    sys.meta_path.insert(0, cargador)
+    try:
+        for nombre in importables:
+            try:
+                importlib.import_module(nombre)
+            except Exception as e:
+                errores.append(f"{fuentes[nombre][0].relative_to(raiz_proyecto)}: {type(e).__name__}: {e}")
+    finally:
+        sys.meta_path.remove(cargador)
+        for nombre in fuentes:
+            sys.modules.pop(nombre, None)
+            # El import también deja el submódulo como atributo del paquete padre
+            padre, _, hijo = nombre.rpartition(".")
+            if padre in sys.modules:
+                if nombre in previos:
+                    setattr(sys.modules[padre], hijo, previos[nombre])
+                elif hasattr(sys.modules[padre], hijo):
+                    delattr(sys.modules[padre], hijo)
+        sys.modules.update(previos)
+        importlib.invalidate_caches()
+    return {"errores": errores, "modulos": len(importables), "plantillas": len(datos.get("plantillas", {}))}
+
+
+def _ejecutar_comando(call_command, nombre, *args, **opciones):
+    salida = io.StringIO()
+    errores = io.StringIO()
+    call_command(nombre, *args, stdout=salida, stderr=errores, **opciones)
+    return salida.getvalue(), errores.getvalue()
+
+
+def _crear_superusuario(datos):
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    username = datos["username"]
+    usuario = User.objects.filter(**{User.USERNAME_FIELD: username}).first()
+    if usuario is not None:
+        # Una cuenta que ya existía (quizá sin permisos) queda como superusuario
+        usuario.set_password(datos["password"])
+        usuario.is_staff = True
+        usuario.is_superuser = True
+        usuario.save(update_fields=["password", "is_staff", "is_superuser"])
+        return {"actualizado": True}
+    User.objects.create_superuser(username, datos.get("email") or "", datos["password"])
+    return {"actualizado": False}
+
+
+def _sembrar_usuarios(datos):
+    """Crea en bloque usuarios ({"username", "email", "password", "grupos", "is_staff"}) y sus grupos.
+
+    Los hashes se calculan en un pool de hilos (PBKDF2, bcrypt y argon2 sueltan el GIL) y todo
+    se inserta con bulk_create en una transacción. Los usuarios que ya existen se saltan.
+    hash_unico: un solo hash por contraseña distinta (mismo salt); solo para cuentas de prueba.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import Group
+    from django.db import transaction
+
+    User = get_user_model()
+    campo_usuario = User.USERNAME_FIELD
+    inicio = time.perf_counter()
+
+    existentes = set(
+        User.objects.filter(**{f"{campo_usuario}__in": [u["username"] for u in datos["usuarios"]]})
+        .values_list(campo_usuario, flat=True)
+    )
+    nuevos = {}
+    for u in datos["usuarios"]:
+        if u["username"] not in existentes:
+            nuevos.setdefault(u["username"], u)
+    nuevos = list(nuevos.values())
+
+    # Hashes en paralelo
+    hilos = int(datos.get("hilos") or os.cpu_count() or 1)
+    if datos.get("hash_unico"):
+        distintas = list({u["password"] for u in nuevos})
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            por_password = dict(zip(distintas, pool.map(make_password, distintas)))
+        hashes = [por_password[u["password"]] for u in nuevos]
+    else:
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            hashes = list(pool.map(make_password, [u["password"] for u in nuevos]))
+    segundos_hash = time.perf_counter() - inicio
+
+    lote = int(datos.get("lote") or 1000)
+    with transaction.atomic():
+        nombres_grupos = sorted({g for u in nuevos for g in u.get("grupos", [])})
+        Group.objects.bulk_create([Group(name=g) for g in nombres_grupos], ignore_conflicts=True)
+        grupos = dict(Group.objects.filter(name__in=nombres_grupos).values_list("name", "pk"))
+
+        User.objects.bulk_create([
+            User(**{
+                campo_usuario: u["username"],
+                "email": u.get("email") or "",
+                "password": hash_,
+                "is_staff": bool(u.get("is_staff")),
+            })
+            for u, hash_ in zip(nuevos, hashes)
+        ], batch_size=lote)
+
+        # bulk_create no devuelve las pk en todos los motores: se leen por nombre de usuario
+        con_grupos = [u for u in nuevos if u.get("grupos")]
+        ids = dict(
+            User.objects.filter(**{f"{campo_usuario}__in": [u["username"] for u in con_grupos]})
+            .values_list(campo_usuario, "pk")
+        )
+        Relacion = User.groups.through
+        campo_u, campo_g = User.groups.field.m2m_field_name(), User.groups.field.m2m_reverse_field_name()
+        Relacion.objects.bulk_create([
+            Relacion(**{f"{campo_u}_id": ids[u["username"]], f"{campo_g}_id": grupos[g]})
+            for u in con_grupos for g in dict.fromkeys(u["grupos"])
+        ], batch_size=lote, ignore_conflicts=True)
+
+    total = time.perf_counter() - inicio
+    return {
+        "creados": len(nuevos),
+        "existentes": len(datos["usuarios"]) - len(nuevos),
+        "grupos": len(grupos),
+        "hilos": hilos,
+        "segundos_hash": segundos_hash,
+        "segundos_insercion": total - segundos_hash,
+        "segundos": total,
+        "por_segundo": len(nuevos) / total if total else 0.0,
+    }
+
+
+def main():
+    ruta_proyecto = Path(sys.argv[1]).resolve()
+    modulo_settings = sys.argv[2]
+
+    # stdout queda reservado para el protocolo; cualquier print de Django va a stderr
+    protocolo = sys.stdout
+    sys.stdout = sys.stderr
+
+    # Quitar core/ del path (lo añade Python por ser el directorio del script)
+    # para que sus módulos no tapen a los del proyecto
+    directorio_script = str(Path(__file__).resolve().parent)
+    sys.path[:] = [p for p in sys.path if p and str(Path(p).resolve()) != directorio_script]
+    sys.path.insert(0, str(ruta_proyecto))
+    os.chdir(ruta_proyecto)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", modulo_settings)
+
+    import django
+    django.setup()
+    from django.apps import apps
+    from django.core.management import call_command
+    from django.db import connections
+
+    settings_module = sys.modules[os.environ["DJANGO_SETTINGS_MODULE"]]
+    firma_settings = _firma_settings(settings_module)
+    firma_modelos = _firma_modelos(apps, ruta_proyecto)
+
+    def responder(mensaje):
+        protocolo.write(json.dumps(mensaje) + "\n")
+        protocolo.flush()
+
+    responder({"listo": True, "pid": os.getpid(), "django": django.get_version()})
+
+    for linea in sys.stdin:
+        if not linea.strip():
+            continue
+        try:
+            orden = json.loads(linea)
+        except ValueError:
+            responder({"id": None, "ok": False, "error": "JSON inválido"})
+            continue
+        id_orden = orden.get("id")
+        operacion = orden.get("op")
+        datos = orden.get("args") or {}
+
+        if operacion == "salir":
+            responder({"id": id_orden, "ok": True})
+            break
+
+        # INSTALLED_APPS/DATABASES solo se leen al arrancar: si settings cambió hay que reiniciar
+        if _firma_settings(settings_module) != firma_settings:
+            responder({"id": id_orden, "ok": False, "reiniciar": True})
+            sys.exit(CODIGO_REINICIO)
+
+        nueva_firma = _firma_modelos(apps, ruta_proyecto)
+        if nueva_firma != firma_modelos:
+            cambiadas = [e for e in nueva_firma if nueva_firma[e] != firma_modelos.get(e)]
+            try:
+                _recargar_modelos(apps, cambiadas)
+                firma_modelos = nueva_firma
+            except Exception:
+                traceback.print_exc()
+                responder({"id": id_orden, "ok": False, "reiniciar": True})
+                sys.exit(CODIGO_REINICIO)
+
+        # Migraciones escritas desde fuera del worker desde la última orden
+        importlib.invalidate_caches()
+        _olvidar_migraciones(ruta_proyecto)
+
+        try:
+            resultado = {}
+            if operacion == "ping":
+                salida, errores = "", ""
+            elif operacion == "makemigrations":
+                # dry_run: solo comprobar si el autodetector ve cambios sin migrar
+                salida, errores = _ejecutar_comando(
+                    call_command, "makemigrations", *datos.get("apps", []),
+                    interactive=False, dry_run=bool(datos.get("dry_run"))
+                )
+            elif operacion == "migrate":
+                argumentos = [a for a in (datos.get("app"), datos.get("migracion")) if a]
+                # Se rellena sobre la marcha: si una migración falla, la respuesta de error lo incluye
+                resultado = {"motor": connections["default"].vendor, "migraciones": []}
+                with _medir_migraciones(resultado["migraciones"]):
+                    salida, errores = _ejecutar_comando(call_command, "migrate", *argumentos, interactive=False)
+            elif operacion == "check":
+                salida, errores = _ejecutar_comando(call_command, "check")
+            elif operacion == "crear_superusuario":
+                salida, errores = "", ""
+                resultado = _crear_superusuario(datos)
+            elif operacion == "sembrar_usuarios":
+                salida, errores = "", ""
+                resultado = _sembrar_usuarios(datos)
+            elif operacion == "verificar_fuentes":
+                salida, errores = "", ""
+                resultado = _verificar_fuentes(datos, ruta_proyecto)
+            elif operacion == "registrar_migraciones":
+                salida, errores = "", ""
+                resultado = _registrar_migraciones(datos)
+            else:
+                raise ValueError(f"Operación desconocida: {operacion}")
+            responder({"id": id_orden, "ok": True, "salida": salida, "errores": errores, "datos": resultado})
+        except BaseException as e:
+            if isinstance(e, KeyboardInterrupt):
+                raise
+            responder({
+                "id": id_orden, "ok": False,
+                "error": f"{type(e).__name__}: {e}",
+                "traceback": traceback.format_exc(),
+                "datos": resultado,
+            })
+        finally:
+            # No dejar la base de datos bloqueada entre órdenes (runserver usa la misma)
+            connections.close_all()
+
+
+if __name__ == "__main__":
+    main()
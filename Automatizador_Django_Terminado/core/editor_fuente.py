@@ -0,0 +1,330 @@
+# core/editor_fuente.py
+#
+# Edición de los .py del proyecto (models.py, admin.py, settings.py, urls.py) a partir de su
+# árbol sintáctico: cada archivo se parsea una vez, se indexan sus símbolos (clases, imports,
+# admin.site.register, listas como INSTALLED_APPS o urlpatterns) y las ediciones sustituyen
+# solo las líneas del nodo afectado, así que el resto del archivo queda tal cual. Tras cada
+# edición solo se vuelven a parsear las sentencias tocadas, y el parseo se cachea por ruta y mtime.
+import ast
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.escritura import escribir_si_cambia, preparacion_activa
+
+
+class Simbolos:
+    """Índice de los nodos de primer nivel de un archivo (líneas 1-based, fin inclusive)"""
+
+    def __init__(self, arbol: ast.Module):
+        self.clases: Dict[str, Tuple[int, int]] = {}
+        self.imports: List[ast.ImportFrom] = []
+        self.registros: List[str] = []
+        self.listas: Dict[str, ast.List] = {}
+        self.ultima_importacion = 0
+        for nodo in arbol.body:
+            if isinstance(nodo, ast.ClassDef):
+                # Desde la línea "class" (los decoradores no se tocan) hasta su última sentencia
+                self.clases[nodo.name] = (nodo.lineno, nodo.end_lineno)
+            elif isinstance(nodo, (ast.Import, ast.ImportFrom)):
+                if isinstance(nodo, ast.ImportFrom):
+                    self.imports.append(nodo)
+                self.ultima_importacion = nodo.end_lineno
+            elif isinstance(nodo, ast.Assign) and isinstance(nodo.value, ast.List):
+                for objetivo in nodo.targets:
+                    if isinstance(objetivo, ast.Name):
+                        self.listas[objetivo.id] = nodo.value
+            elif (isinstance(nodo, ast.Expr) and isinstance(nodo.value, ast.Call)
+                  and ast.unparse(nodo.value.func) == "admin.site.register"):
+                self.registros.extend(ast.unparse(a) for a in nodo.value.args)
+
+
+def _modulo(nodo: ast.ImportFrom) -> str:
+    return "." * nodo.level + (nodo.module or "")
+
+
+def _inicio(nodo: ast.stmt) -> int:
+    """Primera línea de la sentencia, contando los decoradores"""
+    return min([nodo.lineno] + [d.lineno for d in getattr(nodo, "decorator_list", [])])
+
+
+def _columna(linea: str, offset: int) -> int:
+    """Los col_offset de ast cuentan bytes UTF-8, no caracteres"""
+    return len(linea.encode("utf-8")[:offset].decode("utf-8", errors="ignore"))
+
+
+def _misma_expresion(nodo: ast.AST, codigo: str) -> bool:
+    return ast.dump(nodo) == ast.dump(ast.parse(codigo, mode="eval").body)
+
+
+class ArchivoFuente:
+    def __init__(self, ruta: Path, texto: str):
+        self.ruta = Path(ruta)
+        self._lineas = texto.splitlines(keepends=True)
+        self._arbol: Optional[ast.Module] = None
+        self._simbolos: Optional[Simbolos] = None
+        self.modificado = False
+
+    @property
+    def texto(self) -> str:
+        return "".join(self._lineas)
+
+    @property
+    def arbol(self) -> ast.Module:
+        if self._arbol is None:
+            self._arbol = ast.parse(self.texto, filename=str(self.ruta))
+        return self._arbol
+
+    @property
+    def simbolos(self) -> Simbolos:
+        if self._simbolos is None:
+            self._simbolos = Simbolos(self.arbol)
+        return self._simbolos
+
+    def _sustituir(self, inicio: int, fin: int, codigo: str):
+        """Cambia las líneas inicio..fin (1-based, inclusive; fin = inicio - 1 inserta) por codigo"""
+        if codigo and not codigo.endswith("\n"):
+            codigo += "\n"
+        if inicio > 1 and not self._lineas[inicio - 2].endswith("\n"):
+            self._lineas[inicio - 2] += "\n"
+        nuevas = codigo.splitlines(keepends=True)
+        delta = len(nuevas) - (fin - inicio + 1)
+        self._lineas[inicio - 1:fin] = nuevas
+        if self._arbol is not None:
+            try:
+                self._reparsear_tramo(inicio, fin, delta)
+            except SyntaxError:
+                self._arbol = None
+        self._simbolos = None
+        self.modificado = True
+
+    def _reparsear_tramo(self, inicio: int, fin: int, delta: int):
+        """Actualiza el árbol tras una edición parseando solo las sentencias de primer nivel
+        que toca; las siguientes solo se desplazan delta líneas"""
+        cuerpo = self._arbol.body
+        tocadas = [i for i, n in enumerate(cuerpo) if n.end_lineno >= inicio and _inicio(n) <= fin]
+        if tocadas:
+            primera, ultima = tocadas[0], tocadas[-1]
+            desde = min(inicio, _inicio(cuerpo[primera]))
+            hasta = max(fin, cuerpo[ultima].end_lineno) + delta
+        else:
+            # Inserción entre dos sentencias
+            primera = next((i for i, n in enumerate(cuerpo) if _inicio(n) > fin), len(cuerpo))
+            ultima = primera - 1
+            desde, hasta = inicio, fin + delta
+        nuevos = ast.parse("".join(self._lineas[desde - 1:hasta]), filename=str(self.ruta)).body
+        for nodo in nuevos:
+            ast.increment_lineno(nodo, desde - 1)
+        if delta:
+            for nodo in cuerpo[ultima + 1:]:
+                ast.increment_lineno(nodo, delta)
+        cuerpo[primera:ultima + 1] = nuevos
+
+    # Clases
+
+    def clase(self, nombre: str) -> Optional[str]:
+        rango = self.simbolos.clases.get(nombre)
+        return "".join(self._lineas[rango[0] - 1:rango[1]]) if rango else None
+
+    def reemplazar_clase(self, nombre: str, codigo: str):
+        """Sustituye la clase o la añade al final si no existe"""
+        rango = self.simbolos.clases.get(nombre)
+        if rango:
+            self._sustituir(rango[0], rango[1], codigo)
+        else:
+            self.anadir_al_final(codigo)
+
+    def anadir_al_final(self, codigo: str):
+        """Añade código tras el último contenido del archivo, separado por una línea en blanco"""
+        while self._lineas and not self._lineas[-1].strip():
+            self._lineas.pop()
+        separacion = "\n" if self._lineas else ""
+        self._sustituir(len(self._lineas) + 1, len(self._lineas), separacion + codigo)
+
+    # Imports
+
+    def tiene_import(self, modulo: str, nombre: str) -> bool:
+        return any(
+            _modulo(i) == modulo and any(a.name in (nombre, "*") for a in i.names)
+            for i in self.simbolos.imports
+        )
+
+    def asegurar_import(self, modulo: str, nombre: str) -> bool:
+        """from <modulo> import <nombre>; se añade al import existente del módulo si lo hay"""
+        if self.tiene_import(modulo, nombre):
+            return False
+        existente = next((i for i in self.simbolos.imports if _modulo(i) == modulo), None)
+        if existente is not None and existente.lineno == existente.end_lineno:
+            linea = self._lineas[existente.lineno - 1]
+            fin = _columna(linea, existente.end_col_offset)
+            if linea[:fin].endswith(")"):
+                fin -= 1
+            self._sustituir(existente.lineno, existente.lineno, f"{linea[:fin]}, {nombre}{linea[fin:]}")
+        else:
+            posicion = existente.end_lineno if existente is not None else self.simbolos.ultima_importacion
+            self._sustituir(posicion + 1, posicion, f"from {modulo} import {nombre}\n")
+        return True
+
+    # admin.site.register
+
+    def asegurar_registro_admin(self, modelo: str) -> bool:
+        if modelo in self.simbolos.registros:
+            return False
+        self.anadir_al_final(f"admin.site.register({modelo})\n")
+        return True
+
+    # Listas (INSTALLED_APPS, urlpatterns...)
+
+    def en_lista(self, variable: str, codigo: str) -> bool:
+        lista = self.simbolos.listas.get(variable)
+        return lista is not None and any(_misma_expresion(e, codigo) for e in lista.elts)
+
+    def anadir_a_lista(self, variable: str, codigo: str, despues_de: Optional[str] = None) -> bool:
+        """Añade el elemento a la lista (tras despues_de si está; si no, al final). False si ya estaba"""
+        lista = self.simbolos.listas.get(variable)
+        if lista is None:
+            raise KeyError(f"{variable} no está definida como lista en {self.ruta.name}")
+        return self.anadir_a_nodo_lista(lista, codigo, despues_de)
+
+    def anadir_a_nodo_lista(self, lista: ast.List, codigo: str, despues_de: Optional[str] = None) -> bool:
+        """Como anadir_a_lista, para una lista anidada (p.ej. DIRS dentro de TEMPLATES)"""
+        if any(_misma_expresion(e, codigo) for e in lista.elts):
+            return False
+
+        anterior = None
+        if despues_de is not None:
+            anterior = next((e for e in lista.elts if _misma_expresion(e, despues_de)), None)
+        if anterior is None and lista.elts:
+            anterior = lista.elts[-1]
+
+        if lista.lineno == lista.end_lineno or (anterior is not None and anterior.end_lineno == lista.end_lineno):
+            # El corchete de cierre va en la misma línea: se inserta dentro de ella
+            linea = self._lineas[lista.end_lineno - 1]
+            if anterior is None:
+                columna = _columna(linea, lista.end_col_offset) - 1
+                nueva = f"{linea[:columna]}{codigo}{linea[columna:]}"
+            else:
+                columna = _columna(linea, anterior.end_col_offset)
+                nueva = f"{linea[:columna]}, {codigo}{linea[columna:]}"
+            self._sustituir(lista.end_lineno, lista.end_lineno, nueva)
+            return True
+
+        if anterior is None:
+            # Lista vacía en varias líneas: antes del corchete de cierre
+            primera = self._lineas[lista.lineno - 1]
+            sangria = primera[:len(primera) - len(primera.lstrip())] + "    "
+            self._sustituir(lista.end_lineno, lista.end_lineno - 1, f"{sangria}{codigo},\n")
+            return True
+
+        # Tras el elemento anterior, con su sangría; si no llevaba coma se le añade
+        linea = self._lineas[anterior.end_lineno - 1]
+        columna = _columna(linea, anterior.end_col_offset)
+        if not linea[columna:].lstrip().startswith(","):
+            self._sustituir(anterior.end_lineno, anterior.end_lineno, linea[:columna] + "," + linea[columna:])
+        primera = self._lineas[anterior.lineno - 1]
+        sangria = primera[:len(primera) - len(primera.lstrip())]
+        self._sustituir(anterior.end_lineno + 1, anterior.end_lineno, f"{sangria}{codigo},\n")
+        return True
+
+    def guardar(self) -> bool:
+        """Escribe el archivo si hubo cambios (y el texto no quedó igual). Devuelve si se escribió"""
+        if not self.modificado:
+            return False
+        escrito = escribir_si_cambia(self.ruta, self.texto)
+        self.modificado = False
+        if preparacion_activa() is None:
+            _recordar(self)
+        else:
+            # Todavía no está en disco: no se puede cachear con la firma del archivo
+            with _cache_lock:
+                _cache.pop(str(self.ruta), None)
+        return escrito
+
+
+# Archivos ya parseados: ruta -> (mtime_ns, tamaño, archivo)
+_cache: Dict[str, Tuple[int, int, ArchivoFuente]] = {}
+_cache_lock = threading.Lock()
+
+
+def _firma(ruta: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(ruta)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _recordar(archivo: ArchivoFuente):
+    firma = _firma(archivo.ruta)
+    with _cache_lock:
+        if firma is None:
+            _cache.pop(str(archivo.ruta), None)
+        else:
+            _cache[str(archivo.ruta)] = (*firma, archivo)
+
+
+def abrir(ruta: Path, por_defecto: str = "") -> ArchivoFuente:
+    """El archivo parseado; si no cambió en disco desde la última vez se reutiliza el parseo.
+
+    Un archivo que no existe se abre con el contenido por_defecto (se crea al guardar).
+    """
+    ruta = Path(ruta).resolve()
+    preparacion = preparacion_activa()
+    if preparacion is not None and preparacion.contiene(ruta):
+        return ArchivoFuente(ruta, preparacion.leer(ruta))
+    firma = _firma(ruta)
+    with _cache_lock:
+        entrada = _cache.get(str(ruta))
+    if firma is not None and entrada is not None and entrada[:2] == firma and not entrada[2].modificado:
+        return entrada[2]
+
+    if firma is None:
+        archivo = ArchivoFuente(ruta, por_defecto)
+        archivo.modificado = bool(por_defecto)
+        return archivo
+    archivo = ArchivoFuente(ruta, ruta.read_text(encoding="utf-8"))
+    with _cache_lock:
+        _cache[str(ruta)] = (*firma, archivo)
+    return archivo
+
+
+def registrar_en_installed_apps(settings_path: Path, modulo_app: str) -> bool:
+    """Añade 'apps.x' a INSTALLED_APPS tras la última app del proyecto (o tras staticfiles)"""
+    settings = abrir(settings_path)
+    lista = settings.simbolos.listas.get("INSTALLED_APPS")
+    if lista is None:
+        return False
+    propias = [
+        e for e in lista.elts
+        if isinstance(e, ast.Constant) and isinstance(e.value, str) and e.value.startswith("apps.")
+    ]
+    despues_de = repr(propias[-1].value) if propias else "'django.contrib.staticfiles'"
+    settings.anadir_a_lista("INSTALLED_APPS", repr(modulo_app), despues_de=despues_de)
+    return settings.guardar()
+
+
+def _dirs_de_templates(settings: ArchivoFuente) -> Optional[ast.List]:
+    """La lista DIRS del motor DjangoTemplates de TEMPLATES (None si no está escrita como lista)"""
+    motores = settings.simbolos.listas.get("TEMPLATES")
+    if motores is None:
+        return None
+    for motor in motores.elts:
+        if not isinstance(motor, ast.Dict):
+            continue
+        claves = {k.value: v for k, v in zip(motor.keys, motor.values) if isinstance(k, ast.Constant)}
+        backend = claves.get("BACKEND")
+        if isinstance(backend, ast.Constant) and backend.value == "django.template.backends.django.DjangoTemplates":
+            dirs = claves.get("DIRS")
+            return dirs if isinstance(dirs, ast.List) else None
+    return None
+
+
+def registrar_dir_de_templates(settings_path: Path, directorio: str = "BASE_DIR / 'templates'") -> bool:
+    """Añade el directorio (una expresión, no una ruta) a DIRS de TEMPLATES si no estaba"""
+    settings = abrir(settings_path)
+    dirs = _dirs_de_templates(settings)
+    if dirs is None:
+        return False
+    settings.anadir_a_nodo_lista(dirs, directorio)
+    return settings.guardar()
@@ -0,0 +1,73 @@
+# core/entorno_capas.py
+import asyncio
+import os
+import stat
+from pathlib import Path
+from typing import Callable, Optional
+
+from core.pip_progreso import ProgresoPip
+from core.plantilla_entorno import PlantillaEntorno
+
+# Nombre del .pth que conecta el entorno del proyecto con el entorno base
+NOMBRE_PTH = "_automatizador_base.pth"
+
+
+def site_packages_de(ruta_entorno: Path) -> Path:
+    ruta_entorno = Path(ruta_entorno)
+    if os.name == "nt":
+        return ruta_entorno / "Lib" / "site-packages"
+    candidatos = sorted(ruta_entorno.glob("lib/python*/site-packages"))
+    if not candidatos:
+        raise FileNotFoundError(f"No se encontró site-packages en {ruta_entorno}")
+    return candidatos[0]
+
+
+def _proteger_solo_lectura(ruta: Path):
+    """Quita permisos de escritura a los archivos del entorno base"""
+    if os.name == "nt":
+        return  # En Windows un archivo de solo lectura no se puede desinstalar después
+    for raiz, _, archivos in os.walk(ruta):
+        for nombre in archivos:
+            archivo = Path(raiz) / nombre
+            if archivo.is_symlink():
+                continue
+            modo = archivo.stat().st_mode
+            os.chmod(archivo, modo & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+class EntornoBase(PlantillaEntorno):
+    """Entorno de solo lectura por versión de Django con los paquetes pesados compartidos"""
+
+    SUBDIRECTORIO = "bases"
+
+    async def asegurar(self, progreso: Optional[Callable[[ProgresoPip], None]] = None) -> Path:
+        nueva = not self.existe()
+        ruta = await super().asegurar(progreso)
+        if nueva:
+            # pip ya dejó compilados los .pyc; a partir de aquí nadie debe escribir en la base
+            await asyncio.to_thread(_proteger_solo_lectura, ruta)
+        return ruta
+
+
+async def crear_entorno_en_capas(destino: Path, base: EntornoBase,
+                                 progreso: Optional[Callable[[ProgresoPip], None]] = None) -> Path:
+    """Crea un venv mínimo cuyo site-packages extiende el del entorno base mediante un .pth"""
+    ruta_base = await base.asegurar(progreso)
+    destino = Path(destino)
+
+    # Sin pip propio: pip y Django se resuelven desde la base a través del .pth
+    proc = await asyncio.create_subprocess_exec(
+        base.interprete, "-m", "venv", "--without-pip", str(destino),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    _, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"No se pudo crear el entorno en capas: {stderr.decode(errors='replace')}")
+
+    # Las líneas del .pth se añaden al final de sys.path: los extras del proyecto
+    # instalados en su propio site-packages tienen prioridad sobre la base
+    pth = site_packages_de(destino) / NOMBRE_PTH
+    with open(pth, "w", encoding="utf-8") as f:
+        f.write(str(site_packages_de(ruta_base)) + "\n")
+    return destino
@@ -0,0 +1,338 @@
+# core/escritura.py
+#
+# Salida de todo lo que genera el automatizador (views, forms, urls, plantillas, settings...).
+# Un archivo solo se reescribe si su contenido cambia: el autoreloader de runserver compara
+# mtimes, así que reescribir un .py idéntico reinicia el servidor igualmente. Con preparar()
+# lo que genera una operación se acumula en memoria, se valida junto y se escribe de una vez.
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class EstadisticasEscritura:
+    escritas: int = 0
+    omitidas: int = 0
+    # .py que no se reescribieron: cada uno habría podido reiniciar runserver
+    # (un cambio en una plantilla solo limpia la caché de plantillas)
+    recargas_evitadas: int = 0
+
+    def informe(self) -> str:
+        return (f"{self.escritas} archivos escritos, {self.omitidas} sin cambios "
+                f"({self.recargas_evitadas} recargas de runserver evitadas)")
+
+
+# Totales desde que arrancó el automatizador
+estadisticas = EstadisticasEscritura()
+_candado = threading.Lock()
+
+# Lo último escrito o comparado: ruta -> (mtime_ns, tamaño, sha256). Si el archivo no ha
+# cambiado en disco desde entonces no hace falta volver a leerlo para compararlo
+_huellas: Dict[str, Tuple[int, int, str]] = {}
+
+
+def _bytes(contenido: str) -> bytes:
+    # Lo mismo que escribiría open(ruta, "w", encoding="utf-8")
+    if os.linesep != "\n":
+        contenido = contenido.replace("\n", os.linesep)
+    return contenido.encode("utf-8")
+
+
+def _huella_en_disco(ruta: Path) -> Optional[str]:
+    try:
+        info = os.stat(ruta)
+    except OSError:
+        return None
+    clave = str(ruta)
+    with _candado:
+        guardada = _huellas.get(clave)
+    if guardada is not None and guardada[:2] == (info.st_mtime_ns, info.st_size):
+        return guardada[2]
+    huella = hashlib.sha256(ruta.read_bytes()).hexdigest()
+    with _candado:
+        _huellas[clave] = (info.st_mtime_ns, info.st_size, huella)
+    return huella
+
+
+def _contar(ruta: Path, escrita: bool):
+    with _candado:
+        if escrita:
+            estadisticas.escritas += 1
+        else:
+            estadisticas.omitidas += 1
+            if ruta.suffix == ".py":
+                estadisticas.recargas_evitadas += 1
+
+
+def _recordar_huella(ruta: Path, huella: str):
+    info = os.stat(ruta)
+    with _candado:
+        _huellas[str(ruta)] = (info.st_mtime_ns, info.st_size, huella)
+
+
+def escribir_si_cambia(ruta: Path, contenido: str) -> bool:
+    """Escribe contenido en ruta (creando las carpetas) salvo que ya tenga exactamente eso.
+    Devuelve si se escribió.
+
+    Dentro de preparar() no se toca el disco: el archivo queda en la preparación y devuelve
+    si su contenido difiere de lo que hay ahora.
+    """
+    ruta = Path(os.path.abspath(ruta))
+    preparacion = preparacion_activa()
+    if preparacion is not None:
+        return preparacion.escribir(ruta, contenido)
+
+    datos = _bytes(contenido)
+    huella = hashlib.sha256(datos).hexdigest()
+    if _huella_en_disco(ruta) == huella:
+        _contar(ruta, False)
+        return False
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    with open(ruta, "wb") as f:
+        f.write(datos)
+    _recordar_huella(ruta, huella)
+    _contar(ruta, True)
+    return True
+
+
+def crear_si_falta(ruta: Path, contenido: str = "") -> bool:
+    """Como touch() (o un archivo inicial), sin tocar uno que ya exista"""
+    if existe(ruta):
+        return False
+    return escribir_si_cambia(ruta, contenido)
+
+
+def existe(ruta: Path) -> bool:
+    """Si el archivo existe en disco o en la preparación en curso"""
+    preparacion = preparacion_activa()
+    if preparacion is not None and preparacion.contiene(ruta):
+        return True
+    return Path(ruta).exists()
+
+
+def leer_texto(ruta: Path) -> str:
+    """Contenido actual del archivo, contando lo que haya escrito la preparación en curso"""
+    preparacion = preparacion_activa()
+    if preparacion is not None and preparacion.contiene(ruta):
+        return preparacion.leer(ruta)
+    return Path(ruta).read_text(encoding="utf-8")
+
+
+class ErrorPreparacion(Exception):
+    """Lo generado no compila o no se puede importar; no se ha escrito nada"""
+
+    def __init__(self, errores: List[str]):
+        super().__init__("\n".join(errores))
+        self.errores = errores
+
+
+class Preparacion:
+    """Archivos generados por una operación, en memoria hasta confirmar() (todo o nada).
+    Los que Django necesita leer antes (modelos, migraciones) se vuelcan con volcar() y
+    descartar() los devuelve a su estado anterior"""
+
+    def __init__(self):
+        self.archivos: Dict[Path, str] = {}
+        # Lo que ya se volcó a disco antes de confirmar: ruta -> bytes anteriores (None: no existía)
+        self.volcados: List[Tuple[Path, Optional[bytes]]] = []
+
+    @staticmethod
+    def _clave(ruta: Path) -> Path:
+        # Sin symlinks: el editor de fuentes abre los archivos por su ruta resuelta
+        return Path(os.path.realpath(ruta))
+
+    def escribir(self, ruta: Path, contenido: str) -> bool:
+        ruta = self._clave(ruta)
+        try:
+            cambia = contenido != self.leer(ruta)
+        except (OSError, UnicodeDecodeError):
+            cambia = True
+        self.archivos[ruta] = contenido
+        return cambia
+
+    def contiene(self, ruta: Path) -> bool:
+        return self._clave(ruta) in self.archivos
+
+    def leer(self, ruta: Path) -> str:
+        ruta = self._clave(ruta)
+        if ruta in self.archivos:
+            return self.archivos[ruta]
+        return ruta.read_text(encoding="utf-8")
+
+    def marca(self) -> Dict[Path, str]:
+        """Estado actual, para deshacer solo una parte con volver_a()"""
+        return dict(self.archivos)
+
+    def volver_a(self, marca: Dict[Path, str]):
+        self.archivos = dict(marca)
+
+    def errores_compilacion(self) -> List[str]:
+        errores = []
+        for ruta, contenido in self.archivos.items():
+            if ruta.suffix != ".py":
+                continue
+            try:
+                compile(contenido, str(ruta), "exec")
+            except SyntaxError as e:
+                errores.append(f"{ruta.name}:{e.lineno}: {e.msg}")
+        return errores
+
+    def validar(self, venv_python: Optional[str] = None, project_path: Optional[Path] = None):
+        """Compila los .py y, con el worker del proyecto, importa los módulos y compila las
+        plantillas tal como quedarían. Lanza ErrorPreparacion con todos los fallos"""
+        errores = self.errores_compilacion()
+        if not errores and venv_python and project_path:
+            errores = self._errores_importacion(venv_python, Path(project_path))
+        if errores:
+            raise ErrorPreparacion(errores)
+
+    def _errores_importacion(self, venv_python: str, project_path: Path) -> List[str]:
+        # Importación diferida: django_worker depende de core.layout_proyecto, no de este módulo
+        from core.django_worker import ejecutar_en_proyecto
+
+        raiz = Path(os.path.realpath(project_path))
+        modulos, plantillas = {}, {}
+        for ruta, contenido in self.archivos.items():
+            try:
+                relativa = ruta.relative_to(raiz)
+            except ValueError:
+                continue
+            if ruta.suffix == ".py":
+                modulos[str(relativa)] = contenido
+            elif ruta.suffix == ".html":
+                plantillas[str(relativa)] = contenido
+        if not modulos and not plantillas:
+            return []
+        resultado = ejecutar_en_proyecto(
+            venv_python, str(raiz), "verificar_fuentes", modulos=modulos, plantillas=plantillas
+        )
+        if not resultado["ok"]:
+            # Sin worker (manage.py de respaldo) no hay comprobación de importación
+            print(f"No se pudo comprobar la importación de lo generado: {resultado.get('error')}")
+            return []
+        return resultado.get("datos", {}).get("errores", [])
+
+    def _escribir(self, rutas: List[Path]) -> List[Tuple[Path, Optional[bytes]]]:
+        """Escribe esos archivos preparados que cambian: primero todos a temporales junto a su
+        destino y luego un os.replace por archivo seguido. Si un replace falla se restauran los
+        anteriores. Devuelve (ruta, contenido anterior) de cada archivo escrito"""
+        pendientes = []
+        try:
+            for ruta in rutas:
+                datos = _bytes(self.archivos[ruta])
+                huella = hashlib.sha256(datos).hexdigest()
+                if _huella_en_disco(ruta) == huella:
+                    _contar(ruta, False)
+                    continue
+                ruta.parent.mkdir(parents=True, exist_ok=True)
+                descriptor, temporal = tempfile.mkstemp(prefix=f".{ruta.name}.", suffix=".tmp", dir=ruta.parent)
+                with os.fdopen(descriptor, "wb") as f:
+                    f.write(datos)
+                anterior = ruta.read_bytes() if ruta.exists() else None
+                pendientes.append((ruta, temporal, huella, anterior))
+        except BaseException:
+            for _, temporal, _, _ in pendientes:
+                os.unlink(temporal)
+            raise
+
+        hechos = []
+        try:
+            for ruta, temporal, huella, anterior in pendientes:
+                os.replace(temporal, ruta)
+                hechos.append((ruta, anterior))
+                _recordar_huella(ruta, huella)
+                _contar(ruta, True)
+        except BaseException:
+            _restaurar(hechos)
+            for _, temporal, _, _ in pendientes[len(hechos):]:
+                if os.path.exists(temporal):
+                    os.unlink(temporal)
+            raise
+        return hechos
+
+    def volcar(self, rutas: List[Path]):
+        """Escribe ya esos archivos (los que Django tiene que leer del disco, como models.py o
+        las migraciones) sin salir de la preparación: descartar() los deja como estaban"""
+        rutas = [r for r in dict.fromkeys(self._clave(r) for r in rutas) if r in self.archivos]
+        self.volcados.extend(self._escribir(rutas))
+        for ruta in rutas:
+            del self.archivos[ruta]
+
+    def anotar_creado(self, ruta: Path):
+        """Archivo creado fuera de la preparación (makemigrations) que descartar() tiene que borrar"""
+        self.volcados.append((self._clave(ruta), None))
+
+    def confirmar(self):
+        """Escribe de una vez todo lo que queda en memoria"""
+        try:
+            self._escribir(list(self.archivos))
+        except BaseException:
+            self.descartar()
+            raise
+        self.archivos.clear()
+        self.volcados.clear()
+
+    def descartar(self):
+        """Olvida lo que está en memoria y deshace lo que ya se volcó a disco"""
+        self.archivos.clear()
+        volcados, self.volcados = self.volcados, []
+        _restaurar(volcados)
+
+
+def _restaurar(escritos: List[Tuple[Path, Optional[bytes]]]):
+    """Deja los archivos como estaban, del último escrito al primero"""
+    for ruta, anterior in reversed(escritos):
+        if anterior is None:
+            if ruta.exists():
+                ruta.unlink()
+            continue
+        ruta.write_bytes(anterior)
+        _recordar_huella(ruta, hashlib.sha256(anterior).hexdigest())
+
+
+_local = threading.local()
+
+
+def preparacion_activa() -> Optional[Preparacion]:
+    return getattr(_local, "preparacion", None)
+
+
+@contextmanager
+def preparar():
+    """Todo lo que se escriba en el bloque (en este hilo) se guarda en una Preparacion.
+    Al salir sin error se confirma de una vez; con una excepción se descarta entero"""
+    if preparacion_activa() is not None:
+        # Anidada: forma parte de la preparación exterior
+        yield preparacion_activa()
+        return
+    preparacion = Preparacion()
+    _local.preparacion = preparacion
+    try:
+        yield preparacion
+    except BaseException:
+        preparacion.descartar()
+        raise
+    finally:
+        _local.preparacion = None
+    preparacion.confirmar()
+
+
+@contextmanager
+def contar_escrituras():
+    """Estadísticas de lo escrito dentro del bloque (se rellenan al salir)"""
+    with _candado:
+        antes = replace(estadisticas)
+    parcial = EstadisticasEscritura()
+    try:
+        yield parcial
+    finally:
+        with _candado:
+            parcial.escritas = estadisticas.escritas - antes.escritas
+            parcial.omitidas = estadisticas.omitidas - antes.omitidas
+            parcial.recargas_evitadas = estadisticas.recargas_evitadas - antes.recargas_evitadas
@@ -0,0 +1,280 @@
+# core/esqueleto_proyecto.py
+import keyword
+import secrets
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.layout_proyecto import invalidar_layout
+
+# Versión que se asume cuando no se sabe cuál instalará pip
+VERSION_DJANGO_POR_DEFECTO = "5.2"
+
+# Paquetes de nivel superior que tendrá el venv del proyecto (Django, sus dependencias y los
+# drivers); startproject rechaza un nombre que ya sea importable allí
+MODULOS_DEL_ENTORNO = {"django", "asgiref", "sqlparse", "tzdata", "psycopg", "psycopg_pool", "pip"}
+
+_CARACTERES_SECRET_KEY = "abcdefghijklmnopqrstuvwxyz0123456789!@#$%^&*(-_=+)"
+
+_MANAGE_PY = '''#!/usr/bin/env python
+"""Django's command-line utility for administrative tasks."""
+import os
+import sys
+
+
+def main():
+    """Run administrative tasks."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', '{project_name}.settings')
+    try:
+        from django.core.management import execute_from_command_line
+    except ImportError as exc:
+        raise ImportError(
+            "Couldn't import Django. Are you sure it's installed and "
+            "available on your PYTHONPATH environment variable? Did you "
+            "forget to activate a virtual environment?"
+        ) from exc
+    execute_from_command_line(sys.argv)
+
+
+if __name__ == '__main__':
+    main()
+'''
+
+_SETTINGS_PY = '''"""
+Django settings for {project_name} project.
+
+Generated by 'django-admin startproject' using Django {django_version}.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/{docs_version}/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/{docs_version}/ref/settings/
+"""
+
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/{docs_version}/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = '{secret_key}'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = []
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = '{project_name}.urls'
+
+TEMPLATES = [
+    {{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {{
+            'context_processors': [
+{context_processors}            ],
+        }},
+    }},
+]
+
+WSGI_APPLICATION = '{project_name}.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/{docs_version}/ref/settings/#databases
+
+DATABASES = {{
+    'default': {{
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }}
+}}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/{docs_version}/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {{
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    }},
+    {{
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    }},
+    {{
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    }},
+    {{
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    }},
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/{docs_version}/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/{docs_version}/howto/static-files/
+
+STATIC_URL = 'static/'
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/{docs_version}/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+'''
+
+_URLS_PY = '''"""
+URL configuration for {project_name} project.
+
+The `urlpatterns` list routes URLs to views. For more information please see:
+    https://docs.djangoproject.com/en/{docs_version}/topics/http/urls/
+Examples:
+Function views
+    1. Add an import:  from my_app import views
+    2. Add a URL to urlpatterns:  path('', views.home, name='home')
+Class-based views
+    1. Add an import:  from other_app.views import Home
+    2. Add a URL to urlpatterns:  path('', Home.as_view(), name='home')
+Including another URLconf
+    1. Import the include() function: from django.urls import include, path
+    2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
+"""
+from django.contrib import admin
+from django.urls import path
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+]
+'''
+
+_SERVIDOR_PY = '''"""
+{nombre_mayus} config for {project_name} project.
+
+It exposes the {nombre_mayus} callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/{docs_version}/howto/deployment/{nombre}/
+"""
+
+import os
+
+from django.core.{nombre} import get_{nombre}_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', '{project_name}.settings')
+
+application = get_{nombre}_application()
+'''
+
+
+def _version_tupla(version: str):
+    partes = []
+    for parte in version.split("."):
+        digitos = "".join(c for c in parte if c.isdigit())
+        partes.append(int(digitos) if digitos else 0)
+    return tuple(partes)
+
+
+def validar_nombre_proyecto(nombre_proyecto: str):
+    """Mismas comprobaciones que hace startproject antes de crear nada.
+
+    startproject busca el nombre entre los módulos importables del venv; aquí se ejecuta en el
+    proceso del automatizador (sus módulos y dependencias no cuentan), así que se comprueban
+    la biblioteca estándar y lo que se instala en el venv.
+    """
+    if not nombre_proyecto.isidentifier() or keyword.iskeyword(nombre_proyecto):
+        raise ValueError(f"'{nombre_proyecto}' is not a valid project name. Please make sure the name is a valid identifier.")
+    if nombre_proyecto in MODULOS_DEL_ENTORNO or nombre_proyecto in sys.stdlib_module_names:
+        raise ValueError(
+            f"'{nombre_proyecto}' conflicts with the name of an existing Python module and "
+            "cannot be used as a project name. Please try another name."
+        )
+
+
+def contenido_esqueleto(nombre_proyecto: str, version_django: Optional[str] = None) -> Dict[str, str]:
+    """Archivos (ruta relativa -> contenido) que emitiría startproject para esa versión"""
+    version_django = version_django or VERSION_DJANGO_POR_DEFECTO
+    version = _version_tupla(version_django)
+    docs_version = f"{version[0]}.{version[1] if len(version) > 1 else 0}"
+
+    context_processors = [
+        'django.template.context_processors.request',
+        'django.contrib.auth.context_processors.auth',
+        'django.contrib.messages.context_processors.messages',
+    ]
+    # Django 5.1 quitó el context processor "debug" de la plantilla de proyecto
+    if version < (5, 1):
+        context_processors.insert(0, 'django.template.context_processors.debug')
+
+    valores = {
+        "project_name": nombre_proyecto,
+        "django_version": version_django,
+        "docs_version": docs_version,
+        "secret_key": "django-insecure-" + "".join(secrets.choice(_CARACTERES_SECRET_KEY) for _ in range(50)),
+        "context_processors": "".join(f"                '{cp}',\n" for cp in context_processors),
+    }
+
+    return {
+        "manage.py": _MANAGE_PY.format(**valores),
+        f"{nombre_proyecto}/__init__.py": "",
+        f"{nombre_proyecto}/settings.py": _SETTINGS_PY.format(**valores),
+        f"{nombre_proyecto}/urls.py": _URLS_PY.format(**valores),
+        f"{nombre_proyecto}/wsgi.py": _SERVIDOR_PY.format(nombre="wsgi", nombre_mayus="WSGI", **valores),
+        f"{nombre_proyecto}/asgi.py": _SERVIDOR_PY.format(nombre="asgi", nombre_mayus="ASGI", **valores),
+    }
+
+
+def generar_esqueleto(ruta_base: str, nombre_proyecto: str, version_django: Optional[str] = None) -> Path:
+    """Equivalente en proceso a 'python -m django startproject nombre_proyecto' en ruta_base"""
+    validar_nombre_proyecto(nombre_proyecto)
+
+    destino = Path(ruta_base) / nombre_proyecto
+    if destino.exists() and any(destino.iterdir()):
+        raise FileExistsError(f"'{destino}' already exists")
+
+    for relativa, contenido in contenido_esqueleto(nombre_proyecto, version_django).items():
+        archivo = destino / relativa
+        archivo.parent.mkdir(parents=True, exist_ok=True)
+        with open(archivo, "w", encoding="utf-8") as f:
+            f.write(contenido)
+
+    (destino / "manage.py").chmod(0o755)
+    invalidar_layout(destino)
+    return destino
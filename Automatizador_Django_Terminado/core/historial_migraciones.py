@@ -0,0 +1,117 @@
+# core/historial_migraciones.py
+#
+# Historial de las migraciones aplicadas por el automatizador: tiempo de cada una, el SQL
+# que ejecutó (lo captura el worker) y avisos de las sentencias que en una base de datos
+# grande de producción bloquean la tabla o la recorren entera.
+import datetime
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.plan_migraciones import DIR_ESTADO
+
+ARCHIVO_HISTORIAL = "historial_migraciones.json"
+MAX_ENTRADAS = 500
+
+# Una migración que tarda más que esto en local será peor con datos reales
+SEGUNDOS_LENTA = 1.0
+
+# (motores, patrón, aviso); None = cualquier motor. Se comprueban sobre el SQL en mayúsculas
+REGLAS_BLOQUEO = [
+    ({"postgresql"}, r"^CREATE (UNIQUE )?INDEX (?!CONCURRENTLY)",
+     "CREATE INDEX sin CONCURRENTLY: bloquea las escrituras en la tabla mientras se construye"),
+    ({"postgresql"}, r"ALTER COLUMN \S+ (SET DATA )?TYPE ",
+     "Cambio de tipo: puede reescribir la tabla con un bloqueo ACCESS EXCLUSIVE (ampliar un varchar no)"),
+    ({"postgresql"}, r"ALTER COLUMN \S+ SET NOT NULL",
+     "SET NOT NULL: recorre la tabla entera con un bloqueo ACCESS EXCLUSIVE"),
+    ({"postgresql"}, r"ADD CONSTRAINT \S+ FOREIGN KEY (?!.*NOT VALID)",
+     "FOREIGN KEY sin NOT VALID: valida todas las filas bloqueando las dos tablas"),
+    ({"postgresql"}, r"ADD CONSTRAINT \S+ (UNIQUE|CHECK) ",
+     "UNIQUE/CHECK: valida la tabla entera bajo bloqueo"),
+    (None, r"^(UPDATE|DELETE FROM) (?!.*\bWHERE\b)",
+     "UPDATE/DELETE sin WHERE: toca todas las filas en una sola transacción"),
+    (None, r"^DROP TABLE |DROP COLUMN ",
+     "Borra datos: el código desplegado puede seguir usándolos hasta que se actualice"),
+    ({"sqlite"}, r'^CREATE TABLE "NEW__',
+     "SQLite reconstruye la tabla: copia todas sus filas"),
+]
+
+_TABLA_CREADA = re.compile(r'^CREATE TABLE "([^"]+)"', re.IGNORECASE)
+_TABLA_AFECTADA = re.compile(r'^(?:ALTER TABLE|UPDATE|DELETE FROM|INSERT INTO|CREATE (?:UNIQUE )?INDEX \S+ ON) "([^"]+)"', re.IGNORECASE)
+_TABLA_BORRADA = re.compile(r'^DROP TABLE "([^"]+)"', re.IGNORECASE)
+
+
+def _ruta(project_dir: Path) -> Path:
+    return Path(project_dir) / DIR_ESTADO / ARCHIVO_HISTORIAL
+
+
+def avisos_sentencia(sql: str, motor: str) -> List[str]:
+    texto = " ".join(sql.split()).upper()
+    return [
+        aviso for motores, patron, aviso in REGLAS_BLOQUEO
+        if (motores is None or motor in motores) and re.search(patron, texto)
+    ]
+
+
+def analizar_migracion(migracion: Dict, motor: str) -> Dict:
+    """Añade "avisos" a cada sentencia y a la migración.
+
+    Las tablas creadas en la propia migración están vacías: lo que se haga sobre ellas no bloquea nada.
+    En la reconstrucción de SQLite (new__tabla) el DROP de la tabla original no pierde datos.
+    """
+    nuevas, reconstruidas = set(), set()
+    for sentencia in migracion.get("sentencias", []):
+        creada = _TABLA_CREADA.match(sentencia["sql"].strip())
+        if creada and creada.group(1).lower().startswith("new__"):
+            reconstruidas.add(creada.group(1)[len("new__"):])
+        elif creada:
+            nuevas.add(creada.group(1))
+
+    avisos = []
+    for sentencia in migracion.get("sentencias", []):
+        afectada = _TABLA_AFECTADA.match(sentencia["sql"].strip())
+        borrada = _TABLA_BORRADA.match(sentencia["sql"].strip())
+        if (afectada and afectada.group(1) in nuevas) or (borrada and borrada.group(1) in reconstruidas):
+            sentencia["avisos"] = []
+            continue
+        sentencia["avisos"] = avisos_sentencia(sentencia["sql"], motor)
+        avisos.extend(a for a in sentencia["avisos"] if a not in avisos)
+    if migracion.get("segundos", 0) >= SEGUNDOS_LENTA:
+        avisos.insert(0, f"Lenta: {migracion['segundos']:.1f}s")
+    migracion["avisos"] = avisos
+    return migracion
+
+
+def registrar_historial(project_dir: Path, datos: Optional[Dict]) -> List[Dict]:
+    """Guarda las migraciones de una orden migrate del worker ({"motor", "migraciones"}) y las devuelve"""
+    if not datos or not datos.get("migraciones"):
+        return []
+    motor = datos.get("motor", "")
+    fecha = datetime.datetime.now().isoformat(timespec="seconds")
+    nuevas = [dict(analizar_migracion(m, motor), fecha=fecha, motor=motor) for m in datos["migraciones"]]
+
+    ruta = _ruta(project_dir)
+    historial = (leer_historial(project_dir) + nuevas)[-MAX_ENTRADAS:]
+    ruta.parent.mkdir(exist_ok=True)
+    temporal = ruta.with_suffix(".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(historial, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+    for migracion in nuevas:
+        print(f"  {migracion['app']}.{migracion['migracion']}: {migracion['segundos']:.3f}s, "
+              f"{len(migracion['sentencias'])} sentencias")
+        for aviso in migracion["avisos"]:
+            print(f"    ! {aviso}")
+    return nuevas
+
+
+def leer_historial(project_dir: Path) -> List[Dict]:
+    """Migraciones aplicadas, de la más antigua a la más reciente"""
+    try:
+        with open(_ruta(project_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
@@ -0,0 +1,258 @@
+# core/interpretes.py
+import asyncio
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.esqueleto_proyecto import VERSION_DJANGO_POR_DEFECTO
+from core.lock_dependencias import resolver_lock
+from core.plantilla_entorno import requisito_django
+from core.rutas_cache import obtener_dir_cache
+from core.wheelhouse import Wheelhouse, _parsear_archivo
+
+# Python mínimo de cada serie de Django
+PYTHON_MINIMO_DJANGO = {"4.2": (3, 8), "5.0": (3, 10), "5.1": (3, 10), "5.2": (3, 10), "6.0": (3, 12)}
+
+# El benchmark (y los proyectos por defecto) usan la serie VERSION_DJANGO_POR_DEFECTO: un
+# intérprete es compatible si puede ejecutarla
+VERSION_MINIMA = PYTHON_MINIMO_DJANGO[VERSION_DJANGO_POR_DEFECTO]
+
+# Versiones menores que se buscan en el PATH como pythonX.Y
+_MENORES_BUSCADAS = range(10, 16)
+
+_SCRIPT_INFO = (
+    "import sys, json; "
+    "print(json.dumps([list(sys.version_info[:3]), sys.executable, sys.implementation.name]))"
+)
+
+# Micro-benchmark: importar Django, renderizar una plantilla y crear filas con el ORM en SQLite
+_SCRIPT_BENCHMARK = """
+import json, time
+inicio = time.perf_counter()
+import django
+from django.conf import settings
+settings.configure(
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth'],
+    TEMPLATES=[{'BACKEND': 'django.template.backends.django.DjangoTemplates'}],
+    USE_TZ=True,
+)
+django.setup()
+tiempos = {'importar': time.perf_counter() - inicio}
+
+from django.template import engines
+plantilla = engines['django'].from_string(
+    "{% for i in items %}<li>{{ i.nombre|upper }} {{ i.valor|floatformat:2 }}</li>{% endfor %}"
+)
+items = [{'nombre': f'item{n}', 'valor': n * 1.5} for n in range(200)]
+inicio = time.perf_counter()
+for _ in range(50):
+    plantilla.render({'items': items})
+tiempos['plantilla'] = time.perf_counter() - inicio
+
+from django.core.management import call_command
+from django.contrib.auth.models import Group
+call_command('migrate', run_syncdb=True, verbosity=0)
+inicio = time.perf_counter()
+for n in range(500):
+    Group.objects.create(name=f'grupo{n}')
+tiempos['orm'] = time.perf_counter() - inicio
+print(json.dumps(tiempos))
+"""
+
+
+@dataclass
+class Interprete:
+    ruta: str
+    version: List[int] = field(default_factory=list)
+    implementacion: str = "cpython"
+    tiempos: Dict[str, float] = field(default_factory=dict)
+
+    def compatible(self) -> bool:
+        return tuple(self.version[:2]) >= VERSION_MINIMA
+
+    def total(self) -> Optional[float]:
+        return sum(self.tiempos.values()) if self.tiempos else None
+
+    def version_texto(self) -> str:
+        return ".".join(str(v) for v in self.version)
+
+    def descripcion(self) -> str:
+        texto = f"Python {self.version_texto()}"
+        if self.implementacion != "cpython":
+            texto += f" ({self.implementacion})"
+        if self.total() is not None:
+            texto += f" - {self.total():.2f}s"
+        elif not self.compatible():
+            texto += " - no compatible"
+        return texto
+
+
+def _candidatos() -> List[str]:
+    """Rutas de intérpretes en el PATH (y del lanzador py en Windows), sin duplicados"""
+    nombres = ["python3", "python"] + [f"python3.{menor}" for menor in _MENORES_BUSCADAS]
+    rutas = [sys.executable]
+    rutas.extend(r for r in (shutil.which(n) for n in nombres) if r)
+
+    if os.name == "nt" and shutil.which("py"):
+        resultado = subprocess.run(["py", "-0p"], capture_output=True, text=True)
+        for linea in resultado.stdout.splitlines():
+            match = re.search(r"([A-Za-z]:\\.*python\w*\.exe)\s*$", linea.strip())
+            if match:
+                rutas.append(match.group(1))
+
+    vistos = set()
+    unicos = []
+    for ruta in rutas:
+        try:
+            real = os.path.realpath(ruta)
+        except OSError:
+            continue
+        if real not in vistos:
+            vistos.add(real)
+            unicos.append(ruta)
+    return unicos
+
+
+async def _info_interprete(ruta: str) -> Optional[Interprete]:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            ruta, "-c", _SCRIPT_INFO,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=10)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    if proc.returncode != 0:
+        return None
+    try:
+        version, ejecutable, implementacion = json.loads(stdout.decode().strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        return None
+    # Los venv también aparecen en el PATH; se prefiere la ruta real del intérprete
+    return Interprete(ruta=ejecutable or ruta, version=version, implementacion=implementacion)
+
+
+async def descubrir_interpretes() -> List[Interprete]:
+    """Intérpretes de Python instalados en la máquina (sin benchmark)"""
+    resultados = await asyncio.gather(*(_info_interprete(r) for r in _candidatos()))
+    encontrados: Dict[str, Interprete] = {}
+    for interprete in resultados:
+        if interprete:
+            encontrados.setdefault(os.path.realpath(interprete.ruta), interprete)
+    return sorted(encontrados.values(), key=lambda i: i.version, reverse=True)
+
+
+async def _preparar_django_benchmark() -> Optional[Path]:
+    """Extrae los wheels (puro Python) de Django y sus dependencias en un directorio para PYTHONPATH.
+
+    Django fijado a la serie por defecto: sin fijar, pip resolvería la última versión para el
+    intérprete del automatizador, que puede no funcionar en los demás compatibles.
+    """
+    lock = await resolver_lock(sys.executable, [requisito_django(VERSION_DJANGO_POR_DEFECTO), "typing_extensions"])
+    if not lock:
+        return None
+    destino = obtener_dir_cache("benchmark", lock.digest()[:16])
+    if (destino / ".completa").exists():
+        return destino
+
+    wheelhouse = Wheelhouse(sys.executable)
+    for archivo in wheelhouse.archivos():
+        nombre, version = _parsear_archivo(archivo.name)
+        if archivo.name.endswith(".whl") and nombre in lock.paquetes and lock.paquetes[nombre][0] == version:
+            with zipfile.ZipFile(archivo) as zf:
+                await asyncio.to_thread(zf.extractall, destino)
+    (destino / ".completa").touch()
+    return destino
+
+
+def _ruta_resultados() -> Path:
+    return obtener_dir_cache("interpretes") / "benchmark.json"
+
+
+def _clave_resultado(interprete: Interprete) -> str:
+    ruta = Path(interprete.ruta)
+    try:
+        mtime = int(ruta.stat().st_mtime)
+    except OSError:
+        mtime = 0
+    return f"{os.path.realpath(ruta)}|{interprete.version_texto()}|{mtime}"
+
+
+def _leer_resultados() -> Dict[str, Dict[str, float]]:
+    try:
+        with open(_ruta_resultados(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_resultados(resultados: Dict[str, Dict[str, float]]):
+    ruta = _ruta_resultados()
+    temporal = ruta.with_suffix(".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=2)
+    os.replace(temporal, ruta)
+
+
+async def _ejecutar_benchmark(interprete: Interprete, ruta_django: Path) -> Dict[str, float]:
+    entorno = dict(os.environ)
+    entorno["PYTHONPATH"] = str(ruta_django)
+    entorno.pop("DJANGO_SETTINGS_MODULE", None)
+    tiempos: Dict[str, float] = {}
+    # La primera pasada compila los .pyc (como hará core.precompilar en el proyecto);
+    # se mide la segunda
+    for _ in range(2):
+        proc = await asyncio.create_subprocess_exec(
+            interprete.ruta, "-c", _SCRIPT_BENCHMARK,
+            env=entorno,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            print(f"Benchmark fallido con {interprete.ruta}: {stderr.decode(errors='replace')[-300:]}")
+            return {}
+        try:
+            tiempos = json.loads(stdout.decode().strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            return {}
+    return tiempos
+
+
+async def evaluar_interpretes(forzar: bool = False) -> List[Interprete]:
+    """Descubre los intérpretes y ejecuta el micro-benchmark en los compatibles (con caché)"""
+    interpretes = await descubrir_interpretes()
+    resultados = {} if forzar else _leer_resultados()
+
+    pendientes = [i for i in interpretes if i.compatible() and _clave_resultado(i) not in resultados]
+    ruta_django = await _preparar_django_benchmark() if pendientes else None
+    # Uno detrás de otro: en paralelo se estorbarían y los tiempos no serían comparables
+    for interprete in pendientes:
+        if ruta_django is None:
+            break
+        tiempos = await _ejecutar_benchmark(interprete, ruta_django)
+        if tiempos:
+            resultados[_clave_resultado(interprete)] = tiempos
+    _guardar_resultados(resultados)
+
+    for interprete in interpretes:
+        interprete.tiempos = resultados.get(_clave_resultado(interprete), {})
+    return interpretes
+
+
+def mejor_interprete(interpretes: List[Interprete]) -> Optional[Interprete]:
+    """El compatible más rápido; si no hay medidas, la versión más nueva compatible"""
+    compatibles = [i for i in interpretes if i.compatible()]
+    medidos = [i for i in compatibles if i.total() is not None]
+    if medidos:
+        return min(medidos, key=lambda i: i.total())
+    return compatibles[0] if compatibles else None
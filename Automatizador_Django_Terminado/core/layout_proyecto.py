@@ -0,0 +1,115 @@
+# core/layout_proyecto.py
+#
+# Dónde está cada archivo del proyecto (settings.py, urls.py, views.py del paquete principal,
+# apps/, templates/). Se resuelve una sola vez por proyecto y se reutiliza hasta que cambia
+# su estructura (proyecto nuevo), en lugar de buscar con glob/iterdir en cada app y modelo.
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+_SETTINGS_MANAGE = re.compile(r"""DJANGO_SETTINGS_MODULE['"]\s*,\s*['"]([\w.]+)['"]""")
+
+# Proyectos ya resueltos (ruta absoluta -> layout)
+_layouts: Dict[str, "ProjectLayout"] = {}
+_candado = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ProjectLayout:
+    """Rutas del proyecto; todas se derivan de la raíz y del módulo de settings sin tocar el disco"""
+    raiz: Path
+    modulo_settings: str
+
+    @property
+    def paquete(self) -> str:
+        """Paquete principal del proyecto (el que creó startproject)"""
+        return self.modulo_settings.split(".")[0]
+
+    @property
+    def dir_paquete(self) -> Path:
+        return self.raiz / self.paquete
+
+    @property
+    def settings(self) -> Path:
+        return self.raiz.joinpath(*self.modulo_settings.split(".")).with_suffix(".py")
+
+    @property
+    def settings_test(self) -> Path:
+        return self.dir_paquete / "settings_test.py"
+
+    @property
+    def urls(self) -> Path:
+        return self.dir_paquete / "urls.py"
+
+    @property
+    def views(self) -> Path:
+        return self.dir_paquete / "views.py"
+
+    @property
+    def manage_py(self) -> Path:
+        return self.raiz / "manage.py"
+
+    @property
+    def apps(self) -> Path:
+        return self.raiz / "apps"
+
+    @property
+    def templates(self) -> Path:
+        return self.raiz / "templates"
+
+    @classmethod
+    def resolver(cls, raiz: Path, nombre_proyecto: str = "") -> Optional["ProjectLayout"]:
+        """Busca el settings: carpeta con el nombre del proyecto, DJANGO_SETTINGS_MODULE de
+        manage.py y, por último, la primera carpeta con settings.py. None si no hay ninguno"""
+        raiz = Path(raiz)
+        if nombre_proyecto and (raiz / nombre_proyecto / "settings.py").is_file():
+            return cls(raiz, f"{nombre_proyecto}.settings")
+
+        try:
+            match = _SETTINGS_MANAGE.search((raiz / "manage.py").read_text(encoding="utf-8"))
+        except OSError:
+            match = None
+        if match:
+            layout = cls(raiz, match.group(1))
+            if layout.settings.is_file():
+                return layout
+
+        try:
+            for carpeta in sorted(raiz.iterdir()):
+                if carpeta.is_dir() and (carpeta / "settings.py").is_file():
+                    return cls(raiz, f"{carpeta.name}.settings")
+        except OSError:
+            pass
+        return None
+
+
+def layout_de(project_path: Union[str, Path], nombre_proyecto: str = "") -> ProjectLayout:
+    """Layout del proyecto, resuelto la primera vez y cacheado.
+
+    Si todavía no hay settings.py se devuelve la suposición habitual (<carpeta>/<carpeta>/settings.py)
+    sin cachearla, para que se resuelva de verdad en cuanto exista el proyecto.
+    """
+    clave = os.path.abspath(project_path)
+    with _candado:
+        layout = _layouts.get(clave)
+    if layout is not None:
+        return layout
+
+    raiz = Path(clave)
+    layout = ProjectLayout.resolver(raiz, nombre_proyecto)
+    if layout is None:
+        return ProjectLayout(raiz, f"{nombre_proyecto or raiz.name}.settings")
+    with _candado:
+        return _layouts.setdefault(clave, layout)
+
+
+def invalidar_layout(project_path: Union[str, Path, None] = None):
+    """Olvida el layout de un proyecto (o de todos) tras un cambio de estructura"""
+    with _candado:
+        if project_path is None:
+            _layouts.clear()
+        else:
+            _layouts.pop(os.path.abspath(project_path), None)
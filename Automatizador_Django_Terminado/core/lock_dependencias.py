@@ -0,0 +1,204 @@
+# core/lock_dependencias.py
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from email.parser import HeaderParser
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.entorno_capas import NOMBRE_PTH, site_packages_de
+from core.pip_progreso import ProgresoPip, ejecutar_pip
+from core.plantilla_entorno import clonar_entorno, python_de_entorno, reubicar_entorno
+from core.rutas_cache import obtener_dir_cache
+from core.wheelhouse import Wheelhouse, _normalizar_nombre, _parsear_archivo, clave_abi
+
+# Nombre del lock dentro del proyecto (formato requirements, instalable con --require-hashes)
+NOMBRE_LOCK = "requirements.txt"
+
+# Igual que pip freeze: las herramientas de empaquetado no forman parte del lock
+_EXCLUIDOS = {"pip", "setuptools", "wheel", "distribute"}
+
+
+@dataclass
+class LockDependencias:
+    """Conjunto resuelto de paquetes fijados con los sha256 de sus archivos"""
+    abi: str
+    # nombre normalizado -> (versión, hashes)
+    paquetes: Dict[str, Tuple[str, List[str]]] = field(default_factory=dict)
+
+    def texto(self) -> str:
+        """Formato requirements. Sin los hashes de todos los paquetes se fijan solo las versiones:
+        con un solo --hash pip exige hashes para todos y rechazaría el archivo"""
+        completo = self.completo()
+        lineas = [
+            "# Generado por Automatizador Django. No editar a mano.",
+            f"# Entorno: {self.abi}",
+            "# Instalar con: pip install --require-hashes -r requirements.txt" if completo
+            else "# Instalar con: pip install -r requirements.txt (sin hashes: no todos estaban en el wheelhouse)",
+        ]
+        for nombre in sorted(self.paquetes):
+            version, hashes = self.paquetes[nombre]
+            hashes = sorted(hashes) if completo else []
+            lineas.append(f"{nombre}=={version}" + "".join(f" \\\n    --hash=sha256:{h}" for h in hashes))
+        return "\n".join(lineas) + "\n"
+
+    def digest(self) -> str:
+        """Identifica el entorno: mismo digest, mismos archivos instalados"""
+        contenido = self.abi + "\n" + "\n".join(
+            f"{nombre}=={version}:{','.join(sorted(hashes))}"
+            for nombre, (version, hashes) in sorted(self.paquetes.items())
+        )
+        return hashlib.sha256(contenido.encode()).hexdigest()
+
+    def completo(self) -> bool:
+        return bool(self.paquetes) and all(hashes for _, hashes in self.paquetes.values())
+
+    def escribir(self, ruta: Path):
+        ruta = Path(ruta)
+        temporal = ruta.with_name(ruta.name + ".tmp")
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(self.texto())
+        os.replace(temporal, ruta)
+
+
+def _sha256(archivo: Path) -> str:
+    h = hashlib.sha256()
+    with open(archivo, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _hashes_en_wheelhouse(wheelhouse: Wheelhouse, nombre: str, version: str) -> List[str]:
+    return [
+        _sha256(archivo) for archivo in wheelhouse.archivos()
+        if _parsear_archivo(archivo.name) == (nombre, version)
+    ]
+
+
+def _lock_desde_versiones(wheelhouse: Wheelhouse, versiones: Dict[str, str]) -> LockDependencias:
+    lock = LockDependencias(abi=clave_abi(wheelhouse.python_path))
+    for nombre, version in versiones.items():
+        if nombre not in _EXCLUIDOS:
+            lock.paquetes[nombre] = (version, _hashes_en_wheelhouse(wheelhouse, nombre, version))
+    return lock
+
+
+def _directorios_site_packages(ruta_entorno: Path) -> List[Path]:
+    """site-packages del entorno más los que añada el .pth de un entorno en capas"""
+    propio = site_packages_de(ruta_entorno)
+    directorios = [propio]
+    pth = propio / NOMBRE_PTH
+    if pth.exists():
+        for linea in pth.read_text(encoding="utf-8").splitlines():
+            if linea.strip() and Path(linea.strip()).is_dir():
+                directorios.append(Path(linea.strip()))
+    return directorios
+
+
+def versiones_instaladas(ruta_entorno: Path) -> Dict[str, str]:
+    """Lee los METADATA de los dist-info sin arrancar el intérprete del entorno"""
+    versiones: Dict[str, str] = {}
+    for directorio in _directorios_site_packages(Path(ruta_entorno)):
+        for dist_info in directorio.glob("*.dist-info"):
+            try:
+                with open(dist_info / "METADATA", "r", encoding="utf-8") as f:
+                    cabeceras = HeaderParser().parse(f)
+            except OSError:
+                continue
+            if cabeceras.get("Name") and cabeceras.get("Version"):
+                # El primero gana, como en sys.path
+                versiones.setdefault(_normalizar_nombre(cabeceras["Name"]), cabeceras["Version"])
+    return versiones
+
+
+def lock_de_entorno(ruta_entorno: Path, wheelhouse: Optional[Wheelhouse] = None) -> LockDependencias:
+    """Lock de lo que hay realmente instalado en un entorno terminado"""
+    wheelhouse = wheelhouse or Wheelhouse(str(python_de_entorno(Path(ruta_entorno))))
+    return _lock_desde_versiones(wheelhouse, versiones_instaladas(ruta_entorno))
+
+
+async def resolver_lock(python_path: str, paquetes: List[str],
+                        progreso: Optional[Callable[[ProgresoPip], None]] = None) -> Optional[LockDependencias]:
+    """Resuelve los paquetes contra el wheelhouse (pip --dry-run --report) sin instalar nada"""
+    wheelhouse = Wheelhouse(python_path)
+    with tempfile.TemporaryDirectory() as tmp:
+        reporte = Path(tmp) / "reporte.json"
+        cmd = [
+            python_path, "-m", "pip", "install", "--dry-run", "--ignore-installed", "--quiet",
+            "--report", str(reporte), "--no-index", "--find-links", str(wheelhouse.directorio), *paquetes
+        ]
+        codigo, _ = await ejecutar_pip(cmd)
+        if codigo != 0:
+            # Falta algo en el wheelhouse (o pip < 22.2 sin --report): descargar y reintentar
+            codigo, _ = await ejecutar_pip(wheelhouse._cmd_descargar(paquetes), progreso)
+            if codigo == 0:
+                codigo, _ = await ejecutar_pip(cmd)
+        if codigo != 0 or not reporte.exists():
+            print("No se pudo resolver el lock de dependencias; se instalará sin lock")
+            return None
+        with open(reporte, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+
+    versiones = {
+        _normalizar_nombre(item["metadata"]["name"]): item["metadata"]["version"]
+        for item in datos.get("install", [])
+    }
+    lock = await asyncio.to_thread(_lock_desde_versiones, wheelhouse, versiones)
+    return lock if lock.completo() else None
+
+
+def _es_autocontenido(ruta_entorno: Path) -> bool:
+    """Los entornos en capas dependen de su base y no se pueden restaurar en otro sitio"""
+    try:
+        return not (site_packages_de(ruta_entorno) / NOMBRE_PTH).exists()
+    except FileNotFoundError:
+        return False
+
+
+class CacheEntornos:
+    """Entornos terminados guardados bajo el digest de su lock"""
+
+    def __init__(self, directorio: Optional[Path] = None):
+        self.directorio = Path(directorio) if directorio else obtener_dir_cache("entornos")
+
+    def ruta(self, lock: LockDependencias) -> Path:
+        return self.directorio / lock.digest()[:32]
+
+    def contiene(self, lock: LockDependencias) -> bool:
+        return (self.ruta(lock) / ".completa").exists()
+
+    def restaurar(self, lock: LockDependencias, destino: Path) -> bool:
+        """Clona el entorno cacheado en el destino. False si no hay entrada para ese lock"""
+        if not self.contiene(lock):
+            return False
+        clonar_entorno(self.ruta(lock), Path(destino))
+        print(f"Entorno restaurado desde la caché (lock {lock.digest()[:12]})")
+        return True
+
+    def guardar(self, lock: LockDependencias, origen: Path) -> bool:
+        """Guarda una copia (hardlinks) de un entorno terminado si aún no estaba"""
+        if not lock.completo() or self.contiene(lock) or not _es_autocontenido(Path(origen)):
+            return False
+        final = self.ruta(lock)
+        temporal = self.directorio / f".tmp-{uuid.uuid4().hex[:8]}"
+        try:
+            clonar_entorno(Path(origen), temporal)
+            if final.exists():
+                shutil.rmtree(final, ignore_errors=True)
+            os.replace(temporal, final)
+            reubicar_entorno(final, str(temporal))
+            (final / ".completa").touch()
+            print(f"Entorno guardado en la caché (lock {lock.digest()[:12]})")
+            return True
+        except OSError as e:
+            print(f"No se pudo guardar el entorno en la caché: {e}")
+            return False
+        finally:
+            if temporal.exists():
+                shutil.rmtree(temporal, ignore_errors=True)
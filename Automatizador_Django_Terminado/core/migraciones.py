@@ -0,0 +1,241 @@
+# core/migraciones.py
+import ast
+import datetime
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.editor_fuente import abrir
+from core.escritura import crear_si_falta, escribir_si_cambia, existe
+
+# Cómo queda cada tipo de campo del automatizador dentro de una migración
+# (lo mismo que escribiría el autodetector de Django al deconstruir el campo)
+CAMPOS_MIGRACION = {
+    'CharField': "models.CharField(max_length=100)",
+    'IntegerField': "models.IntegerField()",
+    'TextField': "models.TextField()",
+    'BooleanField': "models.BooleanField()",
+    'DateTimeField': "models.DateTimeField(auto_now_add=True)",
+    'EmailField': "models.EmailField(max_length=254)",
+    'ForeignKey': "models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='{app}.{modelo}')",
+}
+
+# Valor para las filas existentes al añadir un campo obligatorio (AddField con preserve_default=False)
+DEFAULTS_ADD_FIELD = {
+    'CharField': "''",
+    'IntegerField': "0",
+    'TextField': "''",
+    'BooleanField': "False",
+    'DateTimeField': "django.utils.timezone.now",
+    'EmailField': "''",
+}
+
+_CAMPO_ID = {
+    'django.db.models.BigAutoField': "models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')",
+    'django.db.models.AutoField': "models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')",
+    'django.db.models.SmallAutoField': "models.SmallAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')",
+}
+
+# Longitud máxima del nombre antes de recortarlo (igual que Migration.suggest_name)
+_MAX_NOMBRE = 52
+
+
+class MigracionNoSoportada(Exception):
+    """El cambio no se puede escribir sin Django: hay que usar makemigrations"""
+
+
+def leer_spec_modelo(models_path: Path, nombre_modelo: str, tipos: Dict[str, str]) -> Optional[List[Dict[str, str]]]:
+    """Campos ({"name", "type"}) de un modelo en models.py, o None si el modelo no existe.
+
+    tipos es el mapa tipo -> definición con el que se escriben los modelos (DjangoManager.TIPOS_VALIDOS);
+    un campo escrito de otra forma (editado a mano) solo lo puede comparar el autodetector de Django.
+    """
+    models_path = Path(models_path)
+    if not existe(models_path):
+        return None
+    for nodo in abrir(models_path).arbol.body:
+        if isinstance(nodo, ast.ClassDef) and nodo.name == nombre_modelo:
+            campos = []
+            for sentencia in nodo.body:
+                if not (isinstance(sentencia, ast.Assign) and len(sentencia.targets) == 1
+                        and isinstance(sentencia.targets[0], ast.Name)
+                        and isinstance(sentencia.value, ast.Call)
+                        and isinstance(sentencia.value.func, ast.Attribute)):
+                    continue
+                tipo = sentencia.value.func.attr
+                if tipo not in CAMPOS_MIGRACION or tipo not in tipos or (
+                        ast.dump(sentencia.value) != ast.dump(ast.parse(f"models.{tipos[tipo]}", mode="eval").body)):
+                    raise MigracionNoSoportada(
+                        f"{nombre_modelo}.{sentencia.targets[0].id} = {ast.unparse(sentencia.value)}"
+                    )
+                campos.append({"name": sentencia.targets[0].id, "type": tipo})
+            return campos
+    return None
+
+
+def _campo_auto(app_dir: Path) -> str:
+    """default_auto_field de la AppConfig (lo que generan las apps del automatizador)"""
+    apps_py = app_dir / "apps.py"
+    if apps_py.exists():
+        match = re.search(r"default_auto_field\s*=\s*['\"]([\w.]+)['\"]", apps_py.read_text(encoding="utf-8"))
+        if match and match.group(1) in _CAMPO_ID:
+            return _CAMPO_ID[match.group(1)]
+    return _CAMPO_ID['django.db.models.BigAutoField']
+
+
+def _dependencias(archivo: Path) -> List[Tuple[str, str]]:
+    arbol = ast.parse(archivo.read_text(encoding="utf-8"))
+    for nodo in ast.walk(arbol):
+        if isinstance(nodo, ast.Assign) and any(getattr(t, "id", None) == "dependencies" for t in nodo.targets):
+            try:
+                return [tuple(d) for d in ast.literal_eval(nodo.value)]
+            except ValueError:
+                # Dependencias calculadas (p.ej. swappable_dependency): no afectan a esta app
+                return []
+    return []
+
+
+def migraciones_de_app(migrations_dir: Path) -> List[str]:
+    return sorted(
+        p.stem for p in Path(migrations_dir).glob("[0-9][0-9][0-9][0-9]_*.py")
+    )
+
+
+def hoja_de_app(migrations_dir: Path, app_label: str) -> Optional[str]:
+    """Última migración de la app (la que ninguna otra de la app tiene como dependencia)"""
+    nombres = migraciones_de_app(migrations_dir)
+    if not nombres:
+        return None
+    referenciadas = set()
+    for nombre in nombres:
+        for app, dependencia in _dependencias(Path(migrations_dir) / f"{nombre}.py"):
+            if app == app_label:
+                referenciadas.add(dependencia)
+    hojas = [n for n in nombres if n not in referenciadas]
+    if len(hojas) != 1:
+        raise MigracionNoSoportada(f"La app {app_label} tiene {len(hojas)} migraciones hoja")
+    return hojas[0]
+
+
+def _definicion_campo(tipo: str, app_label: str, nombre_modelo: str) -> str:
+    return CAMPOS_MIGRACION[tipo].format(app=app_label, modelo=nombre_modelo.lower())
+
+
+def operaciones_modelo(app_label: str, nombre_modelo: str, previo: Optional[List[Dict[str, str]]],
+                       nuevo: List[Dict[str, str]], campo_id: str) -> List[Tuple[str, str]]:
+    """Operaciones (fragmento de nombre, código) para pasar de la spec previa a la nueva"""
+    if previo is None:
+        lineas = [f"                ('id', {campo_id}),"]
+        lineas += [
+            f"                ('{c['name']}', {_definicion_campo(c['type'], app_label, nombre_modelo)}),"
+            for c in nuevo
+        ]
+        codigo = (
+            "        migrations.CreateModel(\n"
+            f"            name='{nombre_modelo}',\n"
+            "            fields=[\n" + "\n".join(lineas) + "\n"
+            "            ],\n"
+            "        ),"
+        )
+        return [(nombre_modelo.lower(), codigo)]
+
+    modelo = nombre_modelo.lower()
+    tipos_previos = {c["name"]: c["type"] for c in previo}
+    tipos_nuevos = {c["name"]: c["type"] for c in nuevo}
+    operaciones = []
+
+    for nombre in tipos_previos:
+        if nombre not in tipos_nuevos:
+            operaciones.append((f"remove_{modelo}_{nombre.lower()}", (
+                "        migrations.RemoveField(\n"
+                f"            model_name='{modelo}',\n"
+                f"            name='{nombre}',\n"
+                "        ),"
+            )))
+
+    for nombre, tipo in tipos_nuevos.items():
+        definicion = _definicion_campo(tipo, app_label, nombre_modelo)
+        if nombre not in tipos_previos:
+            if tipo not in DEFAULTS_ADD_FIELD:
+                # Una FK obligatoria necesita un valor real para las filas que ya existen
+                raise MigracionNoSoportada(f"AddField de {tipo} en {nombre_modelo}.{nombre}")
+            definicion = definicion.replace("(", f"(default={DEFAULTS_ADD_FIELD[tipo]}, ", 1).replace(", )", ")")
+            operaciones.append((f"{modelo}_{nombre.lower()}", (
+                "        migrations.AddField(\n"
+                f"            model_name='{modelo}',\n"
+                f"            name='{nombre}',\n"
+                f"            field={definicion},\n"
+                "            preserve_default=False,\n"
+                "        ),"
+            )))
+        elif tipos_previos[nombre] != tipo:
+            if 'ForeignKey' in (tipo, tipos_previos[nombre]):
+                # La columna pasa a ser <campo>_id (o deja de serlo): no es un simple ALTER
+                raise MigracionNoSoportada(f"AlterField de {tipos_previos[nombre]} a {tipo} en {nombre_modelo}.{nombre}")
+            operaciones.append((f"alter_{modelo}_{nombre.lower()}", (
+                "        migrations.AlterField(\n"
+                f"            model_name='{modelo}',\n"
+                f"            name='{nombre}',\n"
+                f"            field={definicion},\n"
+                "        ),"
+            )))
+    return operaciones
+
+
+def _sugerir_nombre(fragmentos: List[str], inicial: bool) -> str:
+    if inicial:
+        return "initial"
+    nombre = fragmentos[0]
+    for fragmento in fragmentos[1:]:
+        nuevo = f"{nombre}_{fragmento}"
+        if len(nuevo) > _MAX_NOMBRE:
+            return f"{nombre}_and_more"
+        nombre = nuevo
+    return nombre
+
+
+def escribir_migracion(app_dir: Path, cambios: List[Tuple[str, Optional[List[Dict]], List[Dict]]]) -> Optional[Path]:
+    """Escribe en app_dir/migrations la migración de los cambios [(modelo, spec_previa, spec_nueva)].
+
+    Devuelve la ruta del archivo, o None si no hay nada que migrar. Lanza MigracionNoSoportada
+    si el cambio necesita al autodetector de Django.
+    """
+    app_dir = Path(app_dir)
+    app_label = app_dir.name
+    migrations_dir = app_dir / "migrations"
+    campo_id = _campo_auto(app_dir)
+
+    operaciones: List[Tuple[str, str]] = []
+    for nombre_modelo, previo, nuevo in cambios:
+        operaciones.extend(operaciones_modelo(app_label, nombre_modelo, previo, nuevo, campo_id))
+    if not operaciones:
+        return None
+
+    hoja = hoja_de_app(migrations_dir, app_label) if migrations_dir.exists() else None
+    inicial = hoja is None
+    numero = int(hoja.split("_")[0]) + 1 if hoja else 1
+    nombre = f"{numero:04d}_{_sugerir_nombre([f for f, _ in operaciones], inicial)}"
+
+    codigo = "\n".join(c for _, c in operaciones)
+    imports = ["from django.db import migrations, models"]
+    if "django.db.models.deletion" in codigo:
+        imports.insert(0, "import django.db.models.deletion")
+    if "django.utils.timezone" in codigo:
+        imports.insert(0, "import django.utils.timezone")
+
+    contenido = f"# Generated by Automatizador Django on {datetime.datetime.now():%Y-%m-%d %H:%M}\n\n"
+    contenido += "\n".join(imports) + "\n\n\n"
+    contenido += "class Migration(migrations.Migration):\n\n"
+    if inicial:
+        contenido += "    initial = True\n\n"
+    contenido += "    dependencies = [\n"
+    if hoja:
+        contenido += f"        ('{app_label}', '{hoja}'),\n"
+    contenido += "    ]\n\n"
+    contenido += "    operations = [\n" + codigo + "\n    ]\n"
+
+    # Dentro de una preparación queda en memoria hasta que se vuelque para migrar
+    crear_si_falta(migrations_dir / "__init__.py")
+    destino = migrations_dir / f"{nombre}.py"
+    escribir_si_cambia(destino, contenido)
+    return destino
@@ -0,0 +1,176 @@
+# core/pip_progreso.py
+import asyncio
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+# Líneas del log de pip que se conservan para informar errores
+MAX_LINEAS_LOG = 200
+# Intervalo mínimo (segundos) entre notificaciones de progreso a la UI
+INTERVALO_NOTIFICACION = 0.25
+
+_UNIDADES = {"bytes": 1, "kb": 1000, "mb": 1000 ** 2, "gb": 1000 ** 3}
+
+_RE_COLLECTING = re.compile(r"^Collecting ([A-Za-z0-9][A-Za-z0-9._-]*)")
+_RE_DOWNLOADING = re.compile(r"^\s*(?:Downloading|Using cached) (\S+?)(?:\.metadata)? \(([\d.]+) (bytes|kB|MB|GB)\)")
+_RE_METADATA = re.compile(r"\.metadata \(")
+_RE_RAW = re.compile(r"^Progress (\d+) of (\d+)")
+_RE_PROCESSING = re.compile(r"^Processing \S*?([A-Za-z0-9][A-Za-z0-9._]*)-\d")
+_RE_INSTALLING = re.compile(r"^Installing collected packages: (.+)$")
+_RE_SUCCESS = re.compile(r"^Successfully installed (.+)$")
+
+
+@dataclass
+class ProgresoPip:
+    fase: str = "resolviendo"
+    paquete_actual: str = ""
+    paquetes: int = 0
+    bytes_totales: int = 0
+    bytes_descargados: int = 0
+    eta: Optional[float] = None
+    instalados: List[str] = field(default_factory=list)
+
+    def resumen(self) -> str:
+        """Texto corto para mostrar en la UI"""
+        if self.fase == "terminado":
+            return f"Instalados {len(self.instalados)} paquetes"
+        if self.fase == "instalando":
+            return f"Instalando {self.paquetes} paquetes..."
+        if self.fase == "descargando":
+            texto = f"Descargando {self.paquete_actual} ({self.bytes_descargados / 1e6:.1f}/{self.bytes_totales / 1e6:.1f} MB)"
+            if self.eta is not None:
+                texto += f" ~{int(self.eta)}s"
+            return texto
+        return f"Resolviendo {self.paquete_actual or 'dependencias'}... ({self.paquetes})"
+
+
+def _a_bytes(cantidad: str, unidad: str) -> int:
+    return int(float(cantidad) * _UNIDADES[unidad.lower()])
+
+
+class LectorPip:
+    """Lee la salida de pip línea a línea, la convierte en progreso y guarda solo la cola del log"""
+
+    def __init__(self, callback: Optional[Callable[[ProgresoPip], None]] = None,
+                 intervalo: float = INTERVALO_NOTIFICACION, max_lineas: int = MAX_LINEAS_LOG):
+        self.callback = callback
+        self.intervalo = intervalo
+        self.progreso = ProgresoPip()
+        self._cola = deque(maxlen=max_lineas)
+        self._inicio = time.monotonic()
+        self._ultima_notificacion = 0.0
+        self._bytes_archivo_actual = 0
+        self._bytes_antes_archivo = 0
+
+    def cola(self) -> str:
+        return "\n".join(self._cola)
+
+    def _actualizar_eta(self):
+        transcurrido = time.monotonic() - self._inicio
+        if self.progreso.bytes_descargados and transcurrido > 0:
+            velocidad = self.progreso.bytes_descargados / transcurrido
+            restante = max(0, self.progreso.bytes_totales - self.progreso.bytes_descargados)
+            self.progreso.eta = restante / velocidad
+        else:
+            self.progreso.eta = None
+
+    def procesar_linea(self, linea: str):
+        linea = linea.rstrip("\r\n")
+        if not linea:
+            return
+        self._cola.append(linea)
+        p = self.progreso
+        texto = linea.strip()
+
+        match = _RE_RAW.match(texto)
+        if match:
+            # --progress-bar raw (pip >= 24.1): bytes exactos del archivo actual
+            p.bytes_descargados = self._bytes_antes_archivo + int(match.group(1))
+            self._actualizar_eta()
+            self._notificar()
+            return
+
+        match = _RE_COLLECTING.match(texto)
+        if match:
+            p.paquete_actual = match.group(1)
+            p.paquetes += 1
+        elif _RE_DOWNLOADING.match(texto) and not _RE_METADATA.search(texto):
+            match = _RE_DOWNLOADING.match(texto)
+            # El archivo anterior terminó de descargarse al empezar el siguiente
+            self._bytes_antes_archivo += self._bytes_archivo_actual
+            p.bytes_descargados = self._bytes_antes_archivo
+            self._bytes_archivo_actual = _a_bytes(match.group(2), match.group(3))
+            p.bytes_totales += self._bytes_archivo_actual
+            p.fase = "descargando"
+            p.paquete_actual = match.group(1).split("/")[-1].split("-")[0]
+            self._actualizar_eta()
+        elif _RE_PROCESSING.match(texto):
+            p.paquete_actual = _RE_PROCESSING.match(texto).group(1)
+            p.paquetes += 1
+        elif _RE_INSTALLING.match(texto):
+            p.bytes_descargados = p.bytes_totales
+            p.eta = 0
+            p.fase = "instalando"
+            p.paquetes = len(_RE_INSTALLING.match(texto).group(1).split(","))
+        elif _RE_SUCCESS.match(texto):
+            p.fase = "terminado"
+            p.instalados = _RE_SUCCESS.match(texto).group(1).split()
+            self._notificar(forzar=True)
+            return
+        self._notificar()
+
+    def _notificar(self, forzar: bool = False):
+        if not self.callback:
+            return
+        ahora = time.monotonic()
+        if forzar or ahora - self._ultima_notificacion >= self.intervalo:
+            self._ultima_notificacion = ahora
+            try:
+                self.callback(self.progreso)
+            except Exception as e:
+                print(f"Error notificando progreso de pip: {e}")
+
+    async def leer(self, stream: asyncio.StreamReader):
+        while True:
+            linea = await stream.readline()
+            if not linea:
+                break
+            self.procesar_linea(linea.decode(errors="replace"))
+        self._notificar(forzar=True)
+
+
+def version_pip(python_path: str) -> Optional[Tuple[int, ...]]:
+    """Versión de pip del entorno leyendo su dist-info (sin lanzar procesos)"""
+    raiz = Path(python_path).parent.parent
+    for patron in ("lib/python*/site-packages/pip-*.dist-info", "Lib/site-packages/pip-*.dist-info"):
+        for dist_info in raiz.glob(patron):
+            version = dist_info.name[len("pip-"):-len(".dist-info")]
+            try:
+                return tuple(int(p) for p in version.split(".")[:2])
+            except ValueError:
+                continue
+    return None
+
+
+def _entorno_sin_buffer() -> dict:
+    entorno = dict(os.environ)
+    entorno["PYTHONUNBUFFERED"] = "1"
+    return entorno
+
+
+async def ejecutar_pip(cmd: List[str], callback: Optional[Callable[[ProgresoPip], None]] = None) -> Tuple[int, str]:
+    """Ejecuta pip transmitiendo su salida; devuelve (código de salida, cola del log)"""
+    lector = LectorPip(callback)
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        env=_entorno_sin_buffer()
+    )
+    await lector.leer(proc.stdout)
+    await proc.wait()
+    return proc.returncode, lector.cola()
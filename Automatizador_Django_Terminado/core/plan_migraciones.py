@@ -0,0 +1,202 @@
+# core/plan_migraciones.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.layout_proyecto import layout_de
+from core.migraciones import MigracionNoSoportada, leer_spec_modelo, migraciones_de_app
+from core.secciones_crud import modelos_de_app
+
+# Estado del automatizador dentro del proyecto (no forma parte del código de Django)
+DIR_ESTADO = ".automatizador"
+ARCHIVO_PLAN = "migraciones.json"
+ARCHIVO_MODELOS = "modelos_migrados.json"
+
+
+def ruta_sqlite(project_dir: Path) -> Optional[Path]:
+    """Base de datos SQLite del proyecto tal como la escribe bd_config, o None si usa otro motor"""
+    project_dir = Path(project_dir)
+    settings_path = layout_de(project_dir).settings
+    if not settings_path.exists():
+        return None
+    contenido = settings_path.read_text(encoding="utf-8")
+    if "django.db.backends.sqlite3" not in contenido:
+        return None
+    match = re.search(r"'NAME':\s*BASE_DIR\s*/\s*['\"]([^'\"]+)['\"]", contenido)
+    return project_dir / (match.group(1) if match else "db.sqlite3")
+
+
+def huellas_migraciones(project_dir: Path) -> Dict[str, str]:
+    """sha256 de cada migración de las apps del proyecto ("app/0001_initial" -> hash)"""
+    huellas = {}
+    apps_dir = Path(project_dir) / "apps"
+    if not apps_dir.exists():
+        return huellas
+    for app_dir in sorted(p for p in apps_dir.iterdir() if (p / "migrations").is_dir()):
+        huellas.update(_huellas_app(app_dir))
+    return huellas
+
+
+def _huellas_app(app_dir: Path) -> Dict[str, str]:
+    huellas = {}
+    for nombre in migraciones_de_app(app_dir / "migrations"):
+        contenido = (app_dir / "migrations" / f"{nombre}.py").read_bytes()
+        huellas[f"{app_dir.name}/{nombre}"] = hashlib.sha256(contenido).hexdigest()
+    return huellas
+
+
+def _leer_json(ruta: Path) -> dict:
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _escribir_json(ruta: Path, datos: dict):
+    ruta.parent.mkdir(exist_ok=True)
+    temporal = ruta.with_suffix(".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2)
+    os.replace(temporal, ruta)
+
+
+def guardar_modelos_migrados(project_dir: Path, app_names: List[str], tipos: Dict[str, str]):
+    """Guarda la spec de cada modelo de esas apps tal como quedó migrada (tras un migrate correcto).
+
+    Es la spec "previa" de la siguiente migración escrita sin Django: models.py no sirve para
+    eso, porque puede llevar cambios que nunca llegaron a migrarse. Cada app se guarda con los
+    hashes de sus migraciones; si cambian por otro camino la foto deja de valer.
+    """
+    project_dir = Path(project_dir)
+    ruta = project_dir / DIR_ESTADO / ARCHIVO_MODELOS
+    foto = _leer_json(ruta)
+    for app_name in app_names:
+        app_dir = project_dir / "apps" / app_name
+        modelos = {}
+        try:
+            for nombre, _ in modelos_de_app(app_dir / "models.py"):
+                try:
+                    modelos[nombre] = leer_spec_modelo(app_dir / "models.py", nombre, tipos)
+                except MigracionNoSoportada:
+                    # Campos escritos a mano: solo los compara el autodetector
+                    modelos[nombre] = None
+        except SyntaxError:
+            foto.pop(app_name, None)
+            continue
+        foto[app_name] = {"migraciones": _huellas_app(app_dir), "modelos": modelos}
+    _escribir_json(ruta, foto)
+
+
+def foto_modelos_vigente(project_dir: Path, app_name: str) -> bool:
+    """Si hay foto de los modelos migrados de la app y sus migraciones no han cambiado desde entonces"""
+    project_dir = Path(project_dir)
+    huellas = _huellas_app(project_dir / "apps" / app_name)
+    if not huellas:
+        return True
+    app = _leer_json(project_dir / DIR_ESTADO / ARCHIVO_MODELOS).get(app_name)
+    return bool(app) and app.get("migraciones") == huellas
+
+
+def modelo_migrado(project_dir: Path, app_name: str, nombre_modelo: str) -> Tuple[bool, Optional[List[Dict[str, str]]]]:
+    """(se conoce, spec) del modelo según la última migración aplicada por el automatizador.
+
+    spec None con se conoce=True: el modelo aún no está en las migraciones. se conoce=False:
+    no hay foto válida (o el modelo tiene campos a mano) y hay que preguntar a makemigrations.
+    """
+    project_dir = Path(project_dir)
+    if not _huellas_app(project_dir / "apps" / app_name):
+        return True, None
+    if not foto_modelos_vigente(project_dir, app_name):
+        return False, None
+    modelos = _leer_json(project_dir / DIR_ESTADO / ARCHIVO_MODELOS)[app_name].get("modelos", {})
+    if nombre_modelo in modelos and modelos[nombre_modelo] is None:
+        return False, None
+    return True, modelos.get(nombre_modelo)
+
+
+def leer_aplicadas_sqlite(ruta_bd: Path) -> Optional[Set[str]]:
+    """Filas de django_migrations leídas directamente (sin Django); None si aún no hay tabla"""
+    if not ruta_bd.exists():
+        return None
+    try:
+        conexion = sqlite3.connect(f"file:{ruta_bd}?mode=ro", uri=True, timeout=5)
+        try:
+            filas = conexion.execute("SELECT app, name FROM django_migrations").fetchall()
+        finally:
+            conexion.close()
+    except sqlite3.Error:
+        return None
+    return {f"{app}/{nombre}" for app, nombre in filas}
+
+
+def _firma_bd(ruta_bd: Optional[Path]) -> Optional[List[int]]:
+    try:
+        stat = ruta_bd.stat()
+    except (AttributeError, OSError):
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class PlanMigraciones:
+    """Qué apps tienen migraciones sin aplicar, con una foto de django_migrations cacheada.
+
+    La foto (.automatizador/migraciones.json) guarda las migraciones aplicadas y los hashes de los
+    archivos que había al tomarla. Si los archivos y la base de datos no han cambiado desde entonces
+    el plan sale de la foto sin abrir la base de datos; si no, se lee django_migrations con sqlite3.
+    """
+
+    def __init__(self, project_dir: Path):
+        self.project_dir = Path(project_dir)
+        self.ruta = self.project_dir / DIR_ESTADO / ARCHIVO_PLAN
+        self.ruta_bd = ruta_sqlite(self.project_dir)
+
+    def _leer_foto(self) -> dict:
+        return _leer_json(self.ruta)
+
+    def _aplicadas(self, foto: dict, huellas: Dict[str, str]) -> Optional[Set[str]]:
+        if foto and foto.get("huellas") == huellas and foto.get("bd") == _firma_bd(self.ruta_bd):
+            return set(foto.get("aplicadas", []))
+        if self.ruta_bd is not None:
+            return leer_aplicadas_sqlite(self.ruta_bd)
+        # Otro motor (PostgreSQL): solo se sabe lo que migró el propio automatizador
+        return set(foto["aplicadas"]) if foto else None
+
+    def apps_pendientes(self) -> Optional[List[str]]:
+        """Apps con migraciones pendientes ([] = nada que hacer); None si hace falta un migrate completo"""
+        foto = self._leer_foto()
+        huellas = huellas_migraciones(self.project_dir)
+        aplicadas = self._aplicadas(foto, huellas)
+        if aplicadas is None:
+            return None
+
+        huellas_foto = foto.get("huellas", {})
+        pendientes = []
+        for migracion, huella in huellas.items():
+            app = migracion.split("/")[0]
+            if app in pendientes:
+                continue
+            # Una migración aplicada cuyo archivo cambió después también se revisa con migrate
+            if migracion not in aplicadas or (migracion in huellas_foto and huellas_foto[migracion] != huella):
+                pendientes.append(app)
+        return pendientes
+
+    def registrar(self, apps_migradas: Optional[List[str]] = None):
+        """Guarda la foto tras un migrate correcto (apps_migradas=None: migrate de todo el proyecto)"""
+        huellas = huellas_migraciones(self.project_dir)
+        aplicadas = leer_aplicadas_sqlite(self.ruta_bd) if self.ruta_bd is not None else None
+        if aplicadas is None:
+            aplicadas = set(self._leer_foto().get("aplicadas", []))
+            aplicadas.update(
+                m for m in huellas if apps_migradas is None or m.split("/")[0] in apps_migradas
+            )
+
+        _escribir_json(self.ruta, {
+            "huellas": huellas,
+            "aplicadas": sorted(aplicadas),
+            "bd": _firma_bd(self.ruta_bd),
+        })
@@ -0,0 +1,155 @@
+# core/plantilla_entorno.py
+import asyncio
+import os
+import shutil
+import sys
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from core.pip_progreso import ProgresoPip
+from core.rutas_cache import obtener_dir_cache
+from core.wheelhouse import Wheelhouse, clave_abi
+
+# Driver de PostgreSQL: psycopg 3 con el pool que usa el settings generado
+PAQUETES_DRIVER_POSTGRES = ["psycopg[binary,pool]"]
+
+# Paquetes con los que se aprovisiona la plantilla (Django + drivers de BD)
+PAQUETES_PLANTILLA = ["django", *PAQUETES_DRIVER_POSTGRES]
+
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+def requisito_django(version: str) -> str:
+    """django==X.Y.Z; con solo la serie ("5.2") vale cualquier parche de esa serie"""
+    if version.count(".") >= 2:
+        return f"django=={version}"
+    return f"django~={version}.0"
+
+
+def misma_serie_django(instalada: Optional[str], esperada: str) -> bool:
+    """El esqueleto de startproject solo cambia entre series (X.Y), no entre parches"""
+    return bool(instalada) and instalada.split(".")[:2] == esperada.split(".")[:2]
+
+
+def python_de_entorno(ruta_entorno: Path) -> Path:
+    if os.name == "nt":
+        return Path(ruta_entorno) / "Scripts" / "python.exe"
+    return Path(ruta_entorno) / "bin" / "python"
+
+
+def _enlazar_o_copiar(origen: str, destino: str):
+    """Hardlink si el sistema de archivos lo permite, copia normal si no"""
+    try:
+        os.link(origen, destino)
+    except OSError:
+        shutil.copy2(origen, destino)
+
+
+def reubicar_entorno(ruta_entorno: Path, ruta_anterior: str) -> int:
+    """Reescribe pyvenv.cfg y los scripts (shebangs, activate) que apuntan a la ruta anterior"""
+    ruta_entorno = Path(ruta_entorno)
+    anterior = str(ruta_anterior).encode()
+    nueva = str(ruta_entorno).encode()
+    if anterior == nueva:
+        return 0
+
+    candidatos: List[Path] = [ruta_entorno / "pyvenv.cfg"]
+    dir_scripts = ruta_entorno / ("Scripts" if os.name == "nt" else "bin")
+    if dir_scripts.exists():
+        candidatos.extend(p for p in dir_scripts.iterdir() if p.is_file() and not p.is_symlink())
+
+    reescritos = 0
+    for archivo in candidatos:
+        # Los lanzadores .exe de Windows llevan la ruta embebida en binario; se usa "python -m pip"
+        if archivo.suffix.lower() in (".exe", ".dll"):
+            continue
+        try:
+            contenido = archivo.read_bytes()
+        except OSError:
+            continue
+        if anterior not in contenido:
+            continue
+        modo = archivo.stat().st_mode
+        # Romper el hardlink antes de escribir para no modificar la plantilla
+        archivo.unlink()
+        archivo.write_bytes(contenido.replace(anterior, nueva))
+        os.chmod(archivo, modo)
+        reescritos += 1
+    return reescritos
+
+
+def clonar_entorno(origen: Path, destino: Path) -> int:
+    """Clona un entorno virtual con hardlinks y lo adapta a su nueva ruta"""
+    origen = Path(origen)
+    destino = Path(destino)
+    if destino.exists():
+        raise FileExistsError(f"El entorno {destino} ya existe")
+    shutil.copytree(
+        origen, destino,
+        symlinks=True,
+        copy_function=_enlazar_o_copiar,
+        ignore=shutil.ignore_patterns(".completa")
+    )
+    return reubicar_entorno(destino, str(origen))
+
+
+class PlantillaEntorno:
+    """Entorno virtual totalmente aprovisionado que se construye una vez y se clona por proyecto"""
+
+    SUBDIRECTORIO = "plantillas"
+
+    def __init__(self, interprete: str = sys.executable, version_django: Optional[str] = None):
+        self.interprete = interprete
+        self.version_django = version_django
+        sufijo = f"django{version_django}" if version_django else "django-latest"
+        self.clave = f"{clave_abi(interprete)}-{sufijo}"
+        self.ruta = obtener_dir_cache(self.SUBDIRECTORIO) / self.clave
+
+    def paquetes(self) -> List[str]:
+        if self.version_django:
+            return [requisito_django(self.version_django), *PAQUETES_PLANTILLA[1:]]
+        return list(PAQUETES_PLANTILLA)
+
+    def existe(self) -> bool:
+        return python_de_entorno(self.ruta).exists() and (self.ruta / ".completa").exists()
+
+    async def asegurar(self, progreso: Optional[Callable[[ProgresoPip], None]] = None) -> Path:
+        """Construye la plantilla si aún no existe y devuelve su ruta"""
+        lock = _locks.setdefault(self.clave, asyncio.Lock())
+        async with lock:
+            if self.existe():
+                return self.ruta
+
+            # Construir en un directorio temporal y renombrar al final (atómico)
+            temporal = self.ruta.parent / f".tmp-{self.clave}-{uuid.uuid4().hex[:8]}"
+            try:
+                print(f"Construyendo plantilla de entorno {self.clave}...")
+                proc = await asyncio.create_subprocess_exec(
+                    self.interprete, "-m", "venv", str(temporal),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                await proc.communicate()
+                if proc.returncode != 0:
+                    raise RuntimeError("No se pudo crear el entorno de la plantilla")
+
+                if not await Wheelhouse(str(python_de_entorno(temporal))).instalar(self.paquetes(), progreso):
+                    raise RuntimeError("No se pudieron instalar los paquetes de la plantilla")
+
+                if self.ruta.exists():
+                    shutil.rmtree(self.ruta, ignore_errors=True)
+                os.replace(temporal, self.ruta)
+                # Los scripts quedaron con la ruta temporal: apuntarlos a la definitiva
+                reubicar_entorno(self.ruta, str(temporal))
+                (self.ruta / ".completa").touch()
+                print(f"Plantilla {self.clave} lista")
+            finally:
+                if temporal.exists():
+                    shutil.rmtree(temporal, ignore_errors=True)
+        return self.ruta
+
+    async def clonar_en(self, destino: Path, progreso: Optional[Callable[[ProgresoPip], None]] = None) -> int:
+        """Clona la plantilla (construyéndola si hace falta) en el destino"""
+        origen = await self.asegurar(progreso)
+        return await asyncio.to_thread(clonar_entorno, origen, Path(destino))
@@ -0,0 +1,95 @@
+# core/pool_entornos.py
+import asyncio
+import os
+import shutil
+import sys
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+from core.lock_dependencias import versiones_instaladas
+from core.plantilla_entorno import PlantillaEntorno, misma_serie_django, python_de_entorno, reubicar_entorno
+from core.rutas_cache import obtener_dir_cache
+from core.wheelhouse import Wheelhouse, clave_abi
+
+# Número de entornos pre-calentados que se mantienen listos
+POOL_TAMANO_ENV_VAR = "AUTOMATIZADOR_POOL_TAMANO"
+TAMANO_POR_DEFECTO = 2
+
+
+class PoolEntornos:
+    """Entornos virtuales aprovisionados en segundo plano, listos para moverse a un proyecto"""
+
+    def __init__(self, tamano: Optional[int] = None, interprete: str = sys.executable, directorio: Optional[Path] = None):
+        if tamano is None:
+            try:
+                tamano = int(os.environ.get(POOL_TAMANO_ENV_VAR, TAMANO_POR_DEFECTO))
+            except ValueError:
+                tamano = TAMANO_POR_DEFECTO
+        self.tamano = max(0, tamano)
+        self.interprete = interprete
+        self.directorio = Path(directorio) if directorio else obtener_dir_cache("pool", clave_abi(interprete))
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self._construyendo = 0
+        self._tarea: Optional[asyncio.Task] = None
+
+    def listos(self) -> List[Path]:
+        return sorted(
+            p for p in self.directorio.iterdir()
+            if p.is_dir() and p.name.startswith("listo-") and python_de_entorno(p).exists()
+        )
+
+    async def _construir_uno(self):
+        temporal = self.directorio / f".tmp-{uuid.uuid4().hex[:8]}"
+        try:
+            # Misma versión de Django que tendrá el esqueleto de los proyectos nuevos
+            version_django = Wheelhouse(self.interprete).version_disponible("django")
+            await PlantillaEntorno(self.interprete, version_django).clonar_en(temporal)
+            listo = self.directorio / f"listo-{uuid.uuid4().hex[:8]}"
+            os.replace(temporal, listo)
+            reubicar_entorno(listo, str(temporal))
+            print(f"Pool: entorno {listo.name} listo")
+        except Exception as e:
+            print(f"Pool: error preparando entorno: {e}")
+        finally:
+            if temporal.exists():
+                shutil.rmtree(temporal, ignore_errors=True)
+
+    async def rellenar(self):
+        """Construye entornos hasta alcanzar el tamaño configurado"""
+        while len(self.listos()) + self._construyendo < self.tamano:
+            self._construyendo += 1
+            try:
+                await self._construir_uno()
+            finally:
+                self._construyendo -= 1
+
+    def programar_relleno(self):
+        """Lanza el relleno en segundo plano si no hay uno en curso"""
+        if self.tamano == 0:
+            return
+        if self._tarea is None or self._tarea.done():
+            self._tarea = asyncio.create_task(self.rellenar())
+
+    def tomar(self, destino: Path, version_django: Optional[str] = None) -> bool:
+        """Mueve un entorno listo (con esa versión de Django, si se indica) al destino.
+        Devuelve False si no hay ninguno. Bloquea (mover y reubicar): desde el event loop
+        se llama con asyncio.to_thread"""
+        destino = Path(destino)
+        for listo in self.listos():
+            if version_django and not misma_serie_django(versiones_instaladas(listo).get("django"), version_django):
+                continue
+            try:
+                # Renombrar es atómico dentro del mismo sistema de archivos
+                os.rename(listo, destino)
+            except FileNotFoundError:
+                continue  # Otro proceso se lo llevó primero
+            except OSError:
+                try:
+                    shutil.move(str(listo), str(destino))
+                except (FileNotFoundError, shutil.Error):
+                    continue
+            reubicar_entorno(destino, str(listo))
+            print(f"Pool: entorno {listo.name} movido a {destino}")
+            return True
+        return False
@@ -0,0 +1,133 @@
+# core/precompilar.py
+import asyncio
+import os
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from core.entorno_capas import site_packages_de
+from core.plantilla_entorno import python_de_entorno
+
+# Lo mismo que importa manage.py antes de ejecutar makemigrations/runserver
+_SCRIPT_ARRANQUE = """
+import time
+inicio = time.perf_counter()
+import django
+django.setup()
+from django.core.management import execute_from_command_line
+from django.core.management.commands import makemigrations, migrate, runserver
+print(time.perf_counter() - inicio)
+"""
+
+# Repeticiones de la medición (se toma la más rápida para quitar ruido)
+REPETICIONES_MEDICION = 2
+
+
+@dataclass
+class InformePrecompilacion:
+    duracion: float = 0.0
+    arranque_antes: Optional[float] = None
+    arranque_despues: Optional[float] = None
+
+    def aceleracion(self) -> Optional[float]:
+        if self.arranque_antes and self.arranque_despues:
+            return self.arranque_antes / self.arranque_despues
+        return None
+
+    def resumen(self) -> str:
+        texto = f"Bytecode compilado en {self.duracion:.1f}s"
+        if self.aceleracion():
+            texto += (f"; arranque de Django {self.arranque_antes:.2f}s -> "
+                      f"{self.arranque_despues:.2f}s (x{self.aceleracion():.1f})")
+        return texto
+
+
+def _bajar_prioridad():
+    try:
+        os.nice(19)
+    except OSError:
+        pass
+
+
+def _opciones_baja_prioridad() -> dict:
+    """Argumentos de subprocess para ejecutar con prioridad idle"""
+    if os.name == "nt":
+        return {"creationflags": subprocess.IDLE_PRIORITY_CLASS}
+    return {"preexec_fn": _bajar_prioridad}
+
+
+def rutas_a_compilar(ruta_entorno: str, ruta_proyecto: str) -> List[Path]:
+    rutas = []
+    try:
+        rutas.append(site_packages_de(Path(ruta_entorno)))
+    except FileNotFoundError:
+        pass
+    # Proyecto completo: paquete de settings, manage.py y el árbol apps/
+    if ruta_proyecto and Path(ruta_proyecto).exists():
+        rutas.append(Path(ruta_proyecto))
+    return rutas
+
+
+async def compilar_bytecode(python_path: str, rutas: List[Path]) -> bool:
+    """Compila a .pyc en paralelo (un worker por núcleo) y con prioridad idle"""
+    rutas = [str(r) for r in rutas if Path(r).exists()]
+    if not rutas:
+        return True
+    proc = await asyncio.create_subprocess_exec(
+        python_path, "-m", "compileall", "-q", "-j", "0", *rutas,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        **_opciones_baja_prioridad()
+    )
+    salida, _ = await proc.communicate()
+    if proc.returncode != 0:
+        # Normalmente archivos de prueba con sintaxis de otras versiones dentro de paquetes
+        print(f"compileall terminó con avisos:\n{salida.decode(errors='replace')[-2000:]}")
+    return proc.returncode == 0
+
+
+async def medir_arranque(python_path: str, ruta_proyecto: str) -> Optional[float]:
+    """Tiempo de importar Django y sus comandos, sin escribir .pyc (-B) para no alterar la medición"""
+    nombre_proyecto = Path(ruta_proyecto).name
+    entorno = dict(os.environ)
+    entorno["DJANGO_SETTINGS_MODULE"] = f"{nombre_proyecto}.settings"
+    mejor = None
+    for _ in range(REPETICIONES_MEDICION):
+        proc = await asyncio.create_subprocess_exec(
+            python_path, "-B", "-c", _SCRIPT_ARRANQUE,
+            cwd=ruta_proyecto,
+            env=entorno,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            print(f"No se pudo medir el arranque: {stderr.decode(errors='replace')[-500:]}")
+            return None
+        try:
+            segundos = float(stdout.decode().strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            return None
+        mejor = segundos if mejor is None else min(mejor, segundos)
+    return mejor
+
+
+async def precompilar_proyecto(ruta_entorno: str, ruta_proyecto: str, medir: bool = True) -> InformePrecompilacion:
+    """Etapa posterior al aprovisionamiento: compila site-packages y el proyecto en segundo plano"""
+    python_path = str(python_de_entorno(Path(ruta_entorno)))
+    informe = InformePrecompilacion()
+
+    if medir:
+        informe.arranque_antes = await medir_arranque(python_path, ruta_proyecto)
+
+    inicio = time.perf_counter()
+    await compilar_bytecode(python_path, rutas_a_compilar(ruta_entorno, ruta_proyecto))
+    informe.duracion = time.perf_counter() - inicio
+
+    if medir:
+        informe.arranque_despues = await medir_arranque(python_path, ruta_proyecto)
+
+    print(informe.resumen())
+    return informe
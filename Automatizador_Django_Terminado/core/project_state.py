@@ -4,6 +4,8 @@ from typing import List, Dict, Optional
 from dataclasses import dataclass, field
 import os
 
+from core.layout_proyecto import ProjectLayout, layout_de
+
 @dataclass
 class ProjectState:
     
@@ -13,9 +15,33 @@ class ProjectState:
     
     database_choice: str = "sqlite"
     
+    # Perfil de SQLite del settings generado: "rendimiento" (WAL y PRAGMAs) o "estandar"
+    perfil_sqlite: str = "rendimiento"
+    
+    # "pool" (entorno pre-calentado), "plantilla" (clonar entorno aprovisionado),
+    # "capas" (venv mínimo sobre un entorno base compartido) o "estandar" (venv + pip)
+    modo_entorno: str = "pool"
+    
+    # Intérprete con el que se crea el venv ("" = el que ejecuta el automatizador);
+    # por defecto el compatible más rápido según core.interpretes
+    interprete: str = ""
+    
+    # Versión de Django del esqueleto ("" si no se conoce); settings.py se genera para ella
+    # sin esperar a que el entorno termine de instalarse
+    version_django: str = ""
+    
     apps_a_crear: List[str] = field(default_factory=list)
     apps_generadas: List[str] = field(default_factory=list)
     
+    # Modo por lotes: modelos en cola ({"app", "nombre", "campos"}) que se aplican
+    # juntos con un solo makemigrations/migrate
+    modo_lote: bool = False
+    modelos_pendientes: List[Dict] = field(default_factory=list)
+    
+    # Mientras el proyecto no se publica, cada app se queda con una sola migración
+    # inicial en lugar de acumular una por cada vez que se redefine un modelo
+    consolidar_migraciones: bool = False
+    
     wizard_states: Dict[str, bool] = field(default_factory=lambda: {
         "carpeta": False,
         "entorno": False,
@@ -27,6 +53,9 @@ class ProjectState:
     
     proceso_servidor: Optional[object] = None
     
+    # Rutas de settings/urls/views resueltas una vez (ver get_layout)
+    layout: Optional[ProjectLayout] = field(default=None, repr=False, compare=False)
+    
     def get_venv_python_path(self) -> Path:
         venv_dir = Path(self.ruta_base) / "venv"
 
@@ -38,6 +67,11 @@ class ProjectState:
     def get_manage_py_path(self) -> Path:
         return Path(self.ruta_proyecto) / "manage.py"
     
+    def get_layout(self) -> ProjectLayout:
+        """Layout del proyecto actual (el mismo objeto que usa DjangoManager: layout_de lo cachea por ruta)"""
+        self.layout = layout_de(self.ruta_proyecto, self.nombre_proyecto)
+        return self.layout
+    
     def is_project_ready(self) -> bool:
         return (
             self.ruta_base and 
@@ -57,6 +91,21 @@ class ProjectState:
         self.apps_a_crear.clear()
         return moved_apps
     
+    def encolar_modelo(self, app_name: str, nombre_tabla: str, campos: List[Dict]) -> bool:
+        """Añade el modelo a la cola; si ya estaba (misma app y nombre) lo reemplaza. True si es nuevo"""
+        modelo = {"app": app_name, "nombre": nombre_tabla, "campos": campos}
+        for i, pendiente in enumerate(self.modelos_pendientes):
+            if pendiente["app"] == app_name and pendiente["nombre"] == nombre_tabla:
+                self.modelos_pendientes[i] = modelo
+                return False
+        self.modelos_pendientes.append(modelo)
+        return True
+    
+    def tomar_modelos_pendientes(self) -> List[Dict]:
+        pendientes = self.modelos_pendientes.copy()
+        self.modelos_pendientes.clear()
+        return pendientes
+    
     def update_wizard_step(self, step: str, completed: bool = True):
         if step in self.wizard_states:
             self.wizard_states[step] = completed
@@ -0,0 +1,21 @@
+# core/rutas_cache.py
+from pathlib import Path
+import os
+
+# Permite mover toda la caché del automatizador (wheelhouse, plantillas, etc.)
+CACHE_ENV_VAR = "AUTOMATIZADOR_CACHE_DIR"
+
+
+def obtener_dir_cache(*partes: str) -> Path:
+    """Devuelve (y crea) un subdirectorio dentro de la caché del automatizador"""
+    raiz = os.environ.get(CACHE_ENV_VAR)
+    if raiz:
+        base = Path(raiz)
+    elif os.name == "nt":
+        base = Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local")) / "Automatizador_Django"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "automatizador_django"
+
+    directorio = base.joinpath(*partes)
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
@@ -0,0 +1,80 @@
+# core/secciones_crud.py
+#
+# views.py, forms.py y urls.py de una app llevan el CRUD de todos sus modelos, cada uno entre
+# dos marcas con la huella de su definición en models.py:
+#
+#   # >>> crud Producto 1a2b3c4d5e6f
+#   ...
+#   # <<< crud Producto
+#
+# Al regenerar, la sección de un modelo cuya huella no cambió se conserva tal cual (con lo
+# que se haya retocado dentro) y solo se vuelven a escribir las de los modelos que cambiaron.
+import ast
+import hashlib
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from core.editor_fuente import abrir
+from core.escritura import existe, leer_texto
+
+_APERTURA = re.compile(r"^[ \t]*# >>> crud (\w+) ([0-9a-f]+)[ \t]*$", re.MULTILINE)
+
+
+def _es_modelo(clase: ast.ClassDef) -> bool:
+    return any(ast.unparse(base) in ("models.Model", "Model") for base in clase.bases)
+
+
+def modelos_de_app(models_path: Path) -> List[Tuple[str, str]]:
+    """(modelo, huella) de cada modelo de models.py, en el orden del archivo.
+
+    La huella sale del código de la clase normalizado por ast: cambia con los campos o su
+    Meta, no con comentarios ni espacios.
+    """
+    if not existe(models_path):
+        return []
+    modelos = []
+    for nodo in abrir(models_path).arbol.body:
+        if isinstance(nodo, ast.ClassDef) and _es_modelo(nodo):
+            huella = hashlib.sha256(ast.unparse(nodo).encode("utf-8")).hexdigest()[:12]
+            modelos.append((nodo.name, huella))
+    return modelos
+
+
+def leer_secciones(texto: str) -> Dict[str, Tuple[str, str]]:
+    """modelo -> (huella, texto de la sección con sus marcas y su salto de línea final)"""
+    secciones = {}
+    for apertura in _APERTURA.finditer(texto):
+        modelo = apertura.group(1)
+        cierre = re.compile(rf"^[ \t]*# <<< crud {modelo}[ \t]*$\n?", re.MULTILINE).search(texto, apertura.end())
+        if cierre is None:
+            continue
+        secciones[modelo] = (apertura.group(2), texto[apertura.start():cierre.end()])
+    return secciones
+
+
+def seccion(modelo: str, huella: str, codigo: str, sangria: str = "") -> str:
+    """Código de un modelo entre sus marcas"""
+    if not codigo.endswith("\n"):
+        codigo += "\n"
+    return f"{sangria}# >>> crud {modelo} {huella}\n{codigo}{sangria}# <<< crud {modelo}\n"
+
+
+def componer(ruta: Path, cabecera: str, modelos: List[Tuple[str, str]],
+             generar: Callable[[str, str], str], pie: str = "", separador: str = "\n") -> Tuple[str, List[str]]:
+    """Contenido del archivo: cabecera + una sección por modelo + pie.
+
+    generar(modelo, huella) devuelve la sección de un modelo (ya con sus marcas); solo se llama
+    para los que no tienen en el archivo actual una sección con la misma huella.
+    Devuelve (contenido, modelos regenerados).
+    """
+    anteriores = leer_secciones(leer_texto(ruta)) if existe(ruta) else {}
+    partes, regenerados = [], []
+    for modelo, huella in modelos:
+        anterior = anteriores.get(modelo)
+        if anterior is not None and anterior[0] == huella:
+            partes.append(anterior[1])
+        else:
+            partes.append(generar(modelo, huella))
+            regenerados.append(modelo)
+    return cabecera + separador.join(partes) + pie, regenerados
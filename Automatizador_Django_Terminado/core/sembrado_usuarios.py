@@ -0,0 +1,77 @@
+# core/sembrado_usuarios.py
+#
+# Alta masiva de usuarios y grupos (p.ej. para pruebas de carga del admin) en una sola
+# orden al worker de Django: hashes en un pool de hilos y bulk_create en una transacción.
+import csv
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.django_worker import ejecutar_en_proyecto
+
+# Columnas del CSV; solo username y password son obligatorias. Los grupos van separados por ";"
+COLUMNAS_CSV = ["username", "email", "password", "grupos", "is_staff"]
+_VERDADERO = {"1", "si", "sí", "true", "yes", "x"}
+
+
+def leer_csv_usuarios(ruta: Path) -> List[Dict]:
+    """Usuarios de un CSV con cabecera (ver COLUMNAS_CSV). Lanza ValueError si falta algo"""
+    usuarios = []
+    with open(ruta, "r", encoding="utf-8-sig", newline="") as f:
+        lector = csv.DictReader(f)
+        faltan = {"username", "password"} - set(lector.fieldnames or [])
+        if faltan:
+            raise ValueError(f"Faltan columnas en el CSV: {', '.join(sorted(faltan))}")
+        for numero, fila in enumerate(lector, start=2):
+            username = (fila.get("username") or "").strip()
+            password = fila.get("password") or ""
+            if not username or not password:
+                raise ValueError(f"Línea {numero}: username y password son obligatorios")
+            usuarios.append({
+                "username": username,
+                "email": (fila.get("email") or "").strip(),
+                "password": password,
+                "grupos": [g.strip() for g in (fila.get("grupos") or "").split(";") if g.strip()],
+                "is_staff": (fila.get("is_staff") or "").strip().lower() in _VERDADERO,
+            })
+    return usuarios
+
+
+def generar_usuarios(cantidad: int, password: str, prefijo: str = "usuario",
+                     grupos: Optional[List[str]] = None) -> List[Dict]:
+    """usuario0001, usuario0002... con la misma contraseña"""
+    ancho = max(4, len(str(cantidad)))
+    return [
+        {
+            "username": f"{prefijo}{i:0{ancho}d}",
+            "email": f"{prefijo}{i:0{ancho}d}@proyecto.local",
+            "password": password,
+            "grupos": list(grupos or []),
+            "is_staff": False,
+        }
+        for i in range(1, cantidad + 1)
+    ]
+
+
+def sembrar_usuarios(venv_python: str, project_path: str, usuarios: List[Dict], hash_unico: bool = False,
+                     hilos: Optional[int] = None) -> Dict:
+    """Crea los usuarios en el proyecto. Devuelve {"success", "datos", "error"}; datos trae los tiempos"""
+    if not usuarios:
+        return {"success": False, "datos": {}, "error": "No hay usuarios que crear"}
+    # Sin timeout (ORDENES_SIN_TIMEOUT): el coste crece con el número de usuarios y el hasher
+    resultado = ejecutar_en_proyecto(
+        venv_python, project_path, "sembrar_usuarios",
+        usuarios=usuarios, hash_unico=hash_unico, hilos=hilos
+    )
+    if not resultado["ok"]:
+        return {"success": False, "datos": {}, "error": resultado.get("error")}
+    datos = resultado.get("datos", {})
+    print(informe(datos))
+    return {"success": True, "datos": datos, "error": None}
+
+
+def informe(datos: Dict) -> str:
+    return (
+        f"{datos['creados']} usuarios creados ({datos['existentes']} ya existían, {datos['grupos']} grupos) "
+        f"en {datos['segundos']:.2f}s: {datos['por_segundo']:.0f} usuarios/s "
+        f"(hashes {datos['segundos_hash']:.2f}s con {datos['hilos']} hilos, inserción {datos['segundos_insercion']:.2f}s)"
+    )
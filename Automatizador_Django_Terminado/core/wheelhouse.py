@@ -0,0 +1,232 @@
+# core/wheelhouse.py
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from core.pip_progreso import ProgresoPip, ejecutar_pip, version_pip
+from core.rutas_cache import obtener_dir_cache
+
+# Directorio con wheels que se importa al wheelhouse la primera vez que se usa
+# (útil en máquinas sin red: se copia ahí un wheelhouse generado en otro equipo)
+WHEELHOUSE_SEED_ENV_VAR = "AUTOMATIZADOR_WHEELHOUSE"
+
+_EXTENSIONES = (".whl", ".tar.gz", ".zip")
+_SCRIPT_ABI = (
+    "import sys, sysconfig; "
+    "print(sys.implementation.cache_tag + '-' + sysconfig.get_platform())"
+)
+
+_claves_abi: Dict[str, str] = {}
+_semilla_importada = False
+
+
+def _normalizar_nombre(nombre: str) -> str:
+    return re.sub(r"[-_.]+", "_", nombre).lower()
+
+
+def _parsear_requisito(requisito: str):
+    """Devuelve (nombre_normalizado, version_fijada) de un requisito tipo 'Django==5.1'"""
+    match = re.match(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)(?:\[[^\]]*\])?\s*(?:==\s*([^\s;,]+))?", requisito)
+    if not match:
+        return _normalizar_nombre(requisito), None
+    return _normalizar_nombre(match.group(1)), match.group(2)
+
+
+def _parsear_archivo(nombre_archivo: str):
+    """Devuelve (nombre_normalizado, version) de un wheel o sdist"""
+    for extension in _EXTENSIONES:
+        if nombre_archivo.endswith(extension):
+            base = nombre_archivo[:-len(extension)]
+            break
+    else:
+        return None, None
+    partes = base.split("-")
+    if len(partes) < 2:
+        return None, None
+    if extension == ".whl":
+        return _normalizar_nombre(partes[0]), partes[1]
+    # sdist: el nombre puede contener guiones, la versión es la última parte
+    return _normalizar_nombre("-".join(partes[:-1])), partes[-1]
+
+
+def clave_abi(python_path: str) -> str:
+    """Clave del wheelhouse para un intérprete: etiqueta de caché + plataforma"""
+    ruta = str(python_path)
+    if ruta in _claves_abi:
+        return _claves_abi[ruta]
+
+    try:
+        mismo_interprete = Path(ruta).resolve() == Path(sys.executable).resolve()
+    except OSError:
+        mismo_interprete = False
+
+    if mismo_interprete or not Path(ruta).exists():
+        import sysconfig
+        clave = f"{sys.implementation.cache_tag}-{sysconfig.get_platform()}"
+    else:
+        resultado = subprocess.run([ruta, "-c", _SCRIPT_ABI], capture_output=True, text=True)
+        clave = resultado.stdout.strip() if resultado.returncode == 0 else "desconocido"
+
+    clave = re.sub(r"[^A-Za-z0-9_-]", "_", clave)
+    _claves_abi[ruta] = clave
+    return clave
+
+
+def _ruta_estadisticas() -> Path:
+    return obtener_dir_cache("wheelhouse") / "estadisticas.json"
+
+
+def leer_estadisticas() -> Dict[str, int]:
+    """Aciertos/fallos acumulados de todas las instalaciones"""
+    try:
+        with open(_ruta_estadisticas(), "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        return {"aciertos": int(datos.get("aciertos", 0)), "fallos": int(datos.get("fallos", 0))}
+    except (OSError, ValueError):
+        return {"aciertos": 0, "fallos": 0}
+
+
+def _registrar_resultado(acierto: bool):
+    stats = leer_estadisticas()
+    stats["aciertos" if acierto else "fallos"] += 1
+    ruta = _ruta_estadisticas()
+    temporal = ruta.with_suffix(".tmp")
+    try:
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(stats, f)
+        os.replace(temporal, ruta)
+    except OSError as e:
+        print(f"No se pudieron guardar las estadísticas del wheelhouse: {e}")
+
+
+class Wheelhouse:
+    """Caché local de wheels por ABI del intérprete, usada por todas las instalaciones con pip"""
+
+    def __init__(self, python_path: str, raiz: Optional[Path] = None, compilar: bool = True):
+        self.python_path = str(python_path)
+        # compilar=False deja los .pyc para core.precompilar (en paralelo y en segundo plano)
+        self.compilar = compilar
+        raiz = Path(raiz) if raiz else obtener_dir_cache("wheelhouse")
+        self.directorio = raiz / clave_abi(self.python_path)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self._importar_semilla()
+
+    def _importar_semilla(self):
+        global _semilla_importada
+        semilla = os.environ.get(WHEELHOUSE_SEED_ENV_VAR)
+        if semilla and not _semilla_importada:
+            _semilla_importada = True
+            copiados = self.importar_desde(semilla)
+            print(f"Wheelhouse: {copiados} archivos importados desde {semilla}")
+
+    def importar_desde(self, directorio: str) -> int:
+        """Copia al wheelhouse los wheels/sdists de un directorio existente"""
+        origen = Path(directorio)
+        if not origen.is_dir():
+            print(f"Wheelhouse: el directorio {directorio} no existe")
+            return 0
+        copiados = 0
+        for archivo in origen.iterdir():
+            if archivo.is_file() and archivo.name.endswith(_EXTENSIONES):
+                destino = self.directorio / archivo.name
+                if not destino.exists():
+                    shutil.copy2(archivo, destino)
+                    copiados += 1
+        return copiados
+
+    def archivos(self) -> List[Path]:
+        return [a for a in self.directorio.iterdir() if a.name.endswith(_EXTENSIONES)]
+
+    def esta_caliente(self, paquetes: List[str]) -> bool:
+        """True si hay en el wheelhouse un archivo para cada paquete pedido"""
+        disponibles = {}
+        for archivo in self.archivos():
+            nombre, version = _parsear_archivo(archivo.name)
+            if nombre:
+                disponibles.setdefault(nombre, set()).add(version)
+
+        for paquete in paquetes:
+            nombre, version = _parsear_requisito(paquete)
+            if nombre not in disponibles:
+                return False
+            if version and version not in disponibles[nombre]:
+                return False
+        return True
+
+    def version_disponible(self, paquete: str) -> Optional[str]:
+        """Versión más alta de un paquete presente en el wheelhouse (None si no hay)"""
+        buscado, _ = _parsear_requisito(paquete)
+        versiones = []
+        for archivo in self.archivos():
+            nombre, version = _parsear_archivo(archivo.name)
+            if nombre == buscado and version:
+                clave = tuple(int(p) if p.isdigit() else 0 for p in re.split(r"[.+-]", version))
+                versiones.append((clave, version))
+        return max(versiones)[1] if versiones else None
+
+    def _cmd_instalar_offline(self, paquetes: List[str]) -> List[str]:
+        return [
+            self.python_path, "-m", "pip", "install",
+            "--no-index", "--find-links", str(self.directorio),
+            *self._opciones_compilar(), *paquetes
+        ]
+
+    def _cmd_instalar_lock(self, ruta_lock: Path) -> List[str]:
+        # El lock ya contiene todas las dependencias: pip solo verifica hashes e instala
+        return [
+            self.python_path, "-m", "pip", "install",
+            "--no-index", "--find-links", str(self.directorio),
+            "--require-hashes", "--no-deps", *self._opciones_compilar(), "-r", str(ruta_lock)
+        ]
+
+    def _opciones_compilar(self) -> List[str]:
+        return [] if self.compilar else ["--no-compile"]
+
+    def _opciones_progreso(self) -> List[str]:
+        # pip >= 24.1 puede emitir el progreso de descarga como líneas "Progress X of Y"
+        version = version_pip(self.python_path)
+        return ["--progress-bar", "raw"] if version and version >= (24, 1) else []
+
+    def _cmd_descargar(self, paquetes: List[str]) -> List[str]:
+        return [
+            self.python_path, "-m", "pip", "download", "--dest", str(self.directorio),
+            *self._opciones_progreso(), *paquetes
+        ]
+
+    def _cmd_instalar_online(self, paquetes: List[str]) -> List[str]:
+        return [
+            self.python_path, "-m", "pip", "install",
+            *self._opciones_progreso(), *self._opciones_compilar(), *paquetes
+        ]
+
+    async def _ejecutar(self, cmd: List[str], progreso: Optional[Callable[[ProgresoPip], None]] = None) -> bool:
+        codigo, cola = await ejecutar_pip(cmd, progreso)
+        if codigo != 0:
+            print(f"Error ejecutando {' '.join(cmd[2:4])}:\n{cola}")
+        return codigo == 0
+
+    async def instalar(self, paquetes: List[str], progreso: Optional[Callable[[ProgresoPip], None]] = None) -> bool:
+        """Instala paquetes desde el wheelhouse; si falta algo lo descarga primero"""
+        if self.esta_caliente(paquetes) and await self._ejecutar(self._cmd_instalar_offline(paquetes), progreso):
+            _registrar_resultado(True)
+            print(f"Wheelhouse: {', '.join(paquetes)} instalado sin red")
+            return True
+
+        _registrar_resultado(False)
+        print(f"Wheelhouse: descargando {', '.join(paquetes)}...")
+        if await self._ejecutar(self._cmd_descargar(paquetes), progreso):
+            if await self._ejecutar(self._cmd_instalar_offline(paquetes), progreso):
+                return True
+        # Último recurso: instalación normal contra el índice
+        return await self._ejecutar(self._cmd_instalar_online(paquetes), progreso)
+
+    async def instalar_lock(self, ruta_lock: Path, progreso: Optional[Callable[[ProgresoPip], None]] = None) -> bool:
+        """Instala exactamente lo fijado en un lock con hashes (core.lock_dependencias)"""
+        correcto = await self._ejecutar(self._cmd_instalar_lock(ruta_lock), progreso)
+        _registrar_resultado(correcto)
+        return correcto
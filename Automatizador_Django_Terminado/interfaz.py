@@ -2,10 +2,20 @@ import asyncio
 import threading
 import flet as ft
 from core.crear_carpeta import FolderCreatorLogic
-from core.crear_entorno import crear_entorno_virtual, instalar_psycopg2_sync
+from core.crear_entorno import (
+    crear_entorno_virtual, esperar_entorno, iniciar_instalacion_driver, esperar_driver, version_django_de
+)
+from core.wheelhouse import leer_estadisticas
+from core.pool_entornos import PoolEntornos
+from core.precompilar import precompilar_proyecto, compilar_bytecode
+from core.interpretes import descubrir_interpretes, evaluar_interpretes, mejor_interprete
 from core.django_manager import DjangoManager
+from core.django_worker import ejecutar_en_proyecto, detener_workers
 from core.bd_config import DatabaseConfig
 from core.project_state import ProjectState 
+from core.historial_migraciones import leer_historial
+from core.layout_proyecto import invalidar_layout
+from core.sembrado_usuarios import generar_usuarios, informe, leer_csv_usuarios, sembrar_usuarios
 from pathlib import Path
 import subprocess
 import os
@@ -211,6 +221,8 @@ class UI:
         self.logic = FolderCreatorLogic(page)
         self.db_config = DatabaseConfig("Mi_proyecto")
         self.django_manager = DjangoManager()
+        # Entornos pre-calentados en segundo plano desde el arranque
+        self.pool_entornos = PoolEntornos()
         
         # Contenedor de error centrado
         self.error_overlay = ft.Container(
@@ -275,6 +287,29 @@ class UI:
             color=ft.Colors.GREY_700
         )
         
+        self.dd_modo_entorno = ft.Dropdown(
+            label="Modo de creación",
+            width=200,
+            options=[
+                ft.dropdown.Option(key="pool", text="Pool pre-calentado"),
+                ft.dropdown.Option(key="plantilla", text="Clonar plantilla"),
+                ft.dropdown.Option(key="capas", text="Capas sobre entorno base"),
+                ft.dropdown.Option(key="estandar", text="Estándar (venv + pip)")
+            ],
+            value="pool",
+            on_change=self.actualiza_modo_entorno
+        )
+
+        # Intérpretes de Python detectados (se rellena en segundo plano con su benchmark)
+        self.dd_interprete = ft.Dropdown(
+            label="Intérprete",
+            width=200,
+            options=[],
+            hint_text="Detectando...",
+            on_change=self.actualiza_interprete
+        )
+        self._interprete_elegido = False
+        
         self.txt_tabla = ft.TextField(
             label="Ingresa el nombre de la tabla",
             width=280,
@@ -329,6 +364,31 @@ class UI:
         self.txt_admin_email = ft.TextField(label="Email (opcional)", width=200, value="admin@proyecto.local", on_change=self.valida_email_admin)
         self.txt_admin_pass = ft.TextField(label="Contraseña", password=True, width=200, on_change=self.valida_password_admin)
 
+        # Alta masiva de usuarios de prueba (cantidad o CSV) en una sola orden al worker
+        self.txt_cantidad_usuarios = ft.TextField(label="Usuarios", width=95, value="1000",
+                                                  keyboard_type=ft.KeyboardType.NUMBER)
+        self.txt_pass_usuarios = ft.TextField(label="Contraseña", password=True, width=150)
+        self.chk_hash_unico = ft.Checkbox(label="Mismo hash para todos (solo pruebas)", value=False)
+        self.btn_sembrar_usuarios = ft.ElevatedButton(
+            "Crear usuarios",
+            icon=ft.Icons.GROUP_ADD,
+            on_click=self.sembrar_usuarios_h,
+            style=ft.ButtonStyle(
+                side=ft.BorderSide(1, ft.Colors.BLACK)
+            )
+        )
+        self.btn_csv_usuarios = ft.ElevatedButton(
+            "Desde CSV",
+            icon=ft.Icons.UPLOAD_FILE,
+            on_click=lambda e: self.picker_csv_usuarios.pick_files(allowed_extensions=["csv"]),
+            style=ft.ButtonStyle(
+                side=ft.BorderSide(1, ft.Colors.BLACK)
+            )
+        )
+        self.picker_csv_usuarios = ft.FilePicker(on_result=self._csv_usuarios_elegido)
+        page.overlay.append(self.picker_csv_usuarios)
+        self.txt_resultado_sembrado = ft.Text("", size=12)
+
         # Campos para configuración PostgreSQL
         self.txt_db_name = ft.TextField(
             label="Nombre de la base de datos",
@@ -366,6 +426,12 @@ class UI:
             on_change=self.validar_campo_postgres
         )
 
+        # Reutilización de conexiones en el settings generado
+        self.chk_pool_postgres = ft.Checkbox(
+            label="Pool de conexiones (psycopg 3)",
+            value=True
+        )
+
         # Contenedor para campos PostgreSQL (inicialmente oculto)
         self.postgres_fields_container = ft.Container(
             content=ft.Column(
@@ -379,7 +445,8 @@ class UI:
                         ], spacing=8),
                         ft.Column([
                             self.txt_db_host,
-                            self.txt_db_port
+                            self.txt_db_port,
+                            self.chk_pool_postgres
                         ], spacing=8)
                     ], spacing=20)
                 ],
@@ -399,6 +466,21 @@ class UI:
             on_change=self.actualiza_bd_check
         )
 
+        # Perfil de rendimiento de SQLite (WAL, PRAGMAs y transacciones IMMEDIATE)
+        self.chk_perfil_sqlite = ft.Checkbox(
+            label="Perfil de rendimiento SQLite (WAL)",
+            value=True,
+            on_change=self.actualiza_perfil_sqlite
+        )
+
+        # Estado de la instalación en segundo plano del driver de PostgreSQL
+        self.chip_driver_bd = ft.Chip(
+            label=ft.Text("", size=12),
+            bgcolor=ft.Colors.AMBER_100,
+            visible=False
+        )
+        self._tarea_driver_bd = None
+
         self.btn_crear_su = ft.ElevatedButton(
             "Crear Superusuario",
             icon=ft.Icons.PERSON_ADD,
@@ -454,6 +536,22 @@ class UI:
             visible=False
         )
 
+        # Estadísticas de aciertos/fallos del wheelhouse local
+        self.lbl_wheelhouse = ft.Text(
+            "",
+            style=ft.TextThemeStyle.BODY_SMALL,
+            color=ft.Colors.BLACK,
+            visible=False
+        )
+
+        # Resultado de la precompilación de bytecode (aceleración del arranque)
+        self.lbl_precompilacion = ft.Text(
+            "",
+            style=ft.TextThemeStyle.BODY_SMALL,
+            color=ft.Colors.BLACK,
+            visible=False
+        )
+
         self.panel_tablas = self._crear_panel_tablas()
 
         self.contenedor1 = ft.Container(
@@ -553,13 +651,15 @@ class UI:
                                 controls=[
                                     ft.Container(
                                         expand=True,
-                                        height=180,
+                                        height=300,
                                         content=ft.Column(
                                             controls=[
                                                 ft.Text("Ingresa el nombre de tu entorno virtual", weight=ft.FontWeight.BOLD),
                                                 self.txt_entorno,
                                                 ft.Text("Ingresa el nombre del proyecto Django", weight=ft.FontWeight.BOLD),
-                                                self.txt_nombre_proyecto
+                                                self.txt_nombre_proyecto,
+                                                self.dd_modo_entorno,
+                                                self.dd_interprete
                                             ],
                                             spacing=5
                                         ),
@@ -574,6 +674,14 @@ class UI:
                                                     content=self.lbl_estado_entorno,
                                                     padding=ft.padding.only(top=10),
                                                     alignment=ft.alignment.center
+                                                ),
+                                                ft.Container(
+                                                    content=self.lbl_wheelhouse,
+                                                    alignment=ft.alignment.center
+                                                ),
+                                                ft.Container(
+                                                    content=self.lbl_precompilacion,
+                                                    alignment=ft.alignment.center
                                                 )
                                             ],
                                             horizontal_alignment=ft.CrossAxisAlignment.CENTER
@@ -616,13 +724,17 @@ class UI:
                         controls=[
                             ft.Container(
                                 expand=True,
-                                height=180,
+                                height=220,
                                 content=ft.Column(
                                     controls=[
                                         ft.Text("Seleccione que tipo de base de datos usar:", size=16, weight=ft.FontWeight.BOLD),
                                         
                                         self.selec_bd_radio,
                                         
+                                        self.chk_perfil_sqlite,
+                                        
+                                        self.chip_driver_bd,
+                                        
                                         # Contenedor de campos PostgreSQL (se muestra/oculta dinámicamente)
                                         self.postgres_fields_container
                                     ],
@@ -755,7 +867,19 @@ class UI:
                             self.btn_crear_su
                         ],
                         spacing=15
-                    )        
+                    ),
+                    # Usuarios de prueba en bloque (username,email,password,grupos,is_staff en el CSV)
+                    ft.Divider(height=1, color="black"),
+                    ft.Row(
+                        controls=[self.txt_cantidad_usuarios, self.txt_pass_usuarios],
+                        spacing=10
+                    ),
+                    self.chk_hash_unico,
+                    ft.Row(
+                        controls=[self.btn_sembrar_usuarios, self.btn_csv_usuarios],
+                        spacing=10
+                    ),
+                    self.txt_resultado_sembrado
                 ],
                 expand=True
             )
@@ -1072,30 +1196,37 @@ class UI:
             
             self.state.nombre_proyecto = nombre_proyecto
             
-            # Cambiar mensaje durante la instalación
-            self.lbl_estado_entorno.value = "Descargando Django..."
+            # Cambiar mensaje mientras se genera el proyecto
+            self.lbl_estado_entorno.value = "Creando proyecto Django..."
             self.page.update()
             
             resultado = await crear_entorno_virtual(
                 nombre_entorno,
                 self.state.ruta_base,
-                nombre_proyecto
+                nombre_proyecto,
+                modo=self.state.modo_entorno,
+                pool=self.pool_entornos,
+                progreso=self._mostrar_progreso_pip,
+                interprete=self.state.interprete or None
             )
             
-            # Mensaje final de configuración
-            self.lbl_estado_entorno.value = "Configurando proyecto..."
-            self.page.update()
-            
             print(resultado)
+            if resultado.startswith("Error"):
+                raise Exception(resultado)
+            
             self.state.ruta_proyecto = str(Path(self.state.ruta_base) / nombre_proyecto)
+            self.state.version_django = version_django_de(self.state.ruta_proyecto) or ""
+            # Resolver settings/urls/views una vez; DjangoManager reutiliza el mismo layout
+            self.state.get_layout()
             self.state.update_wizard_step("entorno", True)
             
             # Estado final: botón completado y ocultar texto
             self.btn_aceptar_entorno.bgcolor = ft.Colors.GREY_600
             self.btn_aceptar_entorno.content = ft.Text("COMPLETADO", color="white", size=12)
-            self.lbl_estado_entorno.visible = False
+            self.lbl_estado_entorno.value = "Instalando Django en segundo plano..."
             
             self._refresh_wizard_ui()
+            self.page.run_task(self._vigilar_instalacion_entorno)
             
         except Exception as ex:
             # En caso de error, restaurar estado original
@@ -1116,7 +1247,84 @@ class UI:
             else:
                 self.mostrar_error_entorno(f"Error: Error durante la instalación: {error_msg}")
 
-    def actualiza_bd_check(self, e):
+    def _mostrar_progreso_pip(self, progreso):
+        # Llamado por el lector de pip (ya limitado en frecuencia)
+        self.lbl_estado_entorno.value = progreso.resumen()
+        self.lbl_estado_entorno.visible = True
+        self.page.update()
+
+    async def _vigilar_instalacion_entorno(self):
+        # Oculta el aviso de instalación cuando el entorno termina en segundo plano
+        venv_path = str(Path(self.state.ruta_base) / "venv")
+        try:
+            await esperar_entorno(venv_path)
+            self.lbl_estado_entorno.visible = False
+            self._actualizar_estadisticas_wheelhouse()
+        except Exception as ex:
+            self.lbl_estado_entorno.visible = False
+            self.mostrar_error_entorno(f"Error: Error durante la instalación: {ex}")
+            return
+
+        # Etapa posterior: .pyc de site-packages y del proyecto para que el primer
+        # makemigrations/runserver no tenga que compilarlos
+        try:
+            informe = await precompilar_proyecto(venv_path, self.state.ruta_proyecto)
+            self.lbl_precompilacion.value = informe.resumen()
+            self.lbl_precompilacion.visible = True
+            self.page.update()
+        except Exception as ex:
+            print(f"Error precompilando bytecode: {ex}")
+
+    def _actualizar_estadisticas_wheelhouse(self):
+        stats = leer_estadisticas()
+        self.lbl_wheelhouse.value = f"Wheelhouse: {stats['aciertos']} aciertos / {stats['fallos']} fallos"
+        self.lbl_wheelhouse.visible = True
+        self.page.update()
+
+    def actualiza_modo_entorno(self, e):
+        self.state.modo_entorno = e.control.value
+        print(f"Modo de creación del entorno: {self.state.modo_entorno}")
+
+    def actualiza_interprete(self, e):
+        self.state.interprete = e.control.value
+        self._interprete_elegido = True
+        print(f"Intérprete para el entorno: {self.state.interprete}")
+        self._usar_pool_de(self.state.interprete)
+
+    def _usar_pool_de(self, interprete: str):
+        # El pool pre-calentado tiene que ser del mismo intérprete que el proyecto
+        if self.pool_entornos.interprete != interprete:
+            self.pool_entornos = PoolEntornos(interprete=interprete)
+            self.page.run_task(self.pool_entornos.rellenar)
+
+    def _cargar_interpretes(self, interpretes):
+        self.dd_interprete.options = [
+            ft.dropdown.Option(key=i.ruta, text=i.descripcion(), disabled=not i.compatible())
+            for i in interpretes
+        ]
+        self.page.update()
+
+    async def preparar_entornos(self):
+        """Detecta y mide los intérpretes, elige el más rápido y rellena su pool"""
+        try:
+            self._cargar_interpretes(await descubrir_interpretes())
+            interpretes = await evaluar_interpretes()
+            self._cargar_interpretes(interpretes)
+            mejor = mejor_interprete(interpretes)
+            if mejor and not self._interprete_elegido:
+                self.state.interprete = mejor.ruta
+                self.dd_interprete.value = mejor.ruta
+                self.page.update()
+                print(f"Intérprete más rápido: {mejor.descripcion()} ({mejor.ruta})")
+        except Exception as ex:
+            print(f"Error detectando intérpretes: {ex}")
+        if self.state.interprete and self.pool_entornos.interprete != self.state.interprete:
+            self.pool_entornos = PoolEntornos(interprete=self.state.interprete)
+        await self.pool_entornos.rellenar()
+
+    async def actualiza_bd_check(self, e):
+        # async: Flet ejecuta los handlers síncronos en un hilo sin event loop y la
+        # instalación del driver necesita crear su tarea en el loop de la página
         self.state.database_choice = e.control.value
         
         # Mostrar/ocultar campos PostgreSQL según la selección
@@ -1124,12 +1332,59 @@ class UI:
             self.postgres_fields_container.visible = True
         else:
             self.postgres_fields_container.visible = False
+        self.chk_perfil_sqlite.visible = e.control.value == "sqlite"
+        
+        # Empezar a instalar el driver ya, en paralelo con el resto del asistente
+        if e.control.value == "postgres":
+            self._iniciar_driver_postgres()
+        else:
+            self.chip_driver_bd.visible = False
         
         # Actualizar la UI
         self.page.update()
         print(f"Base de datos seleccionada: {self.state.database_choice}")
 
-    def guarda_bd_config(self, e):
+    def actualiza_perfil_sqlite(self, e):
+        self.state.perfil_sqlite = "rendimiento" if e.control.value else "estandar"
+
+    def _iniciar_driver_postgres(self):
+        if not self.state.ruta_base or not self.state.wizard_states["entorno"]:
+            return  # Aún no hay entorno: se lanzará al guardar la configuración
+        venv_path = str(Path(self.state.ruta_base) / "venv")
+        tarea = iniciar_instalacion_driver(venv_path, self._mostrar_progreso_driver, self.state.ruta_proyecto)
+        if tarea is self._tarea_driver_bd:
+            return
+        self._tarea_driver_bd = tarea
+        self._mostrar_estado_driver("Driver PostgreSQL: instalando...", ft.Colors.AMBER_100)
+        tarea.add_done_callback(self._driver_postgres_terminado)
+
+    def _mostrar_progreso_driver(self, progreso):
+        self._mostrar_estado_driver(f"Driver PostgreSQL: {progreso.resumen()}", ft.Colors.AMBER_100)
+
+    def _driver_postgres_terminado(self, tarea):
+        correcto = not tarea.cancelled() and tarea.exception() is None and tarea.result()
+        if correcto:
+            self._mostrar_estado_driver("Driver PostgreSQL: listo", ft.Colors.GREEN_100)
+        else:
+            self._mostrar_estado_driver("Driver PostgreSQL: error al instalar", ft.Colors.RED_100)
+        self._actualizar_estadisticas_wheelhouse()
+
+    def _mostrar_estado_driver(self, texto: str, color):
+        self.chip_driver_bd.label.value = texto
+        self.chip_driver_bd.bgcolor = color
+        self.chip_driver_bd.visible = True
+        self.page.update()
+
+    async def _esperar_driver_bd(self, contexto: str) -> bool:
+        # Solo el primer migrate llega a esperar de verdad; después la tarea ya terminó
+        if self.state.database_choice != "postgres":
+            return True
+        if not await esperar_driver(str(Path(self.state.ruta_base) / "venv")):
+            self.mostrar_error("Error: Error al instalar el driver de PostgreSQL. Verifica tu conexión a internet.", contexto)
+            return False
+        return True
+
+    async def guarda_bd_config(self, e):
         # Verificar si hay errores activos antes de proceder
         if self.error_overlay.visible:
             print("No se puede guardar configuración BD: hay errores de validación activos")
@@ -1178,7 +1433,8 @@ class UI:
                     user=self.txt_db_user.value.strip(),
                     password=self.txt_db_password.value,  # Puede estar vacío
                     host=self.txt_db_host.value.strip(),
-                    port=self.txt_db_port.value.strip()
+                    port=self.txt_db_port.value.strip(),
+                    pool=self.chk_pool_postgres.value
                 )
             
             # Actualizar nombre del proyecto en db_config
@@ -1186,20 +1442,15 @@ class UI:
             
             # Guardar tipo de base de datos
             self.db_config.set_database_type(self.state.database_choice)
+            self.db_config.sqlite_profile = self.state.perfil_sqlite
+            # La del esqueleto: el requirements.txt aún no existe mientras el entorno se instala
+            self.db_config.set_django_version(self.state.version_django)
             
-            # Instalar psycopg2 si se selecciona PostgreSQL
+            # Instalar el driver en segundo plano si se selecciona PostgreSQL
+            # (solo el primer migrate espera a que termine)
             if self.state.database_choice == "postgres" and self.state.ruta_base:
-                venv_path = str(Path(self.state.ruta_base) / "venv")
-                print("Instalando driver de PostgreSQL...")
-                try:
-                    success = instalar_psycopg2_sync(venv_path)
-                    if not success:
-                        self.mostrar_error_entorno("Error: Error al instalar el driver de PostgreSQL. Verifica tu conexión a internet.")
-                        return
-                except Exception as e:
-                    print(f"Error instalando psycopg2: {e}")
-                    self.mostrar_error_entorno("Error: Error al instalar el driver de PostgreSQL.")
-                    return
+                print("Instalando driver de PostgreSQL en segundo plano...")
+                self._iniciar_driver_postgres()
             
             # Generar/actualizar settings.py con la nueva configuración
             if self.state.ruta_proyecto:
@@ -1303,14 +1554,28 @@ class UI:
             if len(nombres_campos) != len(set([n.lower() for n in nombres_campos])):
                 self.mostrar_error("Error: Tienes campos con nombres duplicados. Cada campo debe tener un nombre único.", "modelo")
                 return
+            
+            # Modo por lotes: solo se encola; "Aplicar modelos" migra todo de una vez
+            if self.state.modo_lote:
+                nuevo = self.state.encolar_modelo(app_name, nombre_tabla, campos)
+                print(f"Modelo '{nombre_tabla}' {'en cola' if nuevo else 'actualizado en la cola'} ({app_name})")
+                self._actualizar_boton_lote()
+                self.limpiar_campos_modelo()
+                return
+            
             venv_path = str(Path(self.state.ruta_base) / "venv")
+            await esperar_entorno(venv_path)
+            if not await self._esperar_driver_bd("modelo"):
+                return
             resultado = DjangoManager.crear_modelo(
                 project_path=self.state.ruta_proyecto, 
                 app_name=app_name,
                 nombre_tabla=nombre_tabla,
                 campos=campos,
-                venv_path=venv_path
+                venv_path=venv_path,
+                consolidar=self.state.consolidar_migraciones
             ) 
+            self._mostrar_historial_migraciones()
             if resultado["success"]:
                 print(f"Modelo '{nombre_tabla}' guardado y migrado exitosamente")
                 
@@ -1328,6 +1593,108 @@ class UI:
             import traceback
             traceback.print_exc()
 
+    def actualiza_modo_lote(self, e):
+        self.state.modo_lote = e.control.value
+        self._actualizar_boton_lote()
+
+    def actualiza_consolidar(self, e):
+        self.state.consolidar_migraciones = e.control.value
+
+    def _actualizar_boton_lote(self):
+        pendientes = len(self.state.modelos_pendientes)
+        self.btn_aplicar_lote.text = f"Aplicar modelos ({pendientes})"
+        self.btn_aplicar_lote.visible = self.state.modo_lote or pendientes > 0
+        self.btn_aplicar_lote.disabled = pendientes == 0
+        self.page.update()
+
+    async def aplicar_modelos_lote(self, e):
+        if not self.state.modelos_pendientes:
+            return
+        try:
+            self.btn_aplicar_lote.disabled = True
+            self.btn_aplicar_lote.text = "Aplicando..."
+            self.page.update()
+            
+            venv_path = str(Path(self.state.ruta_base) / "venv")
+            await esperar_entorno(venv_path)
+            if not await self._esperar_driver_bd("modelo"):
+                return
+            
+            modelos = self.state.tomar_modelos_pendientes()
+            resultado = DjangoManager.aplicar_modelos_lote(
+                self.state.ruta_proyecto, modelos, venv_path, consolidar=self.state.consolidar_migraciones
+            )
+            self._mostrar_historial_migraciones()
+            
+            # Resultado de cada modelo; los fallidos vuelven a la cola para corregirlos
+            self.lista_resultados_lote.controls.clear()
+            for r in resultado["resultados"]:
+                if r["success"]:
+                    texto, color = f"✓ {r['app']}.{r['modelo']}", ft.Colors.GREEN_800
+                else:
+                    texto, color = f"✗ {r['app']}.{r['modelo']}: {r['error']}", ft.Colors.RED_800
+                    modelo = next(m for m in modelos if m["app"] == r["app"] and m["nombre"] == r["modelo"])
+                    self.state.encolar_modelo(modelo["app"], modelo["nombre"], modelo["campos"])
+                self.lista_resultados_lote.controls.append(ft.Text(texto, color=color, size=12))
+            
+            if any(r["success"] for r in resultado["resultados"]) and not self.state.wizard_states["modelos"]:
+                self.state.update_wizard_step("modelos", True)
+                self._refresh_wizard_ui()
+            if resultado["error"]:
+                self.mostrar_error(f"Error: {resultado['error']}", "modelo")
+        except Exception as ex:
+            print(f"Error aplicando modelos en lote: {ex}")
+            self.mostrar_error(f"Error: Error inesperado: {ex}", "modelo")
+        finally:
+            self._actualizar_boton_lote()
+
+    async def ejecutar_tests(self, e):
+        if not self.state.ruta_proyecto:
+            return
+        try:
+            self.btn_ejecutar_tests.disabled = True
+            self.txt_resultado_tests.value = "Ejecutando tests..."
+            self.txt_resultado_tests.color = None
+            self.page.update()
+            
+            venv_path = str(Path(self.state.ruta_base) / "venv")
+            await esperar_entorno(venv_path)
+            resultado = await asyncio.to_thread(DjangoManager.ejecutar_tests, self.state.ruta_proyecto, venv_path)
+            
+            if resultado["success"]:
+                self.txt_resultado_tests.value = f"✓ {resultado['resumen'] or 'Tests correctos'}"
+                self.txt_resultado_tests.color = ft.Colors.GREEN_800
+            else:
+                print(resultado["salida"] or resultado["error"])
+                self.txt_resultado_tests.value = f"✗ Fallan los tests ({resultado['resumen'] or 'ver consola'})"
+                self.txt_resultado_tests.color = ft.Colors.RED_800
+        except Exception as ex:
+            print(f"Error ejecutando los tests: {ex}")
+            self.txt_resultado_tests.value = f"✗ Error: {ex}"
+            self.txt_resultado_tests.color = ft.Colors.RED_800
+        finally:
+            self.btn_ejecutar_tests.disabled = False
+            self.page.update()
+
+    def _mostrar_historial_migraciones(self):
+        """Las 20 últimas migraciones aplicadas con su tiempo y los avisos de bloqueo (SQL en el tooltip)"""
+        self.columna_historial.controls.clear()
+        historial = leer_historial(self.state.ruta_proyecto) if self.state.ruta_proyecto else []
+        for migracion in reversed(historial[-20:]):
+            sql = "\n".join(s["sql"] for s in migracion["sentencias"][:30])
+            self.columna_historial.controls.append(ft.Text(
+                f"{migracion['fecha'][11:]}  {migracion['app']}.{migracion['migracion']}  "
+                f"{migracion['segundos'] * 1000:.0f} ms · {len(migracion['sentencias'])} SQL"
+                + ("  ✗ " + migracion["error"] if migracion.get("error") else ""),
+                size=12,
+                color=ft.Colors.RED_800 if migracion.get("error") else None,
+                tooltip=sql or None
+            ))
+            for aviso in migracion["avisos"]:
+                self.columna_historial.controls.append(ft.Text(f"    ⚠ {aviso}", size=11, color=ft.Colors.ORANGE_900))
+        self.txt_historial_vacio.visible = not historial
+        self.page.update()
+
     def continuar_sin_modelo(self, e):
         try:
             if not self.state.wizard_states["apps"]:
@@ -1404,6 +1771,7 @@ class UI:
             self.txt_db_password.value = ""
             self.txt_db_host.value = "localhost"
             self.txt_db_port.value = "5432"
+            self.chk_pool_postgres.value = True
             # Actualizar la UI
             self.page.update()
             print("Campos de PostgreSQL limpiados.")
@@ -1726,6 +2094,42 @@ class UI:
             spacing=10
         )
         
+        self.sw_modo_lote = ft.Switch(
+            label="Guardar por lotes (una sola migración)",
+            value=False,
+            on_change=self.actualiza_modo_lote
+        )
+        self.sw_consolidar = ft.Switch(
+            label="Consolidar migraciones (proyecto sin publicar)",
+            value=False,
+            on_change=self.actualiza_consolidar
+        )
+        self.btn_aplicar_lote = ft.ElevatedButton(
+            "Aplicar modelos (0)",
+            icon=ft.Icons.PLAYLIST_ADD_CHECK,
+            on_click=self.aplicar_modelos_lote,
+            bgcolor=ft.Colors.BLUE_800,
+            color=ft.Colors.WHITE,
+            visible=False,
+            disabled=True,
+            style=ft.ButtonStyle(
+                side=ft.BorderSide(1, ft.Colors.BLACK)
+            )
+        )
+        self.lista_resultados_lote = ft.Column(spacing=2)
+        self.btn_ejecutar_tests = ft.ElevatedButton(
+            "Ejecutar tests",
+            icon=ft.Icons.CHECKLIST,
+            on_click=self.ejecutar_tests,
+            style=ft.ButtonStyle(
+                side=ft.BorderSide(1, ft.Colors.BLACK)
+            )
+        )
+        self.txt_resultado_tests = ft.Text("", size=12)
+        # Historial de migraciones (.automatizador/historial_migraciones.json)
+        self.columna_historial = ft.Column(spacing=2)
+        self.txt_historial_vacio = ft.Text("Aún no se ha aplicado ninguna migración", size=12, italic=True)
+        
         container_campos = ft.Container(
             content=self.columna_campos,
             padding=ft.padding.only(left=20, right=20)
@@ -1745,6 +2149,10 @@ class UI:
                         side=ft.BorderSide(1, ft.Colors.BLACK)
                     )
                 ),
+                # Modo por lotes: los modelos se encolan y se migran todos juntos
+                self.sw_modo_lote,
+                # Una sola migración inicial por app mientras se diseñan los modelos
+                self.sw_consolidar,
                 ft.Row(
                     controls=[
                         ft.ElevatedButton(
@@ -1770,7 +2178,21 @@ class UI:
                     ],
                     spacing=10,
                     alignment=ft.MainAxisAlignment.CENTER
-                )
+                ),
+                ft.Row(
+                    controls=[self.btn_aplicar_lote],
+                    alignment=ft.MainAxisAlignment.CENTER
+                ),
+                self.lista_resultados_lote,
+                # Tests CRUD generados para cada modelo (SQLite en memoria, en paralelo)
+                ft.Row(
+                    controls=[self.btn_ejecutar_tests, self.txt_resultado_tests],
+                    alignment=ft.MainAxisAlignment.CENTER
+                ),
+                ft.Divider(height=20),
+                ft.Text("Historial de migraciones", size=16, weight="bold"),
+                self.txt_historial_vacio,
+                self.columna_historial
             ],
             expand=True,
             scroll=True
@@ -1884,6 +2306,14 @@ class UI:
                 self.actualizar_dropdown_apps()
                 print(f"Apps generadas: {', '.join(apps_creadas)}")
                 
+                # Compilar el árbol apps/ en segundo plano (prioridad idle)
+                if self.state.get_venv_python_path().exists():
+                    self.page.run_task(
+                        compilar_bytecode,
+                        str(self.state.get_venv_python_path()),
+                        [self.state.get_layout().apps]
+                    )
+                
                 self.state.update_wizard_step("apps", True)
                 self._refresh_wizard_ui()
                 
@@ -1903,6 +2333,7 @@ class UI:
                 print("Primero genera el proyecto Django")
                 return
 
+            await esperar_entorno(str(Path(self.state.ruta_base) / "venv"))
             python_exe = self.state.get_venv_python_path()
             manage_py = self.state.get_manage_py_path()
             
@@ -2076,6 +2507,10 @@ class UI:
         if not email:
             email = "admin@proyecto.local"
         
+        await esperar_entorno(str(Path(self.state.ruta_base) / "venv"))
+        if not await self._esperar_driver_bd("superuser"):
+            return
+        
         # Usar el método síncrono que funciona mejor
         try:
             self._crear_superusuario_alternativo(
@@ -2089,6 +2524,59 @@ class UI:
 
 
 
+    async def sembrar_usuarios_h(self, e):
+        try:
+            cantidad = int(self.txt_cantidad_usuarios.value.strip())
+        except ValueError:
+            cantidad = 0
+        if cantidad <= 0:
+            self.mostrar_error("Error: Indica cuántos usuarios crear", "superuser")
+            return
+        if not self.txt_pass_usuarios.value:
+            self.mostrar_error("Error: Indica la contraseña de los usuarios de prueba", "superuser")
+            return
+        await self._sembrar_usuarios(generar_usuarios(cantidad, self.txt_pass_usuarios.value), self.chk_hash_unico.value)
+
+    def _csv_usuarios_elegido(self, e: ft.FilePickerResultEvent):
+        if not e.files:
+            return
+        try:
+            usuarios = leer_csv_usuarios(Path(e.files[0].path))
+        except (OSError, ValueError) as ex:
+            self.mostrar_error(f"Error: CSV no válido: {ex}", "superuser")
+            return
+        # Cada fila trae su contraseña: se hashean una a una
+        self.page.run_task(self._sembrar_usuarios, usuarios, False)
+
+    async def _sembrar_usuarios(self, usuarios: list, hash_unico: bool):
+        try:
+            self.btn_sembrar_usuarios.disabled = True
+            self.btn_csv_usuarios.disabled = True
+            self.txt_resultado_sembrado.value = f"Creando {len(usuarios)} usuarios..."
+            self.txt_resultado_sembrado.color = None
+            self.page.update()
+            
+            await esperar_entorno(str(Path(self.state.ruta_base) / "venv"))
+            if not await self._esperar_driver_bd("superuser"):
+                return
+            resultado = await asyncio.to_thread(
+                sembrar_usuarios, str(self.state.get_venv_python_path()), self.state.ruta_proyecto, usuarios, hash_unico
+            )
+            if resultado["success"]:
+                self.txt_resultado_sembrado.value = informe(resultado["datos"])
+                self.txt_resultado_sembrado.color = ft.Colors.GREEN_800
+            else:
+                self.txt_resultado_sembrado.value = f"Error: {resultado['error']}"
+                self.txt_resultado_sembrado.color = ft.Colors.RED_800
+        except Exception as ex:
+            print(f"Error creando usuarios: {ex}")
+            self.txt_resultado_sembrado.value = f"Error: {ex}"
+            self.txt_resultado_sembrado.color = ft.Colors.RED_800
+        finally:
+            self.btn_sembrar_usuarios.disabled = False
+            self.btn_csv_usuarios.disabled = False
+            self.page.update()
+
     def nuevo_proyecto(self, e):
         try:
             # Detener servidor si está ejecutándose
@@ -2102,12 +2590,23 @@ class UI:
                     self.state.proceso_servidor.kill()
                     self.state.proceso_servidor.wait()
             
-            # Resetear el estado del proyecto
+            # Cerrar el worker de Django del proyecto anterior
+            detener_workers()
+            invalidar_layout()
+            
+            # Resetear el estado del proyecto; el intérprete elegido (o el más rápido
+            # detectado) sigue siendo el del desplegable y el pool tiene que ser suyo
             self.state = ProjectState()
+            self.state.interprete = self.dd_interprete.value or ""
+            if self.state.interprete:
+                self._usar_pool_de(self.state.interprete)
             
             # Resetear configuración de base de datos
             self.db_config = DatabaseConfig("Mi_proyecto")
             self.selec_bd_radio.value = "sqlite"  # Resetear a SQLite por defecto
+            self.chk_perfil_sqlite.value = True
+            self.chk_perfil_sqlite.visible = True
+            self.dd_modo_entorno.value = "pool"
             
             # Limpiar todos los campos
             self.txt_folder_name.value = ""
@@ -2117,6 +2616,8 @@ class UI:
             self.txt_admin_user.value = ""
             self.txt_admin_email.value = ""
             self.txt_admin_pass.value = ""
+            self.txt_pass_usuarios.value = ""
+            self.txt_resultado_sembrado.value = ""
             
             # Resetear campos PostgreSQL
             self.txt_db_name.value = "mi_db"
@@ -2124,12 +2625,16 @@ class UI:
             self.txt_db_password.value = ""
             self.txt_db_host.value = "localhost"
             self.txt_db_port.value = "5432"
+            self.chk_pool_postgres.value = True
             self.postgres_fields_container.visible = False  # Ocultar campos PostgreSQL
             
             # Resetear labels y estados
             self.lbl_path.value = "Ninguna"
             self.lbl_path.color = ft.Colors.BLACK
             self.lbl_estado_entorno.visible = False
+            self.lbl_precompilacion.visible = False
+            self.chip_driver_bd.visible = False
+            self._tarea_driver_bd = None
             
             # Resetear botones a estado inicial
             self.btn_aceptar_carpeta.disabled = False
@@ -2162,6 +2667,15 @@ class UI:
                 *[self._crear_fila_campo(i) for i in range(1, 5)],
             ]
             
+            # Resetear modo por lotes (la cola vive en el ProjectState nuevo)
+            self.sw_modo_lote.value = False
+            self.btn_aplicar_lote.visible = False
+            self.lista_resultados_lote.controls.clear()
+            self.txt_resultado_tests.value = ""
+            self.columna_historial.controls.clear()
+            self.txt_historial_vacio.visible = True
+            self.sw_consolidar.value = False
+            
             # Resetear lógica de carpetas
             if hasattr(self, 'logic'):
                 self.logic.folder_name = ""
@@ -2187,40 +2701,31 @@ class UI:
     def _crear_superusuario_alternativo(self, username: str, email: str, password: str):
         try:
             venv_python = str(self.state.get_venv_python_path())
-            manage_py = str(self.state.get_manage_py_path())
-            one_liner = f"from django.contrib.auth import get_user_model; User = get_user_model(); user = User.objects.create_superuser('{username}', '{email}', '{password}'); print('Superuser created')"
-            
-            result = subprocess.run([
-                venv_python, manage_py, "shell", "-c", one_liner
-            ], check=True, capture_output=True, text=True, cwd=str(self.state.ruta_proyecto))
-            
-            print("Superusuario creado exitosamente!")
-            self.page.snack_bar = ft.SnackBar(
-                ft.Text(f"Superusuario {username} creado"),
-                bgcolor=ft.Colors.GREEN
+            # Una sola orden al worker persistente: crea el usuario o, si ya existe, cambia su contraseña
+            resultado = ejecutar_en_proyecto(
+                venv_python, self.state.ruta_proyecto, "crear_superusuario",
+                username=username, email=email, password=password
             )
             
-        except subprocess.CalledProcessError as e:
-            # Si el usuario ya existe, intentar solo cambiar contraseña
-            if "already exists" in str(e.stderr):
-                try:
-                    change_pass = f"from django.contrib.auth import get_user_model; User = get_user_model(); u = User.objects.get(username='{username}'); u.set_password('{password}'); u.save(); print('Password updated')"
-                    subprocess.run([
-                        venv_python, manage_py, "shell", "-c", change_pass
-                    ], check=True, capture_output=True, text=True, cwd=str(self.state.ruta_proyecto))
-                    
-                    self.page.snack_bar = ft.SnackBar(
-                        ft.Text(f"Contraseña actualizada para {username}"),
-                        bgcolor=ft.Colors.ORANGE
-                    )
-                except Exception:
-                    self.page.snack_bar = ft.SnackBar(
-                        ft.Text("Error: Usuario ya existe y no se pudo actualizar"),
-                        bgcolor=ft.Colors.RED
-                    )
+            if resultado["ok"] and resultado.get("datos", {}).get("actualizado"):
+                self.page.snack_bar = ft.SnackBar(
+                    ft.Text(f"Contraseña actualizada para {username}"),
+                    bgcolor=ft.Colors.ORANGE
+                )
+            elif resultado["ok"]:
+                print("Superusuario creado exitosamente!")
+                self.page.snack_bar = ft.SnackBar(
+                    ft.Text(f"Superusuario {username} creado"),
+                    bgcolor=ft.Colors.GREEN
+                )
+            elif "already exists" in (resultado.get("error") or ""):
+                self.page.snack_bar = ft.SnackBar(
+                    ft.Text("Error: Usuario ya existe y no se pudo actualizar"),
+                    bgcolor=ft.Colors.RED
+                )
             else:
                 self.page.snack_bar = ft.SnackBar(
-                    ft.Text(f"Error: {e.stderr}"),
+                    ft.Text(f"Error: {resultado.get('error')}"),
                     bgcolor=ft.Colors.RED
                 )
         except Exception as e:
@@ -2270,7 +2775,7 @@ class UI:
             elif step == "entorno":
                 self.page.run_task(self.crea_entorno_h, None)
             elif step == "bd_config":
-                self.guarda_bd_config(None)
+                self.page.run_task(self.guarda_bd_config, None)
             elif step == "apps":
                 self.page.run_task(self.generar_apps, None)
             elif step == "modelos":
@@ -2301,5 +2806,6 @@ def main(page: ft.Page):
     ui = UI(page) 
     page.on_keyboard_event = ui.handle_keyboard_event
     page.add(ui.build())
+    page.run_task(ui.preparar_entornos)
 
 ft.app(target=main)
\ No newline at end of file